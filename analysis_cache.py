@@ -0,0 +1,71 @@
+# analysis_cache.py
+import os
+import threading
+from collections import OrderedDict
+
+
+class AnalysisCache:
+    """Bounded LRU of analysis results, tied to one pattern/model version.
+
+    Lookups carry the analyzer's current version; when it differs from the
+    version the entries were computed under, the cache empties itself so
+    stale classifications are never served after patterns or the model change.
+    """
+
+    def __init__(self, max_size=None):
+        # A size of 0 disables caching (every lookup misses)
+        self.max_size = int(os.environ.get('NLP_CACHE_SIZE', 10000)) if max_size is None else max_size
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, version, key):
+        with self._lock:
+            self._check_version(version)
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, version, key, result):
+        if not self.max_size:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'version': self.version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
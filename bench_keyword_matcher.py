@@ -0,0 +1,112 @@
+# bench_keyword_matcher.py
+import random
+import string
+import sys
+import time
+from keyword_matcher import KeywordMatcher
+from fuzzy_matcher import FuzzyMatcher
+from language_packs import PackRegistry
+
+SAMPLE_MESSAGES = [
+    "There's a huge pothole on Main Street near the school, cars keep swerving",
+    "Garbage has not been collected for two weeks on 5th Avenue, bins overflowing",
+    "Street light out at the corner of Oak and Maple, very dark street at night",
+    "Water leak from a pipe burst flooding the sidewalk on Elm Road",
+    "Someone sprayed graffiti all over the park wall near the playground",
+    "Traffic light stuck on red at Broadway and 42nd, causing congestion",
+    "Hello, I just wanted to say the new bike lanes look great",
+]
+
+MISSPELLED_MESSAGES = [
+    "big pot hole on main st, my tire is flat",
+    "garbadge piling up behind the store",
+    "the streetlite on oak has been out all week",
+    "potholle near the school is getting worse",
+    "someone left trash in the dumpstr area",
+    "grafitti all over the underpass",
+]
+
+
+def build_pattern_table(categories, keywords_per_category, seed=42):
+    """Synthetic pattern table of realistic-looking multi-word keywords"""
+    rng = random.Random(seed)
+    words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    table = {}
+    for c in range(categories):
+        table[f'category_{c}'] = [' '.join(rng.sample(words, rng.randint(1, 3))) for _ in range(keywords_per_category)]
+    # Keep the real civic keywords in the table so messages produce hits
+    table['pothole'] = ['pothole', 'road damage', 'hole in road']
+    table['garbage'] = ['garbage', 'trash', 'overflowing']
+    table['street_light'] = ['street light', 'dark street', 'light out']
+    return table
+
+
+def naive_match(table, message_lower):
+    """The previous approach: test every keyword with a substring search"""
+    hits = {}
+    for category, keywords in table.items():
+        matched = [k for k in keywords if k in message_lower]
+        if matched:
+            hits[category] = matched
+    return hits
+
+
+def bench(fn, messages, min_seconds=1.0):
+    """Messages per second for fn over messages"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        for message in messages:
+            fn(message)
+        count += len(messages)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    messages = [m.lower() for m in SAMPLE_MESSAGES] * 20
+    print(f"{'keywords':>9} {'states':>8} {'naive msg/s':>12} {'automaton msg/s':>16} {'speedup':>8}")
+    for categories, per_category in [(6, 8), (20, 50), (50, 100), (100, 200)]:
+        table = build_pattern_table(categories, per_category)
+        keyword_count = sum(len(k) for k in table.values())
+
+        build_start = time.perf_counter()
+        matcher = KeywordMatcher(table)
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        # Both approaches must agree on which categories matched
+        for message in messages[:len(SAMPLE_MESSAGES)]:
+            assert set(naive_match(table, message)) == set(matcher.match(message)), message
+
+        naive_rate = bench(lambda m: naive_match(table, m), messages)
+        automaton_rate = bench(matcher.match, messages)
+        print(f"{keyword_count:>9} {matcher.size:>8} {naive_rate:>12.0f} {automaton_rate:>16.0f} "
+              f"{automaton_rate / naive_rate:>7.1f}x  (built in {build_ms:.1f}ms)")
+        sys.stdout.flush()
+
+
+def main_fuzzy():
+    """Typo recall and throughput of exact-only vs exact + fuzzy matching"""
+    table = PackRegistry().get('en').keyword_table
+    exact = KeywordMatcher(table)
+    fuzzy = FuzzyMatcher(table)
+
+    def exact_and_fuzzy(message):
+        hits = exact.match(message)
+        hits.update({c: h for c, h in fuzzy.match(message).items() if c not in hits})
+        return hits
+
+    typos = [m.lower() for m in MISSPELLED_MESSAGES]
+    found_exact = sum(1 for m in typos if set(exact.match(m)) - {'_urgency'})
+    found_fuzzy = sum(1 for m in typos if set(exact_and_fuzzy(m)) - {'_urgency'})
+    print(f"\nMisspelled messages classified: exact {found_exact}/{len(typos)}, with fuzzy {found_fuzzy}/{len(typos)}")
+
+    messages = [m.lower() for m in SAMPLE_MESSAGES + MISSPELLED_MESSAGES] * 20
+    exact_rate = bench(exact.match, messages)
+    fuzzy_rate = bench(exact_and_fuzzy, messages)
+    print(f"{'exact msg/s':>12} {'exact+fuzzy msg/s':>18} {'cost':>6}")
+    print(f"{exact_rate:>12.0f} {fuzzy_rate:>18.0f} {exact_rate / fuzzy_rate:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
+    main_fuzzy()
@@ -0,0 +1,92 @@
+# bench_location_extractor.py
+import random
+import re
+import time
+from location_extractor import location_extractor
+
+# The previous extraction path: four patterns tried in turn with findall
+LEGACY_PATTERNS = [
+    r'(?:at|on|near|around|beside|opposite)\s+([^,.!?]+)',
+    r'(\d+\s+\w+\s+(?:street|st|avenue|ave|road|rd|boulevard|blvd|lane|ln))',
+    r'(?:location|address)[:\s]+([^,.!?]+)',
+    r'in\s+([^,.!?]+?(?:area|neighborhood|district))'
+]
+
+TEMPLATES = [
+    "There's a huge pothole on {street} near the school, cars keep swerving",
+    "Garbage has not been collected for two weeks at {number} {street}, bins overflowing",
+    "Street light out at the corner of {name} and {cross}, very dark at night",
+    "Water leak from a pipe burst flooding the sidewalk on {street}",
+    "Someone sprayed graffiti all over the wall near {landmark}",
+    "Traffic light stuck on red at {name} and {cross}, causing congestion",
+    "Overflowing bins everywhere in the {name} neighborhood",
+    "Broken lamp post, location: {number} {street}",
+    "the road is cracked and nobody has fixed it for months",
+]
+NAMES = ['Main', 'Oak', 'Maple', 'Elm', 'Broadway', 'Lexington', 'Park', 'Cedar', 'Hudson', 'Bleecker']
+SUFFIXES = ['Street', 'St', 'Avenue', 'Ave', 'Road', 'Rd', 'Boulevard', 'Lane']
+LANDMARKS = ['Central Park', 'the public library', 'Union Square', 'the bus stop', 'Lincoln High School']
+
+
+def build_corpus(size=2000, seed=7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        corpus.append(rng.choice(TEMPLATES).format(
+            street=f"{rng.choice(NAMES)} {rng.choice(SUFFIXES)}",
+            number=rng.randint(1, 999),
+            name=rng.choice(NAMES),
+            cross=f"{rng.randint(1, 120)}th",
+            landmark=rng.choice(LANDMARKS)
+        ))
+    return corpus
+
+
+def legacy_extract(message):
+    """Old location stage plus the geocoder's old cache key"""
+    location = 'Unknown'
+    for pattern in LEGACY_PATTERNS:
+        matches = re.findall(pattern, message, re.IGNORECASE)
+        if matches:
+            location = matches[0].strip()
+            if len(location) > 5:  # Reasonable location length
+                break
+    location = location or 'Unknown'
+    return location, location.lower().strip()
+
+
+def bench(fn, messages, rounds=5):
+    """Best-of-rounds messages per second for fn over messages"""
+    best = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for message in messages:
+            fn(message)
+        best = max(best, len(messages) / (time.perf_counter() - start))
+    return best
+
+
+def main():
+    corpus = build_corpus()
+
+    print("Sample extractions (legacy -> extractor):")
+    for message in corpus[:len(TEMPLATES)]:
+        found = location_extractor.extract(message)
+        new = f"{found['text']} [{found['kind']}] key={found['key']!r}" if found else 'None'
+        print(f"  {message}\n    {legacy_extract(message)[0]!r} -> {new}")
+
+    kinds = {}
+    for message in corpus:
+        found = location_extractor.extract(message)
+        kind = found['kind'] if found else 'none'
+        kinds[kind] = kinds.get(kind, 0) + 1
+    print(f"\nKinds over {len(corpus)} messages: {kinds}")
+
+    legacy_rate = bench(legacy_extract, corpus)
+    extractor_rate = bench(location_extractor.extract, corpus)
+    print(f"{'legacy msg/s':>13} {'extractor msg/s':>16} {'speedup':>8}")
+    print(f"{legacy_rate:>13.0f} {extractor_rate:>16.0f} {extractor_rate / legacy_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
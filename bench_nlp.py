@@ -0,0 +1,228 @@
+# bench_nlp.py
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime
+from analysis_cache import AnalysisCache
+from build_nlp_corpus import DEFAULT_CORPUS, load_corpus
+from intelligent_nlp import IntelligentCivicNLP
+from location_extractor import normalize_location
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_results')
+BATCH_SIZE = 100
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+# Analyzers take the whole corpus text list and return (analyses, per-message
+# latencies in ms), so batch analyzers can be measured the same way
+def run_uncached(texts):
+    nlp = IntelligentCivicNLP(cache=AnalysisCache(max_size=0))
+    return _timed(nlp.analyze_message, texts)
+
+
+def run_cached(texts):
+    # Default-sized cache, cold at the start: repeated wordings in the corpus hit it
+    nlp = IntelligentCivicNLP(cache=AnalysisCache())
+    return _timed(nlp.analyze_message, texts)
+
+
+def run_batched(texts):
+    # Latency is the batch time spread evenly over the messages in it
+    nlp = IntelligentCivicNLP(cache=AnalysisCache(max_size=0))
+    analyses, latencies = [], []
+    for i in range(0, len(texts), BATCH_SIZE):
+        chunk = texts[i:i + BATCH_SIZE]
+        start = time.perf_counter()
+        analyses.extend(nlp.classify_many(chunk))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        latencies.extend([elapsed_ms / len(chunk)] * len(chunk))
+    return analyses, latencies
+
+
+def _timed(analyze, texts):
+    analyses, latencies = [], []
+    for text in texts:
+        start = time.perf_counter()
+        analyses.append(analyze(text))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return analyses, latencies
+
+
+ANALYZERS = {
+    'pipeline': run_uncached,
+    'pipeline_cached': run_cached,
+    'classify_many': run_batched
+}
+
+
+def class_metrics(expected, predicted):
+    """Per-label precision/recall/F1 and support, plus accuracy and macro F1"""
+    labels = sorted(set(expected) | set(predicted))
+    true_positive = Counter(e for e, p in zip(expected, predicted) if e == p)
+    expected_count = Counter(expected)
+    predicted_count = Counter(predicted)
+
+    per_class = {}
+    for label in labels:
+        tp = true_positive[label]
+        precision = tp / predicted_count[label] if predicted_count[label] else 0.0
+        recall = tp / expected_count[label] if expected_count[label] else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_class[label] = {
+            'precision': round(precision, 4),
+            'recall': round(recall, 4),
+            'f1': round(f1, 4),
+            'support': expected_count[label]
+        }
+
+    supported = [m['f1'] for label, m in per_class.items() if m['support']]
+    return {
+        'accuracy': round(sum(true_positive.values()) / len(expected), 4) if expected else 0.0,
+        'macro_f1': round(sum(supported) / len(supported), 4) if supported else 0.0,
+        'per_class': per_class
+    }
+
+
+def location_metrics(records, analyses):
+    """Exact-match accuracy of the normalized location, and spurious extractions"""
+    labeled = exact = kind = spurious = 0
+    for record, analysis in zip(records, analyses):
+        found = analysis['location'] not in (None, 'Unknown')
+        if record['location_key'] is None:
+            spurious += found
+            continue
+        labeled += 1
+        if found and normalize_location(analysis['location']) == record['location_key']:
+            exact += 1
+            kind += analysis.get('location_kind') == record['location_kind']
+
+    unlabeled = len(records) - labeled
+    return {
+        'labeled': labeled,
+        'exact_match': round(exact / labeled, 4) if labeled else 0.0,
+        'kind_match': round(kind / labeled, 4) if labeled else 0.0,
+        'spurious_rate': round(spurious / unlabeled, 4) if unlabeled else 0.0
+    }
+
+
+def evaluate(name, records):
+    texts = [record['text'] for record in records]
+    start = time.perf_counter()
+    analyses, latencies = ANALYZERS[name](texts)
+    elapsed = time.perf_counter() - start
+
+    by_language = {}
+    for language in sorted({record['language'] for record in records}):
+        pairs = [(r['issue'], a['primary_issue']) for r, a in zip(records, analyses) if r['language'] == language]
+        by_language[language] = round(sum(e == p for e, p in pairs) / len(pairs), 4)
+
+    return {
+        'issue': class_metrics([r['issue'] for r in records], [a['primary_issue'] for a in analyses]),
+        'issue_accuracy_by_language': by_language,
+        'urgency': class_metrics([r['urgency'] for r in records], [a['urgency'] for a in analyses]),
+        'language_accuracy': round(sum(r['language'] == a['language'] for r, a in zip(records, analyses)) / len(records), 4),
+        'location': location_metrics(records, analyses),
+        'performance': {
+            'messages': len(records),
+            'seconds': round(elapsed, 4),
+            'msgs_per_sec': round(len(records) / elapsed, 1),
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 4),
+                'p95': round(percentile(latencies, 95), 4),
+                'p99': round(percentile(latencies, 99), 4),
+                'max': round(max(latencies), 4)
+            }
+        }
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summary_rows(results):
+    for name, metrics in results['analyzers'].items():
+        yield name, {
+            'issue acc': metrics['issue']['accuracy'],
+            'macro F1': metrics['issue']['macro_f1'],
+            'urgency acc': metrics['urgency']['accuracy'],
+            'location': metrics['location']['exact_match'],
+            'msg/s': metrics['performance']['msgs_per_sec'],
+            'p99 ms': metrics['performance']['latency_ms']['p99']
+        }
+
+
+def print_report(results, previous=None):
+    previous_rows = dict(summary_rows(previous)) if previous else {}
+    for name, row in summary_rows(results):
+        print(f"\n📊 {name}")
+        for metric, value in row.items():
+            line = f"   {metric:<12} {value:>10}"
+            before = previous_rows.get(name, {}).get(metric)
+            if before is not None:
+                line += f"   (was {before}, {value - before:+.4g})"
+            print(line)
+
+    for name, metrics in results['analyzers'].items():
+        print(f"\n🏷️ {name} per-class issue metrics")
+        print(f"   {'label':<14} {'precision':>9} {'recall':>7} {'f1':>7} {'support':>8}")
+        for label, m in metrics['issue']['per_class'].items():
+            print(f"   {label:<14} {m['precision']:>9.3f} {m['recall']:>7.3f} {m['f1']:>7.3f} {m['support']:>8}")
+        break  # every analyzer runs the same classifier; one table is enough
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and throughput benchmark for the civic NLP engine")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    parser.add_argument('--analyzer', action='append', choices=sorted(ANALYZERS),
+                        help="Analyzer to run (repeatable); all of them by default")
+    parser.add_argument('--limit', type=int, help="Only use the first N corpus messages")
+    parser.add_argument('--output', help="Results JSON path (default bench_results/nlp-<timestamp>.json)")
+    parser.add_argument('--compare', help="Earlier results JSON to show deltas against")
+    args = parser.parse_args()
+
+    records = load_corpus(args.corpus)[:args.limit]
+    print(f"🧪 Benchmarking {len(records)} labeled messages from {args.corpus}")
+
+    results = {
+        'run': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'nlp_version': IntelligentCivicNLP(cache=AnalysisCache(max_size=0)).version,
+            'corpus': os.path.basename(args.corpus),
+            'corpus_size': len(records),
+            'python': platform.python_version()
+        },
+        'analyzers': {name: evaluate(name, records) for name in (args.analyzer or ANALYZERS)}
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+    print_report(results, previous)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"nlp-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# bench_vision_batcher.py
+import base64
+import tempfile
+import time
+from http_client import http_client
+from media_store import MediaStore
+from vision_batcher import VisionBatcher, VISION_FEATURES
+from vision_stub import start_stub
+
+
+def single_requests(url, store, digests):
+    """The previous approach: one annotate call per image"""
+    for digest in digests:
+        payload = {"requests": [{"image": {"content": base64.b64encode(store.read(digest)).decode('utf-8')},
+                                 "features": VISION_FEATURES}]}
+        http_client.post('google_vision', url, json=payload).json()
+
+
+def batched_requests(url, store, digests):
+    done = []
+    batcher = VisionBatcher(lambda report_id, digest, result: done.append(report_id), lambda data: data,
+                            api_url=url, store=store, max_wait=0.05)
+    for report_id, digest in enumerate(digests):
+        batcher.submit(report_id, digest)
+    batcher.flush()
+    assert len(done) == len(digests)
+    return batcher.stats()
+
+
+def main(images=64, latency=0.12, per_image_latency=0.01):
+    server, url = start_stub(latency=latency, per_image_latency=per_image_latency)
+    store = MediaStore(root=tempfile.mkdtemp())
+    digests = [store.put_bytes(b'\xff\xd8\xff' + bytes([i % 256]) * 50000 + str(i).encode()) for i in range(images)]
+    print(f"Stub latency {latency * 1000:.0f}ms per call + {per_image_latency * 1000:.0f}ms per image, {images} images")
+
+    start = time.perf_counter()
+    single_requests(url, store, digests)
+    single_seconds = time.perf_counter() - start
+    single_calls = server.calls
+
+    start = time.perf_counter()
+    stats = batched_requests(url, store, digests)
+    batched_seconds = time.perf_counter() - start
+    server.shutdown()
+
+    print(f"{'mode':<10} {'calls':>6} {'seconds':>8} {'images/s':>9}")
+    print(f"{'single':<10} {single_calls:>6} {single_seconds:>8.2f} {images / single_seconds:>9.1f}")
+    print(f"{'batched':<10} {stats['batches']:>6} {batched_seconds:>8.2f} {images / batched_seconds:>9.1f}"
+          f"   ({single_seconds / batched_seconds:.1f}x, avg batch {stats['avg_batch']})")
+
+
+if __name__ == "__main__":
+    main()
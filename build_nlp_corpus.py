@@ -0,0 +1,219 @@
+# build_nlp_corpus.py
+import argparse
+import json
+import os
+import random
+from location_extractor import normalize_location
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'nlp_corpus.jsonl')
+
+# Issue types whose reports default to medium urgency
+EMERGENCY_ISSUES = {'water_issue', 'traffic'}
+
+# {loc} is replaced with a location phrase (or nothing). Templates include
+# wordings the keyword tables miss and common misspellings on purpose, so
+# the benchmark shows where classification still falls short.
+TEMPLATES = {
+    'en': {
+        'pothole': [
+            "There's a huge pothole {loc}, cars keep swerving around it",
+            "Pothole {loc} is getting bigger every day",
+            "Deep pothole {loc}, my tire blew out this morning",
+            "Road damage {loc} needs fixing",
+            "Big hole in road {loc}",
+            "The road is crumbling {loc}",
+            "crater in the road {loc}, someone will get hurt",
+            "pot hole {loc} again",
+            "potholle {loc} please fix",
+            "Cracked road {loc}, the asphalt is coming apart",
+        ],
+        'garbage': [
+            "Garbage hasn't been picked up {loc} for two weeks",
+            "Trash everywhere {loc}",
+            "Overflowing bin {loc}, bags on the ground",
+            "Someone dumped an old mattress {loc}",
+            "Litter all over the sidewalk {loc}",
+            "garbadge piling up {loc}",
+            "Rubbish bags ripped open by animals {loc}",
+            "Nobody collected the bins {loc} this week",
+            "the dumpster {loc} is full and smells awful",
+        ],
+        'street_light': [
+            "Street light out {loc}",
+            "The streetlight {loc} keeps flickering",
+            "Lamp post is broken {loc}",
+            "It's a dark street {loc}, none of the lights work",
+            "streetlite out {loc} for a week",
+            "Broken light {loc}, it's pitch black at night",
+            "The light pole {loc} is leaning and the bulb is dead",
+        ],
+        'water_issue': [
+            "Water leak {loc}",
+            "Pipe burst {loc} and water is flooding the road",
+            "Sewage smell coming from the drain {loc}",
+            "Water main break {loc}",
+            "Flooding {loc} after the rain, the drainage is blocked",
+            "Water gushing out of the ground {loc}",
+            "Leak from a hydrant {loc}",
+        ],
+        'traffic': [
+            "Traffic light stuck on red {loc}",
+            "Car crash {loc}, the road is blocked",
+            "Accident {loc}, two cars involved",
+            "Stop light not working {loc}",
+            "Signal broken {loc}, nobody knows who has right of way",
+            "Terrible congestion {loc} since the lane closure",
+            "The walk signal {loc} never turns on",
+        ],
+        'graffiti': [
+            "Graffiti on the wall {loc}",
+            "Someone spray painted the bus shelter {loc}",
+            "Vandalism {loc}, the benches are covered in paint",
+            "Tagging all over the underpass {loc}",
+            "grafitti on the school fence {loc}",
+            "The mailbox {loc} has been defaced",
+        ],
+        'other': [
+            "The new bike lanes {loc} look great",
+            "Can you add a bench {loc}?",
+            "Loud music every night {loc}",
+            "The park {loc} needs more trees",
+            "When is the next council meeting?",
+            "A dog has been barking all day {loc}",
+            "Is the library open on Sundays?",
+            "Please add a crosswalk {loc}",
+        ],
+    },
+    'es': {
+        'pothole': [
+            "Hay un bache enorme {loc}",
+            "Los baches {loc} están cada vez peores",
+            "Pavimento roto {loc}, ya se ponchó una llanta",
+        ],
+        'garbage': [
+            "Hay basura por todos lados {loc}",
+            "No han recogido la basura {loc} en dos semanas",
+            "El contenedor lleno {loc} huele muy mal",
+        ],
+        'street_light': [
+            "La luz de la calle está apagada {loc}",
+            "El poste de luz {loc} no funciona",
+            "Calle oscura {loc}, no sirve el alumbrado",
+        ],
+        'water_issue': [
+            "Hay una fuga de agua {loc}",
+            "Tubería rota {loc}, se está inundando la calle",
+            "Sale agua de la alcantarilla {loc}",
+        ],
+        'traffic': [
+            "El semáforo no funciona {loc}",
+            "Hubo un choque {loc}, la calle está bloqueada",
+            "Accidente {loc}, hay mucho tráfico",
+        ],
+        'graffiti': [
+            "Grafiti en la pared {loc}",
+            "Vandalismo en el parque {loc}",
+        ],
+        'other': [
+            "¿A qué hora abre la biblioteca?",
+            "Gracias por arreglar la banqueta {loc}",
+            "Quisiera una banca nueva {loc}",
+        ],
+    }
+}
+
+URGENT_PHRASES = {
+    'en': ["This is urgent!", "Please fix ASAP.", "It's really dangerous.", "Emergency!", "Needs attention immediately."],
+    'es': ["¡Es urgente!", "Es muy peligroso.", "¡Emergencia!"],
+}
+
+STREET_NAMES = ['Main', 'Oak', 'Maple', 'Elm', 'Cedar', 'Hudson', 'Lexington', 'Bleecker', 'Grand', 'Jefferson', 'Pine', 'Walnut']
+SUFFIXES = ['Street', 'St', 'Avenue', 'Ave', 'Road', 'Rd', 'Boulevard', 'Lane', 'Drive']
+LANDMARKS = ['Central Park', 'the public library', 'Lincoln High School', 'Union Square', 'the bus stop', 'City Hall', 'the train station']
+AREAS = ['Riverside', 'Midtown', 'Eastside', 'Harbor', 'Old Town']
+
+
+def ordinal(n):
+    suffix = 'th' if 10 <= n % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f'{n}{suffix}'
+
+
+def random_location(rng, language):
+    """(phrase to insert, location text a perfect extractor returns, kind)"""
+    name = rng.choice(STREET_NAMES)
+    street = f"{name} {rng.choice(SUFFIXES)}"
+    choice = rng.random()
+
+    if language == 'es':
+        if choice < 0.4:
+            return f"en {street}", street, 'street'
+        if choice < 0.7:
+            cross = ordinal(rng.randint(1, 120))
+            return f"en la esquina de {name} y {cross}", f"{name} y {cross}", 'intersection'
+        return '', None, None
+
+    if choice < 0.2:
+        address = f"{rng.randint(1, 999)} {street}"
+        return f"at {address}", address, 'street_address'
+    if choice < 0.35:
+        cross = f"{rng.choice(STREET_NAMES)} {rng.choice(SUFFIXES)}" if rng.random() < 0.5 else ordinal(rng.randint(1, 120))
+        return f"at the corner of {name} and {cross}", f"{name} and {cross}", 'intersection'
+    if choice < 0.55:
+        return f"on {street}", street, 'street'
+    if choice < 0.7:
+        landmark = rng.choice(LANDMARKS)
+        text = landmark[4:] if landmark.startswith('the ') else landmark
+        return f"near {landmark}", text, 'landmark'
+    if choice < 0.8:
+        area = f"{rng.choice(AREAS)} {rng.choice(['neighborhood', 'district', 'area'])}"
+        return f"in the {area}", area, 'area'
+    return '', None, None
+
+
+def build_corpus(size=3000, seed=2024, spanish_share=0.15):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(size):
+        language = 'es' if rng.random() < spanish_share else 'en'
+        issue = rng.choice(list(TEMPLATES[language]))
+        template = rng.choice(TEMPLATES[language][issue])
+
+        phrase, location, kind = random_location(rng, language) if '{loc}' in template else ('', None, None)
+        text = ' '.join(template.replace('{loc}', phrase).split())
+        text = text.replace(' ,', ',').replace(' ?', '?')
+
+        urgent = rng.random() < 0.2
+        if urgent:
+            text = f"{text} {rng.choice(URGENT_PHRASES[language])}"
+        if rng.random() < 0.25:
+            text = text.lower()
+
+        records.append({
+            'text': text,
+            'language': language,
+            'issue': issue,
+            'urgency': 'high' if urgent else 'medium' if issue in EMERGENCY_ISSUES else 'normal',
+            'location': location,
+            'location_kind': kind,
+            'location_key': normalize_location(location) if location else None
+        })
+    return records
+
+
+def load_corpus(path=DEFAULT_CORPUS):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the labeled NLP benchmark corpus")
+    parser.add_argument('--size', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--output', default=DEFAULT_CORPUS)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.size, args.seed)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for record in corpus:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    print(f"✅ Wrote {len(corpus)} labeled messages to {args.output}")
@@ -0,0 +1,99 @@
+# change_hub.py
+import json
+import os
+import threading
+from collections import deque
+from itertools import islice
+
+
+class StreamFull(Exception):
+    """Raised when a new stream would exceed the hub's client limit"""
+
+
+class ChangeHub:
+    """Fans report changes out to server-sent event streams.
+
+    Each change is serialized once into an SSE frame and kept in a short
+    history, so every stream shares the same bytes and a reconnecting
+    client (Last-Event-ID) replays what it missed. Streams block on a
+    condition variable between changes, so an idle viewer costs one
+    keepalive comment per heartbeat and no polling.
+    """
+
+    def __init__(self, history=None, heartbeat=None, max_clients=None):
+        self.history = deque(maxlen=history or int(os.environ.get('STREAM_HISTORY', 500)))
+        self.heartbeat = heartbeat or float(os.environ.get('STREAM_HEARTBEAT_SECONDS', 25))
+        self.max_clients = max_clients or int(os.environ.get('STREAM_MAX_CLIENTS', 100))
+        self._condition = threading.Condition()
+        self._last_id = 0
+        self._clients = 0
+        self._stats = {'published': 0, 'streams_opened': 0, 'frames_sent': 0, 'keepalives': 0, 'resets': 0}
+
+    def publish(self, event, data):
+        """Queue one event for every open stream; returns its ID"""
+        payload = json.dumps(data, separators=(',', ':'), default=str)
+        with self._condition:
+            self._last_id += 1
+            self.history.append((self._last_id, f'id: {self._last_id}\nevent: {event}\ndata: {payload}\n\n'))
+            self._stats['published'] += 1
+            self._condition.notify_all()
+        return self._last_id
+
+    def watch(self, db):
+        """Publish a 'report' event, with the report as a GeoJSON feature, for each write to db"""
+        def on_change(action, report_id):
+            report = db.get_report(report_id)
+            if report:
+                self.publish('report', {'action': action, 'feature': db.report_feature(report)})
+        db.change_listeners.append(on_change)
+
+    def _frames_after(self, last_id):
+        # Called with the condition held. IDs are consecutive, so the history
+        # index of an ID is its distance from the oldest one kept
+        if last_id == self._last_id:
+            return []
+        oldest = self.history[0][0] if self.history else self._last_id + 1
+        if last_id > self._last_id or last_id < oldest - 1:
+            self._stats['resets'] += 1
+            return [f'id: {self._last_id}\nevent: reset\ndata: {{}}\n\n']
+        return [frame for _, frame in islice(self.history, last_id + 1 - oldest, None)]
+
+    def stream(self, last_event_id=None, retry_ms=5000):
+        """Generator of SSE text for one client.
+
+        Starts at the current position, or after last_event_id when the
+        browser is reconnecting. A client that missed more than the
+        history holds (or saw IDs from before a restart) gets a 'reset'
+        event telling it to reload a snapshot.
+        """
+        with self._condition:
+            if self._clients >= self.max_clients:
+                raise StreamFull(f"{self._clients} streams already open")
+            self._clients += 1
+            self._stats['streams_opened'] += 1
+            last_id = self._last_id if last_event_id is None else last_event_id
+        try:
+            yield f'retry: {retry_ms}\n\n'
+            while True:
+                with self._condition:
+                    if last_id == self._last_id:
+                        self._condition.wait(self.heartbeat)
+                    frames = self._frames_after(last_id)
+                    last_id = self._last_id
+                    if frames:
+                        self._stats['frames_sent'] += len(frames)
+                    else:
+                        self._stats['keepalives'] += 1
+                yield ''.join(frames) if frames else ': keepalive\n\n'
+        finally:
+            with self._condition:
+                self._clients -= 1
+
+    def stats(self):
+        with self._condition:
+            return dict(self._stats, last_event_id=self._last_id, open_streams=self._clients,
+                        history=len(self.history), heartbeat_seconds=self.heartbeat)
+
+
+# Global instance
+change_hub = ChangeHub()
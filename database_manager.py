@@ -1,16 +1,62 @@
 # database_manager.py
 import sqlite3
+import base64
 import csv
 import json
 from datetime import datetime, timedelta
 import os
 import time
+import geohash
+from media_store import media_url
+
+# Priorities in escalation order, and the duplicate counts that escalate a report
+PRIORITY_LEVELS = ['low', 'medium', 'high', 'urgent']
+DUPLICATE_PRIORITY_THRESHOLDS = [(10, 'urgent'), (3, 'high')]
+
+# Open reports classified with less confidence than this need a human look
+TRIAGE_CONFIDENCE = 0.5
+
+# Columns the report list API may return, and the ones it can count by
+LIST_COLUMNS = ('id', 'issue_type', 'description', 'location', 'status', 'department', 'priority',
+                'created_at', 'updated_at', 'confidence', 'urgency', 'duplicate_count', 'latitude', 'longitude')
+FACET_COLUMNS = ('status', 'issue_type', 'department')
+# Facet counts label filter options, so a few seconds' staleness is fine
+FACET_CACHE_SECONDS = float(os.environ.get('FACET_CACHE_SECONDS', 10))
+
+
+def encode_cursor(created_at, report_id):
+    """Opaque keyset cursor for the row after which the next page starts"""
+    return base64.urlsafe_b64encode(json.dumps([created_at, report_id]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from encode_cursor; ValueError if it was tampered with"""
+    try:
+        created_at, report_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if not isinstance(report_id, int):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return created_at, report_id
+
+# Virtual columns computed from the stored analysis JSON, so they can be
+# indexed and filtered on without re-running NLP
+GENERATED_COLUMNS = [
+    ('confidence', "REAL GENERATED ALWAYS AS (json_extract(analysis, '$.nlp.confidence')) VIRTUAL"),
+    ('urgency', "TEXT GENERATED ALWAYS AS (json_extract(analysis, '$.nlp.urgency')) VIRTUAL"),
+    ('image_phash', "TEXT GENERATED ALWAYS AS (json_extract(analysis, '$.image.phash')) VIRTUAL")
+]
 
 class DatabaseManager:
     def __init__(self, db_path='civicbot.db'):
         self.db_path = db_path
-        self._run_migrations()
+        self._facet_cache = {}
+        # Called as listener(action, report_id) after a report is created or updated
+        self.change_listeners = []
+        # Create the table first so a fresh database also gets its indexes
         self.init_database()
+        self._run_migrations()
+        self.backfill_geohashes()
     
     def _run_migrations(self):
         """Run all necessary database migrations"""
@@ -19,8 +65,8 @@ class DatabaseManager:
         c = conn.cursor()
         
         try:
-            # Check current schema
-            c.execute("PRAGMA table_info(reports)")
+            # Check current schema (table_xinfo also lists generated columns)
+            c.execute("PRAGMA table_xinfo(reports)")
             existing_columns = [column[1] for column in c.fetchall()]
             print(f"📊 Existing columns: {existing_columns}")
             
@@ -33,8 +79,15 @@ class DatabaseManager:
                 ('updated_at', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP'),
                 ('resolved_at', 'TIMESTAMP'),
                 ('latitude', 'REAL'),
-                ('longitude', 'REAL')
-            ]
+                ('longitude', 'REAL'),
+                ('geohash', 'TEXT'),
+                ('duplicate_of', 'INTEGER'),
+                ('duplicate_count', 'INTEGER DEFAULT 0'),
+                ('pattern_version', 'TEXT'),
+                ('issue_type_corrected', 'INTEGER DEFAULT 0'),
+                ('analysis', 'TEXT'),
+                ('image_hash', 'TEXT')
+            ] + GENERATED_COLUMNS
             
             # Add missing columns
             for column_name, column_type in columns_to_add:
@@ -92,7 +145,12 @@ class DatabaseManager:
                 'CREATE INDEX IF NOT EXISTS idx_reports_department ON reports(department)',
                 'CREATE INDEX IF NOT EXISTS idx_reports_created_at ON reports(created_at)',
                 'CREATE INDEX IF NOT EXISTS idx_reports_location ON reports(location)',
-                'CREATE INDEX IF NOT EXISTS idx_reports_priority ON reports(priority)'
+                'CREATE INDEX IF NOT EXISTS idx_reports_priority ON reports(priority)',
+                'CREATE INDEX IF NOT EXISTS idx_reports_geohash ON reports(geohash)',
+                'CREATE INDEX IF NOT EXISTS idx_reports_duplicate_of ON reports(duplicate_of)',
+                'CREATE INDEX IF NOT EXISTS idx_reports_confidence ON reports(confidence)',
+                'CREATE INDEX IF NOT EXISTS idx_reports_urgency ON reports(urgency)',
+                'CREATE INDEX IF NOT EXISTS idx_reports_image_phash ON reports(image_phash)'
             ]
             
             for index_sql in indexes:
@@ -116,7 +174,7 @@ class DatabaseManager:
         c = conn.cursor()
         
         # Create main reports table with all columns
-        c.execute('''
+        c.execute(f'''
             CREATE TABLE IF NOT EXISTS reports (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 phone TEXT NOT NULL,
@@ -125,6 +183,7 @@ class DatabaseManager:
                 location TEXT,
                 latitude REAL,
                 longitude REAL,
+                geohash TEXT,
                 image_url TEXT,
                 department TEXT,
                 status TEXT DEFAULT 'received',
@@ -133,7 +192,14 @@ class DatabaseManager:
                 resolution_notes TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                resolved_at TIMESTAMP
+                resolved_at TIMESTAMP,
+                duplicate_of INTEGER,
+                duplicate_count INTEGER DEFAULT 0,
+                pattern_version TEXT,
+                issue_type_corrected INTEGER DEFAULT 0,
+                analysis TEXT,
+                image_hash TEXT,
+                {', '.join(f'{name} {definition}' for name, definition in GENERATED_COLUMNS)}
             )
         ''')
         
@@ -159,6 +225,12 @@ class DatabaseManager:
         report_data.setdefault('created_at', datetime.now().isoformat())
         report_data.setdefault('updated_at', datetime.now().isoformat())
         
+        report_data['analysis'] = self._encode_analysis(report_data.get('analysis'))
+        
+        # Precompute the geohash so proximity queries can use its index
+        if report_data.get('latitude') is not None and report_data.get('longitude') is not None:
+            report_data.setdefault('geohash', geohash.encode(report_data['latitude'], report_data['longitude']))
+        
         columns = []
         placeholders = []
         values = []
@@ -179,6 +251,7 @@ class DatabaseManager:
             report_id = c.lastrowid
             conn.commit()
             print(f"✅ Report #{report_id} created successfully")
+            self._notify_change('created', report_id)
             return report_id
         except Exception as e:
             print(f"❌ Error creating report: {e}")
@@ -187,6 +260,21 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def _notify_change(self, action, report_id):
+        """Tell change listeners about a committed write; their failures never fail the write"""
+        for listener in self.change_listeners:
+            try:
+                listener(action, report_id)
+            except Exception as e:
+                print(f"⚠️ Change listener failed for report #{report_id}: {e}")
+    
+    @staticmethod
+    def _encode_analysis(analysis):
+        """Analysis dicts are stored as JSON text for the JSON1 functions"""
+        if analysis is None or isinstance(analysis, str):
+            return analysis
+        return json.dumps(analysis)
+    
     def get_report(self, report_id):
         """Get a single report by ID"""
         conn = self.get_connection()
@@ -198,11 +286,8 @@ class DatabaseManager:
         
         return dict(report) if report else None
     
-    def get_reports(self, filters=None, page=1, per_page=50, sort_by='created_at', sort_order='DESC'):
-        """Get reports with filtering and pagination"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+    def _build_where_clause(self, filters):
+        """Build a WHERE clause and its parameters from a filters dict"""
         where_conditions = []
         params = []
         
@@ -217,6 +302,14 @@ class DatabaseManager:
                         params.append(value)
         
         where_clause = ' AND '.join(where_conditions) if where_conditions else '1=1'
+        return where_clause, params
+    
+    def get_reports(self, filters=None, page=1, per_page=50, sort_by='created_at', sort_order='DESC'):
+        """Get reports with filtering and pagination"""
+        conn = self.get_connection()
+        c = conn.cursor()
+        
+        where_clause, params = self._build_where_clause(filters)
         offset = (page - 1) * per_page
         
         query = f'''
@@ -248,6 +341,73 @@ class DatabaseManager:
             }
         }
     
+    def get_reports_page(self, filters=None, columns=None, cursor=None, limit=50, facets=()):
+        """One page of reports, newest first, for the list API.
+        
+        Keyset pagination on (created_at, id) walks the created_at index
+        (its entries carry the rowid) instead of counting and skipping rows
+        with OFFSET. Only the requested columns are read; id and created_at
+        always come back since the next cursor is built from them. Facet
+        counts for each column ignore that column's own filter, so a
+        filter's options keep showing what choosing them would give; they
+        are cached for FACET_CACHE_SECONDS.
+        """
+        columns = [name for name in (columns or LIST_COLUMNS) if name in LIST_COLUMNS]
+        for required in ('created_at', 'id'):
+            if required not in columns:
+                columns.insert(0, required)
+        
+        where_clause, params = self._build_where_clause(filters)
+        if cursor:
+            created_at, report_id = decode_cursor(cursor)
+            where_clause += ' AND (created_at < ? OR (created_at = ? AND id < ?))'
+            params += [created_at, created_at, report_id]
+        
+        conn = self.get_connection()
+        c = conn.cursor()
+        c.execute(f'''
+            SELECT {', '.join(columns)} FROM reports
+            WHERE {where_clause}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', params + [limit + 1])
+        rows = [tuple(row) for row in c.fetchall()]
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = dict(zip(columns, rows[-1]))
+            next_cursor = encode_cursor(last['created_at'], last['id'])
+        
+        facet_counts = {}
+        for facet in facets:
+            if facet in FACET_COLUMNS:
+                facet_counts[facet] = self._facet_counts(c, facet, filters)
+        conn.close()
+        
+        return {'columns': columns, 'rows': rows, 'next_cursor': next_cursor, 'facets': facet_counts}
+    
+    def _facet_counts(self, cursor, facet, filters):
+        """Report counts per value of a column under every filter but its own, briefly cached"""
+        others = {key: value for key, value in (filters or {}).items() if key != facet}
+        key = (facet, tuple(sorted(others.items())))
+        cached = self._facet_cache.get(key)
+        if cached and cached[0] > time.time():
+            return cached[1]
+        
+        where_clause, params = self._build_where_clause(others)
+        cursor.execute(f'''
+            SELECT {facet}, COUNT(*) FROM reports
+            WHERE {where_clause}
+            GROUP BY {facet}
+            ORDER BY COUNT(*) DESC
+        ''', params)
+        counts = {value or 'unknown': count for value, count in cursor.fetchall()}
+        if len(self._facet_cache) > 256:
+            self._facet_cache.clear()
+        self._facet_cache[key] = (time.time() + FACET_CACHE_SECONDS, counts)
+        return counts
+    
     def update_report(self, report_id, update_data):
         """Update a report"""
         conn = self.get_connection()
@@ -256,6 +416,13 @@ class DatabaseManager:
         # Always update the updated_at timestamp
         update_data['updated_at'] = datetime.now().isoformat()
         
+        if 'analysis' in update_data:
+            update_data['analysis'] = self._encode_analysis(update_data['analysis'])
+        
+        # Keep the geohash in sync with moved coordinates
+        if update_data.get('latitude') is not None and update_data.get('longitude') is not None:
+            update_data['geohash'] = geohash.encode(update_data['latitude'], update_data['longitude'])
+        
         set_clause = ', '.join([f"{key} = ?" for key in update_data.keys()])
         values = list(update_data.values()) + [report_id]
         
@@ -267,6 +434,7 @@ class DatabaseManager:
             success = c.rowcount > 0
             if success:
                 print(f"✅ Report #{report_id} updated successfully")
+                self._notify_change('updated', report_id)
             else:
                 print(f"⚠️ Report #{report_id} not found for update")
             return success
@@ -277,6 +445,220 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    # Proximity Queries
+    def backfill_geohashes(self, batch_size=500):
+        """Populate the geohash column for reports that have coordinates but no geohash"""
+        conn = self.get_connection()
+        c = conn.cursor()
+        updated = 0
+        
+        try:
+            while True:
+                c.execute('''
+                    SELECT id, latitude, longitude FROM reports
+                    WHERE geohash IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL
+                    LIMIT ?
+                ''', (batch_size,))
+                rows = c.fetchall()
+                if not rows:
+                    break
+                
+                c.executemany('UPDATE reports SET geohash = ? WHERE id = ?',
+                              [(geohash.encode(row['latitude'], row['longitude']), row['id']) for row in rows])
+                conn.commit()
+                updated += len(rows)
+            
+            if updated:
+                print(f"✅ Backfilled geohash for {updated} reports")
+        except Exception as e:
+            print(f"⚠️ Geohash backfill error: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+        
+        return updated
+    
+    def _get_reports_in_cells(self, cells, filters=None):
+        """Fetch reports whose geohash falls in any of the given prefixes"""
+        where_clause, filter_params = self._build_where_clause(filters)
+        
+        cell_conditions = []
+        params = []
+        for cell in cells:
+            cell_conditions.append('(geohash >= ? AND geohash < ?)')
+            params.extend(geohash.prefix_range(cell))
+        
+        conn = self.get_connection()
+        c = conn.cursor()
+        c.execute(f'''
+            SELECT * FROM reports
+            WHERE ({' OR '.join(cell_conditions)}) AND {where_clause}
+        ''', params + filter_params)
+        reports = [dict(row) for row in c.fetchall()]
+        conn.close()
+        return reports
+    
+    def get_reports_near(self, lat, lng, radius_m=500, filters=None, limit=None):
+        """Reports within radius_m of a point, nearest first.
+        
+        Candidates are pruned with geohash prefix ranges on the indexed
+        column, then filtered with an exact haversine distance.
+        """
+        cells = geohash.covering_cells(lat, lng, radius_m)
+        
+        results = []
+        for report in self._get_reports_in_cells(cells, filters):
+            distance = geohash.haversine_m(lat, lng, report['latitude'], report['longitude'])
+            if distance <= radius_m:
+                report['distance_m'] = round(distance, 1)
+                results.append(report)
+        
+        results.sort(key=lambda r: r['distance_m'])
+        return results[:limit] if limit else results
+    
+    def get_nearest_reports(self, lat, lng, k=10, filters=None, max_radius_m=50000):
+        """The k nearest reports to a point, widening the search radius as needed"""
+        radius_m = 100
+        while True:
+            radius_m = min(radius_m, max_radius_m)
+            results = self.get_reports_near(lat, lng, radius_m, filters)
+            # Everything within the searched radius is complete, so the first k are exact
+            if len(results) >= k or radius_m >= max_radius_m:
+                return results[:k]
+            radius_m *= 4
+    
+    def get_geohash_cell_counts(self, precision=6, filters=None):
+        """Report counts per geohash grid cell for neighborhood aggregation"""
+        where_clause, params = self._build_where_clause(filters)
+        
+        conn = self.get_connection()
+        c = conn.cursor()
+        c.execute(f'''
+            SELECT substr(geohash, 1, ?) AS cell, COUNT(*) AS count
+            FROM reports
+            WHERE geohash IS NOT NULL AND {where_clause}
+            GROUP BY cell
+            ORDER BY count DESC
+        ''', [precision] + params)
+        
+        cells = []
+        for cell, count in c.fetchall():
+            center_lat, center_lng = geohash.decode(cell)
+            cells.append({'cell': cell, 'count': count, 'latitude': center_lat, 'longitude': center_lng})
+        conn.close()
+        return cells
+    
+    # Duplicate Reports
+    def link_duplicate(self, report_id, canonical_id):
+        """Mark a report as a duplicate of an open report and escalate the original.
+        
+        Returns the original's updated duplicate count, or None on failure.
+        """
+        conn = self.get_connection()
+        c = conn.cursor()
+        now = datetime.now().isoformat()
+        
+        try:
+            c.execute('''
+                UPDATE reports SET duplicate_of = ?, status = 'duplicate', updated_at = ?
+                WHERE id = ?
+            ''', (canonical_id, now, report_id))
+            c.execute('''
+                UPDATE reports SET duplicate_count = COALESCE(duplicate_count, 0) + 1, updated_at = ?
+                WHERE id = ?
+            ''', (now, canonical_id))
+            
+            c.execute('SELECT duplicate_count, priority FROM reports WHERE id = ?', (canonical_id,))
+            row = c.fetchone()
+            duplicate_count = row['duplicate_count']
+            priority = self.priority_for_duplicates(row['priority'], duplicate_count)
+            if priority != row['priority']:
+                c.execute('UPDATE reports SET priority = ? WHERE id = ?', (priority, canonical_id))
+                print(f"⬆️ Report #{canonical_id} escalated to {priority} priority")
+            
+            conn.commit()
+            print(f"🔗 Report #{report_id} linked as duplicate of #{canonical_id} ({duplicate_count} duplicates)")
+            self._notify_change('updated', report_id)
+            self._notify_change('updated', canonical_id)
+            return duplicate_count
+        except Exception as e:
+            print(f"❌ Error linking duplicate report: {e}")
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+    
+    def priority_for_duplicates(self, priority, duplicate_count):
+        """Escalate (never lower) a priority based on how many citizens reported it"""
+        current = PRIORITY_LEVELS.index(priority) if priority in PRIORITY_LEVELS else 1
+        for threshold, level in DUPLICATE_PRIORITY_THRESHOLDS:
+            if duplicate_count >= threshold:
+                return PRIORITY_LEVELS[max(current, PRIORITY_LEVELS.index(level))]
+        return PRIORITY_LEVELS[current]
+    
+    def get_open_located_reports(self, since):
+        """Open, non-duplicate reports with coordinates created since a timestamp"""
+        conn = self.get_connection()
+        c = conn.cursor()
+        c.execute('''
+            SELECT id, issue_type, latitude, longitude, created_at FROM reports
+            WHERE status IN ('received', 'in-progress') AND duplicate_of IS NULL
+              AND latitude IS NOT NULL AND longitude IS NOT NULL AND created_at >= ?
+        ''', (since,))
+        reports = [dict(row) for row in c.fetchall()]
+        conn.close()
+        return reports
+
+    def get_pending_vision_reports(self):
+        """(id, image_hash) of reports still waiting on a batched vision result, oldest first"""
+        conn = self.get_connection()
+        c = conn.cursor()
+        c.execute('''
+            SELECT id, image_hash FROM reports
+            WHERE image_hash IS NOT NULL AND json_extract(analysis, '$.vision.analysis_source') = 'pending'
+            ORDER BY id
+        ''')
+        reports = [tuple(row) for row in c.fetchall()]
+        conn.close()
+        return reports
+
+    def get_open_photo_reports(self):
+        """Open, non-duplicate reports whose photo passed local quality checks, with its pHash"""
+        conn = self.get_connection()
+        c = conn.cursor()
+        c.execute('''
+            SELECT id, image_phash, latitude, longitude FROM reports
+            WHERE status IN ('received', 'in-progress') AND duplicate_of IS NULL
+              AND image_phash IS NOT NULL AND json_extract(analysis, '$.image.usable') = 1
+        ''')
+        reports = [dict(row) for row in c.fetchall()]
+        conn.close()
+        return reports
+
+    def get_triage_reports(self, max_confidence=TRIAGE_CONFIDENCE, urgency=None, limit=50):
+        """Open, uncorrected reports classified below a confidence, least confident first.
+
+        Filters on the indexed generated columns, so no analysis is re-run.
+        """
+        conn = self.get_connection()
+        c = conn.cursor()
+        query = '''
+            SELECT * FROM reports
+            WHERE confidence < ? AND status IN ('received', 'in-progress')
+              AND COALESCE(issue_type_corrected, 0) = 0
+        '''
+        params = [max_confidence]
+        if urgency:
+            query += ' AND urgency = ?'
+            params.append(urgency)
+        query += ' ORDER BY confidence, created_at LIMIT ?'
+        params.append(limit)
+
+        c.execute(query, params)
+        reports = [dict(row) for row in c.fetchall()]
+        conn.close()
+        return reports
+
     # Analytics Methods
     def get_dashboard_stats(self):
         """Get comprehensive dashboard statistics"""
@@ -383,33 +765,37 @@ class DatabaseManager:
             'weekly_trends': weekly_trends
         }
     
+    @staticmethod
+    def report_feature(report):
+        """A report as a GeoJSON feature; geometry is null when it has no coordinates"""
+        located = report.get('latitude') is not None and report.get('longitude') is not None
+        return {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": [report['longitude'], report['latitude']]
+            } if located else None,
+            "properties": {
+                "id": report['id'],
+                "issue_type": report['issue_type'],
+                "description": report['description'],
+                "location": report['location'],
+                "image_url": media_url(report),
+                "thumbnail_url": media_url(report, 320),
+                "department": report.get('department'),
+                "status": report.get('status', 'received'),
+                "created_at": report['created_at'],
+                "has_image": bool(report.get('image_url'))
+            }
+        }
+    
     def get_reports_geojson(self):
         """Get reports in GeoJSON format for mapping"""
         reports = self.get_reports(per_page=1000)['reports']
         
-        features = []
-        for report in reports:
-            # Only include reports with coordinates
-            if report.get('latitude') and report.get('longitude'):
-                feature = {
-                    "type": "Feature",
-                    "geometry": {
-                        "type": "Point",
-                        "coordinates": [report['longitude'], report['latitude']]
-                    },
-                    "properties": {
-                        "id": report['id'],
-                        "issue_type": report['issue_type'],
-                        "description": report['description'],
-                        "location": report['location'],
-                        "image_url": report.get('image_url'),
-                        "department": report.get('department'),
-                        "status": report.get('status', 'received'),
-                        "created_at": report['created_at'],
-                        "has_image": bool(report.get('image_url'))
-                    }
-                }
-                features.append(feature)
+        # Only include reports with coordinates
+        features = [self.report_feature(report) for report in reports
+                    if report.get('latitude') and report.get('longitude')]
         
         return {
             "type": "FeatureCollection",
@@ -0,0 +1,238 @@
+# duplicate_detector.py
+import bisect
+import os
+import threading
+import time
+from datetime import datetime, timezone
+import geohash
+from database_manager import db_manager
+from photo_index import PhotoIndex, usable_phash
+
+OPEN_STATUSES = ('received', 'in-progress')
+
+# Issue types too vague to treat two nearby reports as the same problem
+UNMATCHED_ISSUE_TYPES = ('other',)
+
+
+def created_timestamp(created_at):
+    """Epoch seconds for a stored created_at.
+
+    create_report writes local datetime.now().isoformat(); rows that took
+    SQLite's CURRENT_TIMESTAMP default hold UTC as 'YYYY-MM-DD HH:MM:SS'.
+    """
+    value = str(created_at)
+    parsed = datetime.fromisoformat(value)
+    if 'T' not in value and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class DuplicateDetector:
+    """In-memory spatio-temporal index of open reports for duplicate detection.
+
+    Reports are bucketed by geohash cell (cells wider than the match
+    radius, so a point's cell plus its 8 neighbours covers the radius)
+    and issue type. Each bucket is a time-sorted list, so a lookup is a
+    few dict hits plus a bisect to the start of the time window.
+    """
+
+    def __init__(self, db=None, radius_m=None, window_hours=None, photos=None):
+        self.db = db or db_manager
+        self.photos = photos or PhotoIndex(db=self.db)
+        self.radius_m = radius_m or float(os.environ.get('DUPLICATE_RADIUS_METERS', 50))
+        self.window_seconds = (window_hours or float(os.environ.get('DUPLICATE_WINDOW_HOURS', 72))) * 3600
+        self.cell_precision = geohash.precision_for_radius(self.radius_m)
+        self._cells = {}  # (cell, issue_type) -> sorted [(created_ts, report_id, lat, lng)]
+        self._entries = {}  # report_id -> (bucket key, entry), for discard and edits
+        self._lock = threading.Lock()
+        self._warmed = False
+        self._stats = {'lookups': 0, 'duplicates_found': 0, 'total_us': 0.0, 'max_us': 0.0}
+        # Admin edits to type, coordinates or status move or drop index entries
+        self.db.change_listeners.append(self._on_change)
+
+    def _bucket_key(self, lat, lng, issue_type):
+        return geohash.encode(lat, lng, self.cell_precision), issue_type
+
+    def warm(self):
+        """Load open reports from the current time window into the index"""
+        cutoff = time.time() - self.window_seconds
+        # Stored times mix local ISO strings and UTC defaults, so the query
+        # only pre-filters (a day of slack covers any UTC offset) and the
+        # window itself is applied on epoch seconds
+        since = datetime.fromtimestamp(cutoff - 86400).strftime('%Y-%m-%d %H:%M:%S')
+        count = 0
+        for report in self.db.get_open_located_reports(since):
+            try:
+                created_ts = created_timestamp(report['created_at'])
+            except ValueError:
+                created_ts = time.time()
+            if created_ts < cutoff:
+                continue
+            self.add(report['id'], report['issue_type'], report['latitude'], report['longitude'], created_ts)
+            count += 1
+        self._warmed = True
+        print(f"🔗 Duplicate detector indexed {count} open reports")
+
+    def add(self, report_id, issue_type, lat, lng, created_ts=None):
+        """Index a newly created (non-duplicate) report"""
+        if lat is None or lng is None or issue_type in UNMATCHED_ISSUE_TYPES:
+            return
+        created_ts = created_ts or time.time()
+        key = self._bucket_key(lat, lng, issue_type)
+        entry = (created_ts, report_id, lat, lng)
+        with self._lock:
+            self._remove(report_id)
+            bucket = self._cells.setdefault(key, [])
+            bisect.insort(bucket, entry)
+            self._entries[report_id] = (key, entry)
+            # Drop entries that have aged out of the window
+            cutoff = bisect.bisect_left(bucket, (time.time() - self.window_seconds,))
+            for _, expired_id, _, _ in bucket[:cutoff]:
+                del self._entries[expired_id]
+            del bucket[:cutoff]
+
+    def discard(self, report_id):
+        """Remove a report that is no longer open"""
+        with self._lock:
+            self._remove(report_id)
+
+    def _remove(self, report_id):
+        # Called with the lock held
+        indexed = self._entries.pop(report_id, None)
+        if indexed is None:
+            return None
+        key, entry = indexed
+        bucket = self._cells[key]
+        del bucket[bisect.bisect_left(bucket, entry)]
+        if not bucket:
+            del self._cells[key]
+        return entry
+
+    def refresh(self, report_id):
+        """Re-index a report after an edit, or drop it if it no longer qualifies"""
+        report = self.db.get_report(report_id)
+        with self._lock:
+            indexed = self._entries.get(report_id)
+        if (not report or report['status'] not in OPEN_STATUSES or report.get('duplicate_of')
+                or report.get('latitude') is None or report.get('longitude') is None):
+            self.discard(report_id)
+            return
+        if indexed is not None:
+            created_ts = indexed[1][0]
+        else:
+            try:
+                created_ts = created_timestamp(report['created_at'])
+            except ValueError:
+                return
+            if created_ts < time.time() - self.window_seconds:
+                return
+        if report['issue_type'] in UNMATCHED_ISSUE_TYPES:
+            self.discard(report_id)
+        else:
+            self.add(report_id, report['issue_type'], report['latitude'], report['longitude'], created_ts)
+
+    def _on_change(self, action, report_id):
+        # New reports are indexed by ingest_report once duplicates are linked
+        if action == 'updated':
+            self.refresh(report_id)
+
+    def find_candidates(self, issue_type, lat, lng, now=None):
+        """Open reports of the same type within the radius and window, nearest first"""
+        if lat is None or lng is None or issue_type in UNMATCHED_ISSUE_TYPES:
+            return []
+        if not self._warmed:
+            self.warm()
+
+        start = time.perf_counter()
+        window_start = (now or time.time()) - self.window_seconds
+        center = geohash.encode(lat, lng, self.cell_precision)
+
+        candidates = []
+        with self._lock:
+            for cell in [center] + geohash.neighbors(center):
+                bucket = self._cells.get((cell, issue_type))
+                if not bucket:
+                    continue
+                for created_ts, report_id, r_lat, r_lng in bucket[bisect.bisect_left(bucket, (window_start,)):]:
+                    distance = geohash.haversine_m(lat, lng, r_lat, r_lng)
+                    if distance <= self.radius_m:
+                        candidates.append((distance, report_id))
+        candidates.sort()
+
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        with self._lock:
+            self._stats['lookups'] += 1
+            self._stats['total_us'] += elapsed_us
+            self._stats['max_us'] = max(self._stats['max_us'], elapsed_us)
+
+        return [report_id for _, report_id in candidates]
+
+    def ingest_report(self, report_data, same_image_reports=()):
+        """Create a report, linking it to an open duplicate when one exists.
+
+        `same_image_reports` are reports sent the identical photo; an open
+        one among them is the original regardless of distance or type.
+        Next come open reports whose photo looks alike (pHash within a few
+        bits) and is not clearly elsewhere, then the spatio-temporal match.
+        Returns (report_id, duplicate_of), where duplicate_of is the ID of
+        the original report or None.
+        """
+        issue_type = report_data.get('issue_type')
+        lat = report_data.get('latitude')
+        lng = report_data.get('longitude')
+        phash = usable_phash(report_data)
+
+        duplicate_of = None
+        for candidate_id in same_image_reports:
+            candidate = self.db.get_report(candidate_id)
+            if candidate and candidate['status'] in OPEN_STATUSES:
+                duplicate_of = candidate_id
+                break
+
+        for candidate_id in [] if duplicate_of else self.photos.find_duplicates(phash, lat, lng):
+            candidate = self.db.get_report(candidate_id)
+            if candidate and candidate['status'] in OPEN_STATUSES:
+                duplicate_of = candidate_id
+                break
+            self.photos.discard(candidate_id)
+
+        for candidate_id in [] if duplicate_of else self.find_candidates(issue_type, lat, lng):
+            candidate = self.db.get_report(candidate_id)
+            if candidate and candidate['status'] in OPEN_STATUSES:
+                duplicate_of = candidate_id
+                break
+            # Resolved since it was indexed
+            self.discard(candidate_id)
+
+        report_id = self.db.create_report(report_data)
+        if report_id is None:
+            return None, None
+
+        if duplicate_of is not None:
+            if self.db.link_duplicate(report_id, duplicate_of) is not None:
+                with self._lock:
+                    self._stats['duplicates_found'] += 1
+                return report_id, duplicate_of
+            return report_id, None
+
+        self.add(report_id, issue_type, lat, lng)
+        self.photos.add(report_id, phash, lat, lng)
+        return report_id, None
+
+    def stats(self):
+        """Lookup cost and hit counts for monitoring"""
+        with self._lock:
+            lookups = self._stats['lookups']
+            return {
+                'radius_m': self.radius_m,
+                'window_hours': self.window_seconds / 3600,
+                'indexed_reports': len(self._entries),
+                'lookups': lookups,
+                'duplicates_found': self._stats['duplicates_found'],
+                'avg_lookup_us': round(self._stats['total_us'] / lookups, 1) if lookups else 0,
+                'max_lookup_us': round(self._stats['max_us'], 1),
+                'photos': self.photos.stats()
+            }
+
+# Global instance
+duplicate_detector = DuplicateDetector()
@@ -0,0 +1,129 @@
+# exif_gps.py
+import struct
+
+GPS_INFO_TAG = 0x8825
+GPS_LATITUDE_REF = 1
+GPS_LATITUDE = 2
+GPS_LONGITUDE_REF = 3
+GPS_LONGITUDE = 4
+
+# Bytes per component for the TIFF field types we care about
+TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+
+def _find_exif_segment(data):
+    """Return the TIFF block from a JPEG's APP1 Exif segment, or None"""
+    if len(data) < 4 or data[0:2] != b'\xff\xd8':
+        return None
+
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        # Start of scan / end of image: no metadata after this point
+        if marker in (0xDA, 0xD9):
+            return None
+        segment_length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        segment = data[offset + 4:offset + 2 + segment_length]
+        if marker == 0xE1 and segment[:6] == b'Exif\x00\x00':
+            return segment[6:]
+        offset += 2 + segment_length
+
+    return None
+
+
+def _read_ifd(tiff, offset, endian):
+    """Read an IFD into {tag: (type, count, value_offset_bytes)}"""
+    if offset + 2 > len(tiff):
+        return {}
+    entry_count = struct.unpack(endian + 'H', tiff[offset:offset + 2])[0]
+    entries = {}
+    for i in range(entry_count):
+        entry_offset = offset + 2 + i * 12
+        if entry_offset + 12 > len(tiff):
+            break
+        tag, field_type, count = struct.unpack(endian + 'HHI', tiff[entry_offset:entry_offset + 8])
+        entries[tag] = (field_type, count, tiff[entry_offset + 8:entry_offset + 12])
+    return entries
+
+
+def _field_bytes(tiff, entry, endian):
+    """Resolve an IFD entry to its raw value bytes (inline or via offset)"""
+    field_type, count, raw = entry
+    size = TYPE_SIZES.get(field_type, 1) * count
+    if size <= 4:
+        return raw[:size]
+    value_offset = struct.unpack(endian + 'I', raw)[0]
+    return tiff[value_offset:value_offset + size]
+
+
+def _to_degrees(tiff, entry, endian):
+    """Convert a 3-rational degrees/minutes/seconds entry to decimal degrees"""
+    field_type, count, _ = entry
+    if field_type != 5 or count < 3:
+        return None
+    data = _field_bytes(tiff, entry, endian)
+    if len(data) < 24:
+        return None
+    parts = []
+    for i in range(3):
+        numerator, denominator = struct.unpack(endian + 'II', data[i * 8:i * 8 + 8])
+        parts.append(numerator / denominator if denominator else 0.0)
+    return parts[0] + parts[1] / 60 + parts[2] / 3600
+
+
+def extract_gps(image_content):
+    """Extract (latitude, longitude) from JPEG EXIF GPS tags.
+
+    Returns (None, None) when the image has no usable GPS data. Only the
+    EXIF header is parsed, so this is cheap even for large photos.
+    """
+    try:
+        if not image_content:
+            return None, None
+
+        tiff = _find_exif_segment(image_content)
+        if not tiff or len(tiff) < 8:
+            return None, None
+
+        if tiff[:2] == b'II':
+            endian = '<'
+        elif tiff[:2] == b'MM':
+            endian = '>'
+        else:
+            return None, None
+
+        ifd0_offset = struct.unpack(endian + 'I', tiff[4:8])[0]
+        ifd0 = _read_ifd(tiff, ifd0_offset, endian)
+        if GPS_INFO_TAG not in ifd0:
+            return None, None
+
+        gps_offset = struct.unpack(endian + 'I', ifd0[GPS_INFO_TAG][2])[0]
+        gps = _read_ifd(tiff, gps_offset, endian)
+        if GPS_LATITUDE not in gps or GPS_LONGITUDE not in gps:
+            return None, None
+
+        lat = _to_degrees(tiff, gps[GPS_LATITUDE], endian)
+        lng = _to_degrees(tiff, gps[GPS_LONGITUDE], endian)
+        if lat is None or lng is None:
+            return None, None
+
+        lat_ref = _field_bytes(tiff, gps[GPS_LATITUDE_REF], endian)[:1] if GPS_LATITUDE_REF in gps else b'N'
+        lng_ref = _field_bytes(tiff, gps[GPS_LONGITUDE_REF], endian)[:1] if GPS_LONGITUDE_REF in gps else b'E'
+        if lat_ref == b'S':
+            lat = -lat
+        if lng_ref == b'W':
+            lng = -lng
+
+        # Cameras write 0/0 when they have no fix
+        if lat == 0 and lng == 0:
+            return None, None
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return None, None
+
+        return round(lat, 6), round(lng, 6)
+
+    except (struct.error, ValueError) as e:
+        print(f"⚠️ Could not read EXIF GPS data: {e}")
+        return None, None
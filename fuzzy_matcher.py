@@ -0,0 +1,196 @@
+# fuzzy_matcher.py
+import re
+
+# English defaults; language packs may supply their own tables
+
+# Informal spellings rewritten before lookup ("street lite" -> "street light")
+SPELLING_VARIANTS = {
+    'lite': 'light', 'lites': 'lights', 'nite': 'night', 'thru': 'through',
+    'rubish': 'rubbish', 'grafiti': 'graffiti', 'grafitti': 'graffiti'
+}
+
+# Informal word endings, for run-together spellings ("streetlite")
+SPELLING_SUFFIXES = {'lite': 'light', 'lites': 'lights'}
+
+# Everyday words one edit away from a keyword; never treated as typos
+NEAR_MISS_WORDS = {
+    'garage', 'floor', 'floors', 'flooring', 'letter', 'letters', 'liter', 'liters',
+    'waist', 'wasted', 'thrash', 'tugging', 'little'
+}
+
+TOKEN_PATTERN = re.compile(r'[^\W\d_]+')
+
+
+def allowed_distance(length):
+    """Edits tolerated for a word of this length; short words must match exactly"""
+    if length < 5:
+        return 0
+    if length < 9:
+        return 1
+    return 2
+
+
+def deletes(word, distance):
+    """Every string reachable from word by removing up to `distance` characters"""
+    results = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, or limit + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyMatcher:
+    """SymSpell-style typo-tolerant matcher over a {category: [keywords]} table.
+
+    Every keyword (multi-word ones with spaces removed) is indexed under all
+    of its deletions up to its allowed edit distance. A message token, or two
+    or three adjacent tokens joined ("pot hole" -> "pothole"), is looked up by
+    generating its own deletions, so each lookup costs a handful of dict
+    probes no matter how many keywords there are. Token results are memoized.
+    """
+
+    def __init__(self, patterns, variants=None, suffixes=None, near_misses=None, memo_size=50000):
+        self.variants = SPELLING_VARIANTS if variants is None else variants
+        self.suffixes = SPELLING_SUFFIXES if suffixes is None else suffixes
+        self.near_misses = NEAR_MISS_WORDS if near_misses is None else set(near_misses)
+
+        # Joined keyword -> [(category, keyword)], one keyword per category
+        # ("street light" and "streetlight" are the same term)
+        self.terms = {}
+        for category, keywords in patterns.items():
+            for keyword in keywords:
+                term = keyword.lower().replace(' ', '')
+                if not term:
+                    continue
+                entries = self.terms.setdefault(term, [])
+                if all(existing != category for existing, _ in entries):
+                    entries.append((category, keyword.lower()))
+
+        self.max_words = max((len(k.split()) for keywords in patterns.values() for k in keywords), default=1)
+        # A run of tokens is only worth joining if it starts like some keyword
+        self._prefixes = {term[:n] for term in self.terms for n in range(2, len(term))}
+        self._respelled = {}
+        self._index = {}
+        for term in self.terms:
+            for deleted in deletes(term, allowed_distance(len(term))):
+                self._index.setdefault(deleted, set()).add(term)
+
+        self._memo = {}
+        self.memo_size = memo_size
+
+    @property
+    def settings(self):
+        """Everything besides the keyword table that changes what matches"""
+        return {
+            'variants': self.variants,
+            'suffixes': self.suffixes,
+            'near_misses': sorted(self.near_misses),
+            'distances': [allowed_distance(n) for n in range(12)]
+        }
+
+    def respell(self, token):
+        """Rewrite informal spellings to the form keywords use"""
+        if token in self.variants:
+            return self.variants[token]
+        for suffix, replacement in self.suffixes.items():
+            if token.endswith(suffix) and len(token) > len(suffix):
+                return token[:-len(suffix)] + replacement
+        return token
+
+    def lookup(self, word):
+        """(term, distance) of the closest keyword within the allowed distance, or None"""
+        if word in self._memo:
+            return self._memo[word]
+
+        result = None
+        if word in self.terms:
+            result = (word, 0)
+        elif word not in self.near_misses:
+            limit = allowed_distance(len(word))
+            best = limit + 1
+            candidates = set()
+            for deleted in deletes(word, limit) if limit else ():
+                candidates |= self._index.get(deleted, set())
+            for term in sorted(candidates):
+                # Typos rarely change the first letter; requiring it avoids trash/crash
+                if term[0] != word[0]:
+                    continue
+                distance = edit_distance(word, term, min(limit, allowed_distance(len(term))))
+                if distance < best:
+                    best, result = distance, (term, distance)
+
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+            self._respelled.clear()
+        self._memo[word] = result
+        return result
+
+    def find_all(self, text):
+        """Keyword hits in text as (start, end, category, keyword, written, distance).
+
+        Single tokens and runs of up to `max_words` adjacent tokens are tried;
+        a run wins over the single tokens it covers.
+        """
+        respelled = self._respelled
+        tokens = []
+        for m in TOKEN_PATTERN.finditer(text.lower()):
+            word = m.group()
+            if word not in respelled:
+                respelled[word] = self.respell(word)
+            tokens.append((m.start(), m.end(), respelled[word]))
+
+        hits = []
+        i = 0
+        while i < len(tokens):
+            matched = None
+            longest = min(self.max_words, len(tokens) - i) if tokens[i][2] in self._prefixes else 1
+            for size in range(longest, 0, -1):
+                joined = ''.join(token for _, _, token in tokens[i:i + size]) if size > 1 else tokens[i][2]
+                found = self.lookup(joined)
+                if found:
+                    matched = (size, found)
+                    break
+            if matched:
+                size, (term, distance) = matched
+                start, end = tokens[i][0], tokens[i + size - 1][1]
+                for category, keyword in self.terms[term]:
+                    hits.append((start, end, category, keyword, text[start:end], distance))
+                i += size
+            else:
+                i += 1
+        return hits
+
+    def match(self, text):
+        """Per-category hits in the same shape as KeywordMatcher.match, plus the corrections"""
+        results = {}
+        for start, end, category, keyword, written, distance in self.find_all(text):
+            entry = results.setdefault(category, {'count': 0, 'keywords': [], 'spans': [], 'corrections': []})
+            entry['count'] += 1
+            entry['spans'].append((start, end))
+            if keyword not in entry['keywords']:
+                entry['keywords'].append(keyword)
+            if written.lower() != keyword:
+                entry['corrections'].append({'written': written, 'keyword': keyword, 'distance': distance})
+        return results
@@ -1,120 +1,314 @@
 # geocoding_service.py
-import requests
+import os
 import time
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from http_client import http_client
+from location_extractor import normalize_location
+
+
+class ProviderSkipped(Exception):
+    """A provider declined a lookup without failing (e.g. it is rate limited)"""
+
+
+class CircuitBreaker:
+    """Skip a provider after repeated failures, then probe it again later.
+
+    closed -> open after `failure_threshold` consecutive failures; open ->
+    half_open once `reset_timeout` seconds have passed, letting a single
+    probe request through; the probe's outcome closes or re-opens it, and a
+    probe the provider skipped puts it back to open.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at >= self.reset_timeout:
+                    self.state = 'half_open'
+                    return True
+                return False
+            if self.state == 'half_open':
+                # A probe is already in flight
+                return False
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Undo allow() for a call that never reached the provider.
+
+        A skipped half-open probe returns the breaker to open with its
+        original opened_at, so the next lookup may probe straight away.
+        """
+        with self._lock:
+            if self.state == 'half_open':
+                self.state = 'open'
+
+    def status(self):
+        return {'state': self.state, 'failures': self.failures}
+
+
+class GeocodingProvider:
+    """Base class for a geocoding backend in the provider chain"""
+
+    name = 'provider'
+    http_provider = 'default'
+
+    def enabled(self):
+        return True
+
+    def geocode(self, location_text, timeout):
+        """Return (lat, lng), or None when the provider has no match.
+
+        Raise on transport or API errors so the circuit breaker sees them.
+        """
+        raise NotImplementedError
+
+    def _timeout(self, timeout):
+        policy = http_client.policy(self.http_provider)
+        return (min(policy['connect_timeout'], timeout), min(policy['read_timeout'], timeout))
+
+
+class NominatimProvider(GeocodingProvider):
+    """OpenStreetMap Nominatim (free, max 1 request/second)"""
+
+    name = 'nominatim'
+    http_provider = 'nominatim'
+    base_url = "https://nominatim.openstreetmap.org/search"
+
+    def __init__(self, min_interval=1.0):
+        self.min_interval = min_interval
+        self._next_allowed = 0
+        self._lock = threading.Lock()
+
+    def _reserve_slot(self, timeout):
+        """Respect the usage policy without sleeping a full second on every call"""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0, self._next_allowed - now)
+            if delay >= timeout:
+                raise ProviderSkipped("Nominatim rate limit would exceed the latency budget")
+            self._next_allowed = now + delay + self.min_interval
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def geocode(self, location_text, timeout):
+        timeout -= self._reserve_slot(timeout)
+        params = {
+            'q': location_text,
+            'format': 'json',
+            'limit': 1,
+            'addressdetails': 1
+        }
+        headers = {
+            'Accept-Language': 'en'
+        }
+
+        response = http_client.get('nominatim', self.base_url, params=params, headers=headers,
+                                   timeout=self._timeout(timeout))
+        response.raise_for_status()
+
+        data = response.json()
+        if data:
+            return float(data[0]['lat']), float(data[0]['lon'])
+        return None
+
+
+class GoogleGeocodingProvider(GeocodingProvider):
+    """Google Geocoding API (needs GOOGLE_GEOCODING_API_KEY)"""
+
+    name = 'google'
+    http_provider = 'google_geocoding'
+    base_url = "https://maps.googleapis.com/maps/api/geocode/json"
+
+    def enabled(self):
+        return bool(os.environ.get('GOOGLE_GEOCODING_API_KEY'))
+
+    def geocode(self, location_text, timeout):
+        params = {
+            'address': location_text,
+            'key': os.environ.get('GOOGLE_GEOCODING_API_KEY')
+        }
+
+        response = http_client.get('google_geocoding', self.base_url, params=params,
+                                   timeout=self._timeout(timeout))
+        response.raise_for_status()
+
+        data = response.json()
+        if data['status'] == 'OK' and data['results']:
+            location = data['results'][0]['geometry']['location']
+            return location['lat'], location['lng']
+        if data['status'] == 'ZERO_RESULTS':
+            return None
+        raise RuntimeError(f"Google geocoding status {data['status']}")
+
 
 class GeocodingService:
-    def __init__(self):
+    """Pluggable geocoder chain.
+
+    Providers are tried in order within a total latency budget per lookup.
+    Each provider has its own circuit breaker. With hedging enabled, the
+    next provider is fired as soon as the current one runs past its p90
+    latency, and whichever answers first wins.
+    """
+
+    def __init__(self, providers=None, latency_budget=None, hedge=None,
+                 hedge_percentile=90, default_hedge_delay=1.0, min_hedge_samples=20):
+        self.providers = providers if providers is not None else [NominatimProvider(), GoogleGeocodingProvider()]
+        self.latency_budget = latency_budget or float(os.environ.get('GEOCODER_BUDGET_SECONDS', 4))
+        if hedge is None:
+            hedge = os.environ.get('GEOCODER_HEDGE', '').lower() in ('1', 'true', 'yes')
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_samples = min_hedge_samples
+        self.breakers = {provider.name: CircuitBreaker() for provider in self.providers}
         self.cache = {}  # Simple cache to avoid duplicate lookups
-        
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='geocoder')
+
     def geocode_location(self, location_text):
-        """Convert location text to coordinates using multiple services"""
-        
-        if not location_text or location_text.lower() in ['unknown', 'none', '']:
+        """Convert location text to coordinates using the provider chain"""
+
+        if not location_text or location_text.lower() in ['unknown', 'unknown location', 'none', '']:
             return None, None
-        
-        # Check cache first
-        cache_key = location_text.lower().strip()
+
+        # Check cache first; spelling variants of one place share a key
+        cache_key = normalize_location(location_text)
         if cache_key in self.cache:
             return self.cache[cache_key]
-        
-        # Try OpenStreetMap Nominatim first (free)
-        lat, lng = self._geocode_nominatim(location_text)
-        
-        # If that fails, try Google Geocoding as fallback
-        if lat is None and os.environ.get('GOOGLE_GEOCODING_API_KEY'):
-            lat, lng = self._geocode_google(location_text)
-        
-        # Cache the result
-        self.cache[cache_key] = (lat, lng)
+
+        result, definitive = self._run_chain(location_text)
+        lat, lng = result if result else (None, None)
+
+        if lat is not None:
+            print(f"📍 Geocoded '{location_text}' to {lat}, {lng}")
+        else:
+            print(f"❌ Geocoding failed for: {location_text}")
+
+        # Only cache answers every provider agreed on, not timeouts or open breakers
+        if definitive:
+            self.cache[cache_key] = (lat, lng)
         return lat, lng
-    
-    def _geocode_nominatim(self, location_text):
-        """Use OpenStreetMap Nominatim (free)"""
+
+    def _hedge_delay(self, provider):
+        histogram = http_client.histogram(provider.http_provider)
+        if histogram.count < self.min_hedge_samples:
+            return self.default_hedge_delay
+        return histogram.percentile(self.hedge_percentile) / 1000.0
+
+    def _call(self, provider, location_text, timeout):
+        breaker = self.breakers[provider.name]
         try:
-            base_url = "https://nominatim.openstreetmap.org/search"
-            params = {
-                'q': location_text,
-                'format': 'json',
-                'limit': 1,
-                'addressdetails': 1
-            }
-            
-            headers = {
-                'User-Agent': 'CivicBot/1.0 (Community Service Reporting System)',
-                'Accept-Language': 'en'
-            }
-            
-            # Be respectful with rate limiting
-            time.sleep(1)
-            
-            response = requests.get(base_url, params=params, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    lat = float(data[0]['lat'])
-                    lon = float(data[0]['lon'])
-                    print(f"📍 Geocoded '{location_text}' to {lat}, {lon} via OSM")
-                    return lat, lon
-            
-            print(f"❌ OSM geocoding failed for: {location_text}")
-            return None, None
-            
+            result = provider.geocode(location_text, timeout)
+            breaker.record_success()
+            return result
+        except ProviderSkipped as e:
+            breaker.release()
+            print(f"⏭️ Skipping {provider.name}: {e}")
+            raise
         except Exception as e:
-            print(f"❌ OSM geocoding error: {e}")
-            return None, None
-    
-    def _geocode_google(self, location_text):
-        """Use Google Geocoding API as fallback"""
-        try:
-            api_key = os.environ.get('GOOGLE_GEOCODING_API_KEY')
-            if not api_key:
-                return None, None
-                
-            base_url = "https://maps.googleapis.com/maps/api/geocode/json"
-            params = {
-                'address': location_text,
-                'key': api_key
+            breaker.record_failure()
+            print(f"❌ {provider.name} geocoding error: {e}")
+            raise
+
+    def _run_chain(self, location_text):
+        """Return (result, definitive) for a lookup within the latency budget"""
+        deadline = time.monotonic() + self.latency_budget
+        candidates = [p for p in self.providers if p.enabled()]
+        pending = {}
+        definitive = True
+
+        while candidates or pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None, False
+
+            if not pending:
+                provider = candidates.pop(0)
+                if not self.breakers[provider.name].allow():
+                    definitive = False
+                    continue
+                pending[self._executor.submit(self._call, provider, location_text, remaining)] = provider
+
+            # Wait for an answer, or until it's time to hedge with the next provider
+            wait_for = remaining
+            hedge_next = self.hedge and candidates
+            if hedge_next:
+                wait_for = min(remaining, max(self._hedge_delay(p) for p in pending.values()))
+
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception:
+                    definitive = False
+                    continue
+                if result:
+                    return result, True
+
+            if not done and hedge_next:
+                provider = candidates.pop(0)
+                if self.breakers[provider.name].allow():
+                    print(f"⏱️ Hedging geocode for '{location_text}' with {provider.name}")
+                    pending[self._executor.submit(self._call, provider, location_text,
+                                                  deadline - time.monotonic())] = provider
+                else:
+                    definitive = False
+
+        return None, definitive
+
+    def status(self):
+        """Circuit breaker state for each provider"""
+        return {
+            'latency_budget_s': self.latency_budget,
+            'hedging': self.hedge,
+            'providers': {
+                provider.name: dict(self.breakers[provider.name].status(), enabled=provider.enabled())
+                for provider in self.providers
             }
-            
-            response = requests.get(base_url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data['status'] == 'OK' and data['results']:
-                    location = data['results'][0]['geometry']['location']
-                    lat = location['lat']
-                    lng = location['lng']
-                    print(f"📍 Geocoded '{location_text}' to {lat}, {lng} via Google")
-                    return lat, lng
-            
-            return None, None
-            
-        except Exception as e:
-            print(f"❌ Google geocoding error: {e}")
-            return None, None
-    
+        }
+
     def get_demo_coordinates(self, location_text):
         """Generate demo coordinates for testing when geocoding fails"""
         # Simple hash-based coordinate generation for consistent demo data
         import hashlib
-        
+
         hash_obj = hashlib.md5(location_text.encode())
         hash_int = int(hash_obj.hexdigest()[:8], 16)
-        
+
         # Generate coordinates within a reasonable area
         base_lat = 40.7128  # NYC latitude
         base_lng = -74.0060  # NYC longitude
-        
+
         lat_variation = (hash_int % 1000 - 500) / 10000  # ±0.05 degrees
         lng_variation = ((hash_int // 1000) % 1000 - 500) / 10000  # ±0.05 degrees
-        
+
         demo_lat = base_lat + lat_variation
         demo_lng = base_lng + lng_variation
-        
+
         print(f"📍 Using demo coordinates for '{location_text}': {demo_lat}, {demo_lng}")
         return demo_lat, demo_lng
 
 # Global instance
-geocoder = GeocodingService()
\ No newline at end of file
+geocoder = GeocodingService()
@@ -0,0 +1,168 @@
+# geohash.py
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+DECODE_MAP = {char: index for index, char in enumerate(BASE32)}
+
+# Default precision stored on reports: ~4.8m x 4.8m cells
+DEFAULT_PRECISION = 9
+
+METERS_PER_DEGREE = 111320
+EARTH_RADIUS_M = 6371000
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in meters"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def encode(lat, lng, precision=DEFAULT_PRECISION):
+    """Encode a coordinate pair as a geohash string"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    value = 0
+    even = True  # Geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if lng >= mid:
+                value = (value << 1) | 1
+                lng_range[0] = mid
+            else:
+                value <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_range[0] = mid
+            else:
+                value <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(BASE32[value])
+            bit = 0
+            value = 0
+
+    return ''.join(chars)
+
+
+def decode_bbox(geohash):
+    """Decode a geohash to its bounding box (min_lat, min_lng, max_lat, max_lng)"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = DECODE_MAP[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lng_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def decode(geohash):
+    """Decode a geohash to the (lat, lng) of its cell center"""
+    min_lat, min_lng, max_lat, max_lng = decode_bbox(geohash)
+    return (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+
+
+def cell_size_deg(precision):
+    """(height, width) of a geohash cell in degrees"""
+    bits = precision * 5
+    lat_bits = bits // 2
+    lng_bits = bits - lat_bits
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def cell_size_m(precision, lat=0.0):
+    """Smallest side of a geohash cell in meters at a given latitude"""
+    height_deg, width_deg = cell_size_deg(precision)
+    height_m = height_deg * METERS_PER_DEGREE
+    width_m = width_deg * METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01)
+    return min(height_m, width_m)
+
+
+def precision_for_radius(radius_m, lat=0.0, max_precision=DEFAULT_PRECISION):
+    """Longest precision whose cells are still at least radius_m wide.
+
+    A point's cell plus its 8 neighbours at this precision then covers
+    every point within radius_m of it.
+    """
+    for precision in range(max_precision, 0, -1):
+        if cell_size_m(precision, lat) >= radius_m:
+            return precision
+    return 1
+
+
+def neighbors(geohash):
+    """The 8 cells surrounding a geohash, at the same precision"""
+    lat, lng = decode(geohash)
+    height, width = cell_size_deg(len(geohash))
+    result = []
+    for d_lat in (-1, 0, 1):
+        for d_lng in (-1, 0, 1):
+            if d_lat == 0 and d_lng == 0:
+                continue
+            n_lat = lat + d_lat * height
+            if not -90 <= n_lat <= 90:
+                continue
+            n_lng = (lng + d_lng * width + 180) % 360 - 180
+            result.append(encode(n_lat, n_lng, len(geohash)))
+    return result
+
+
+def covering_cells(lat, lng, radius_m, max_cells=16, max_precision=DEFAULT_PRECISION):
+    """Geohash prefixes that together cover a circle around a point.
+
+    Picks the finest precision at which the circle's bounding box spans
+    at most max_cells cells, so the prefix ranges stay few but tight.
+    """
+    d_lat = radius_m / METERS_PER_DEGREE
+    d_lng = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    min_lat, max_lat = max(lat - d_lat, -90.0), min(lat + d_lat, 90.0)
+    min_lng, max_lng = lng - d_lng, lng + d_lng
+
+    for precision in range(max_precision, 0, -1):
+        height, width = cell_size_deg(precision)
+        rows = int(math.floor(max_lat / height) - math.floor(min_lat / height)) + 1
+        cols = int(math.floor(max_lng / width) - math.floor(min_lng / width)) + 1
+        if rows * cols <= max_cells or precision == 1:
+            break
+
+    cells = set()
+    for row in range(rows):
+        cell_lat = min(min_lat + row * height, max_lat)
+        for col in range(cols):
+            cell_lng = min(min_lng + col * width, max_lng)
+            cells.add(encode(cell_lat, (cell_lng + 180) % 360 - 180, precision))
+    # The stepped grid can miss the top/right edge cells of the box
+    for corner_lat in (min_lat, max_lat):
+        for corner_lng in (min_lng, max_lng):
+            cells.add(encode(corner_lat, (corner_lng + 180) % 360 - 180, precision))
+    return sorted(cells)
+
+
+def prefix_range(prefix):
+    """Half-open [low, high) string range matching every geohash with this prefix.
+
+    Range comparisons (unlike LIKE) can use the geohash index in SQLite.
+    """
+    return prefix, prefix + '{'  # '{' sorts after every base32 character
@@ -0,0 +1,186 @@
+# http_client.py
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Per-provider connection, timeout and retry policy. Timeouts are
+# (connect, read) in seconds; retries only cover connection errors and
+# retryable status codes, with exponential backoff between attempts.
+#
+# Twilio abandons a webhook after 15 seconds, and a photo webhook
+# downloads its media and may geocode. Media gets two 2s connect attempts
+# and a 5s header read, all inside MEDIA_DOWNLOAD_DEADLINE (9s, which also
+# cuts off the body), and the geocoder its 4s budget; that leaves ~2s for
+# the rest. So media never retries slow reads or error statuses.
+PROVIDER_POLICIES = {
+    'nominatim': {'connect_timeout': 3.05, 'read_timeout': 5, 'retries': 1, 'backoff': 0.5, 'pool_size': 4},
+    'google_geocoding': {'connect_timeout': 3.05, 'read_timeout': 5, 'retries': 2, 'backoff': 0.3, 'pool_size': 4},
+    'google_vision': {'connect_timeout': 3.05, 'read_timeout': 15, 'retries': 2, 'backoff': 0.5, 'pool_size': 4, 'retry_post': True},
+    'twilio_media': {'connect_timeout': 2, 'read_timeout': 5, 'retries': 1, 'backoff': 0.5, 'pool_size': 8, 'connect_retries_only': True},
+    'default': {'connect_timeout': 3.05, 'read_timeout': 10, 'retries': 1, 'backoff': 0.5, 'pool_size': 4}
+}
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+USER_AGENT = 'CivicBot/1.0 (Community Service Reporting System)'
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for one provider"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ms, ok=True):
+        with self._lock:
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if elapsed_ms <= bound:
+                    index = i
+                    break
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            if not ok:
+                self.errors += 1
+
+    def percentile(self, q):
+        """Estimate the q-th percentile (0-100) as the upper bound of its bucket"""
+        with self._lock:
+            if self.count == 0:
+                return None
+            target = self.count * q / 100.0
+            cumulative = 0
+            for i, bucket_count in enumerate(self.counts):
+                cumulative += bucket_count
+                if cumulative >= target:
+                    return self.buckets[i] if i < len(self.buckets) else self.max_ms
+            return self.max_ms
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={bound}ms" for bound in self.buckets] + [f">{self.buckets[-1]}ms"]
+            data = {
+                'count': self.count,
+                'errors': self.errors,
+                'avg_ms': round(self.total_ms / self.count, 1) if self.count else 0,
+                'max_ms': round(self.max_ms, 1),
+                'buckets': dict(zip(labels, self.counts))
+            }
+        data['p50_ms'] = self.percentile(50)
+        data['p90_ms'] = self.percentile(90)
+        data['p99_ms'] = self.percentile(99)
+        return data
+
+
+class HTTPClient:
+    """Shared outbound HTTP client.
+
+    Each provider gets its own requests.Session with a keep-alive
+    connection pool per host, explicit connect/read timeouts, a retry
+    policy and a latency histogram, so repeated calls to Nominatim,
+    Google or Twilio reuse warm TCP/TLS connections.
+    """
+
+    def __init__(self, policies=None):
+        self.policies = policies or PROVIDER_POLICIES
+        self._sessions = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def policy(self, provider):
+        return self.policies.get(provider, self.policies['default'])
+
+    def _build_session(self, provider):
+        policy = self.policy(provider)
+        allowed_methods = {'GET', 'HEAD', 'OPTIONS'}
+        if policy.get('retry_post'):
+            allowed_methods.add('POST')
+
+        other_retries = 0 if policy.get('connect_retries_only') else policy['retries']
+        retry = Retry(
+            total=policy['retries'],
+            connect=policy['retries'],
+            read=other_retries,
+            status=other_retries,
+            backoff_factor=policy['backoff'],
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(allowed_methods),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=policy['pool_size'],
+            pool_maxsize=policy['pool_size'],
+            max_retries=retry
+        )
+
+        session = requests.Session()
+        session.headers['User-Agent'] = USER_AGENT
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def session(self, provider):
+        """Get (or lazily create) the pooled session for a provider"""
+        session = self._sessions.get(provider)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(provider)
+                if session is None:
+                    session = self._build_session(provider)
+                    self._sessions[provider] = session
+                    self._histograms[provider] = LatencyHistogram()
+        return session
+
+    def histogram(self, provider):
+        self.session(provider)
+        return self._histograms[provider]
+
+    def request(self, provider, method, url, **kwargs):
+        """Send a request through the provider's pool, recording its latency"""
+        session = self.session(provider)
+        if 'timeout' not in kwargs:
+            policy = self.policy(provider)
+            kwargs['timeout'] = (policy['connect_timeout'], policy['read_timeout'])
+
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self._histograms[provider].record((time.perf_counter() - start) * 1000, ok=False)
+            raise
+
+        self._histograms[provider].record((time.perf_counter() - start) * 1000, ok=response.status_code < 400)
+        return response
+
+    def get(self, provider, url, **kwargs):
+        return self.request(provider, 'GET', url, **kwargs)
+
+    def post(self, provider, url, **kwargs):
+        return self.request(provider, 'POST', url, **kwargs)
+
+    def latency_stats(self):
+        """Latency histograms for every provider used so far"""
+        return {provider: histogram.snapshot() for provider, histogram in list(self._histograms.items())}
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+# Global instance
+http_client = HTTPClient()
@@ -0,0 +1,208 @@
+# image_analysis.py
+import io
+import math
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+try:
+    import numpy as np
+    from PIL import Image, ImageOps
+except ImportError:  # falls back to file-size heuristics
+    np = None
+    Image = None
+
+# Longest edge images are decoded to before any metric is computed
+ANALYSIS_SIZE = 256
+PHASH_SIZE = 32
+PHASH_BITS = 8
+
+# Thresholds at ANALYSIS_SIZE; below them a photo is flagged as unusable
+BLUR_THRESHOLD = 40.0        # variance of the Laplacian
+DARK_THRESHOLD = 35.0        # mean luminance, 0-255
+BRIGHT_THRESHOLD = 235.0
+CONTRAST_THRESHOLD = 12.0    # luminance standard deviation
+MIN_DIMENSION = 240          # shorter edge of the original, in pixels
+
+# Refuse to decode anything claiming more pixels than this (decompression bombs)
+MAX_PIXELS = 60_000_000
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II basis, so a 2-D DCT is two matrix products"""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = None
+
+
+def perceptual_hash(gray_image):
+    """64-bit pHash (hex) of a PIL grayscale image: signs of the low DCT frequencies vs their median"""
+    global _DCT
+    if _DCT is None:
+        _DCT = _dct_matrix(PHASH_SIZE)
+    pixels = np.asarray(gray_image.resize((PHASH_SIZE, PHASH_SIZE), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:PHASH_BITS, :PHASH_BITS].ravel()
+    bits = low > np.median(low[1:])
+    return f'{int("".join("1" if b else "0" for b in bits), 2):016x}'
+
+
+def laplacian_variance(gray):
+    """Sharpness: variance of a 4-neighbour Laplacian over a float array"""
+    laplacian = (gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]) - 4 * gray[1:-1, 1:-1]
+    return float(laplacian.var())
+
+
+def dominant_colors(rgb, count=3):
+    """Most common colours after quantizing each channel to 4 levels"""
+    quantized = (rgb >> 6).astype(np.int32)
+    codes = (quantized[..., 0] << 4) | (quantized[..., 1] << 2) | quantized[..., 2]
+    counts = np.bincount(codes.ravel(), minlength=64)
+    total = counts.sum()
+    colors = []
+    for code in np.argsort(counts)[::-1][:count]:
+        if not counts[code]:
+            break
+        # Centre of the quantization cell
+        r, g, b = ((code >> 4) & 3) * 64 + 32, ((code >> 2) & 3) * 64 + 32, (code & 3) * 64 + 32
+        colors.append({'hex': f'#{r:02x}{g:02x}{b:02x}', 'share': round(float(counts[code] / total), 3)})
+    return colors
+
+
+def analyze_image_bytes(content):
+    """Local quality metrics for raw image bytes, shaped like a vision result.
+
+    The image is decoded once, scaled down during decode where the format
+    allows, and every metric runs vectorized over that small array.
+    """
+    with Image.open(io.BytesIO(content)) as original:
+        width, height = original.size
+        if width * height > MAX_PIXELS:
+            raise ValueError(f"Image too large to analyze ({width}x{height})")
+        original.draft('RGB', (ANALYSIS_SIZE, ANALYSIS_SIZE))
+        image = ImageOps.exif_transpose(original).convert('RGB')
+    image.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.BILINEAR)
+
+    rgb = np.asarray(image, dtype=np.uint8)
+    gray_image = image.convert('L')
+    gray = np.asarray(gray_image, dtype=np.float32)
+
+    metrics = {
+        'blur': round(laplacian_variance(gray), 1),
+        'brightness': round(float(gray.mean()), 1),
+        'contrast': round(float(gray.std()), 1)
+    }
+
+    flags = []
+    if metrics['blur'] < BLUR_THRESHOLD:
+        flags.append('blurry')
+    if metrics['brightness'] < DARK_THRESHOLD:
+        flags.append('too_dark')
+    elif metrics['brightness'] > BRIGHT_THRESHOLD:
+        flags.append('too_bright')
+    if metrics['contrast'] < CONTRAST_THRESHOLD:
+        flags.append('low_contrast')
+    if min(width, height) < MIN_DIMENSION:
+        flags.append('too_small')
+
+    return {
+        "analysis_source": "local",
+        "detected_issues": [],
+        "primary_issue": "unknown",
+        "confidence": 0,
+        "file_size_kb": round(len(content) / 1024, 1),
+        "dimensions": {"width": width, "height": height},
+        "metrics": metrics,
+        "dominant_colors": dominant_colors(rgb),
+        "phash": perceptual_hash(gray_image),
+        "quality_flags": flags,
+        "quality": "poor" if flags else "good",
+        "usable": not flags
+    }
+
+
+def size_only_analysis(content):
+    """What can be said without Pillow and NumPy"""
+    file_size_kb = len(content) / 1024
+    return {
+        "analysis_source": "basic",
+        "file_size_kb": round(file_size_kb, 1),
+        "quality": "good" if file_size_kb > 100 else "poor",
+        "detected_issues": [],
+        "safe_for_work": True
+    }
+
+
+class LocalImageAnalyzer:
+    """Runs analyze_image_bytes in a process pool with a per-image time budget.
+
+    Decoding is CPU bound, so separate processes keep it off the request
+    thread's GIL. An image that overruns the budget gets the size-only
+    result; its worker finishes in the background.
+    """
+
+    def __init__(self, workers=None, time_budget=None):
+        self.workers = workers or int(os.environ.get('IMAGE_ANALYSIS_WORKERS', 2))
+        self.time_budget = time_budget or float(os.environ.get('IMAGE_ANALYSIS_BUDGET_MS', 1500)) / 1000
+        self._pool = None
+        self._lock = threading.Lock()
+        self._stats = {'analyzed': 0, 'timeouts': 0, 'failed': 0}
+
+    @property
+    def available(self):
+        return Image is not None and np is not None
+
+    def _executor(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def analyze(self, content):
+        return self.analyze_many([content])[0]
+
+    def analyze_many(self, contents):
+        """Analyze several images in parallel, keeping order"""
+        if not self.available:
+            return [size_only_analysis(content) for content in contents]
+
+        futures = [self._executor().submit(analyze_image_bytes, content) for content in contents]
+        # Each worker gets the budget for every image it has to get through
+        deadline = time.monotonic() + self.time_budget * math.ceil(len(contents) / self.workers)
+        results = []
+        for content, future in zip(contents, futures):
+            try:
+                result = future.result(timeout=max(0, deadline - time.monotonic()))
+                self._count('analyzed')
+            except FutureTimeout:
+                self._count('timeouts')
+                result = dict(size_only_analysis(content), error='Time budget exceeded')
+            except Exception as e:
+                self._count('failed')
+                result = dict(size_only_analysis(content), error=str(e))
+            results.append(result)
+        return results
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, workers=self.workers, time_budget_ms=round(self.time_budget * 1000),
+                        available=self.available)
+
+    def shutdown(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Global instance
+local_image_analyzer = LocalImageAnalyzer()
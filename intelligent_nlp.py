@@ -1,65 +1,264 @@
 # intelligent_nlp.py
-import re
+import hashlib
+import json
+from analysis_cache import AnalysisCache
+from fuzzy_matcher import SPELLING_VARIANTS, SPELLING_SUFFIXES, NEAR_MISS_WORDS
+from language_packs import PackRegistry, fold
+from location_extractor import location_extractor
+from nlp_pipeline import NLPPipeline
+from text_classifier import load_classifier
+
+# Issue keywords, weights, urgency words and intent phrases live in
+# per-language packs under data/patterns; routing is language independent
+DEPARTMENT_MAP = {
+    'pothole': 'public_works',
+    'street_light': 'public_works',
+    'garbage': 'sanitation',
+    'water_issue': 'water_department',
+    'traffic': 'traffic_department',
+    'graffiti': 'public_works'
+}
+
+# Confidence multi-keyword matches get on top of the issue weight, and
+# the confidence reported when nothing matched
+MULTI_KEYWORD_BOOST = 0.2
+NO_MATCH_CONFIDENCE = 0.3
+
+# Issues found only through a typo-tolerant match count a little less
+FUZZY_CONFIDENCE_FACTOR = 0.9
+
+# Trained model predictions below this probability fall back to keywords
+CLASSIFIER_MIN_CONFIDENCE = 0.6
+
+
+
+def normalize_text(message):
+    """Lowercased, accent-folded, whitespace-collapsed text; also the analysis cache key"""
+    return ' '.join(fold(message or '').split())
+
+
+def resolve_issue_type(nlp_analysis, vision_analysis):
+    """The text classification, unless a vision label is more confident"""
+    if (vision_analysis and
+        vision_analysis.get('primary_issue') != 'unknown' and
+        vision_analysis.get('confidence', 0) > nlp_analysis['confidence']):
+        return vision_analysis['primary_issue']
+    return nlp_analysis['primary_issue']
+
+
+def pattern_version(*tables):
+    """Short content hash of the pattern tables a classification depends on"""
+    payload = json.dumps(tables, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
 
 class IntelligentCivicNLP:
-    def __init__(self):
-        self.issue_patterns = self._build_patterns()
-    
-    def _build_patterns(self):
-        return {
-            'pothole': ['pothole', 'road damage', 'street damage', 'hole in road'],
-            'garbage': ['garbage', 'trash', 'rubbish', 'waste', 'dump'],
-            'street_light': ['street light', 'streetlight', 'light out', 'dark street'],
-            'water_issue': ['water leak', 'flood', 'leak', 'pipe burst'],
-            'graffiti': ['graffiti', 'vandalism', 'spray paint'],
-            'other': []
-        }
-    
+    """Civic message analyzer built on an NLPPipeline.
+
+    Stages: normalize -> language -> intent -> classify -> location ->
+    urgency -> route. Swap or extend them through `self.pipeline`. The
+    language stage picks which pattern pack the later stages match against,
+    loading it on first use. The classify stage uses the
+    trained text classifier when one is available and confident, and the
+    keyword automaton otherwise. Results are memoized per normalized text
+    and version in `self.cache`.
+    """
+
+    def __init__(self, classifier=None, cache=None, packs=None):
+        self.cache = cache or AnalysisCache()
+        self.packs = packs or PackRegistry()
+        self._load(classifier)
+
+    def _load(self, classifier=None):
+        self.classifier = classifier or load_classifier()
+        self.pipeline = self._build_pipeline()
+        # Stored on each report so re-classification can skip up-to-date rows,
+        # and part of every cache lookup so a new version empties the cache
+        self.version = pattern_version(
+            self.packs.version(), DEPARTMENT_MAP,
+            SPELLING_VARIANTS, SPELLING_SUFFIXES, sorted(NEAR_MISS_WORDS),
+            self.classifier.version if self.classifier else None
+        )
+
+    def reload(self, classifier=None):
+        """Pick up edited pattern packs or a retrained model"""
+        self.packs = PackRegistry(self.packs.patterns_dir, self.packs.default)
+        self._load(classifier)
+        print(f"🔄 NLP engine reloaded, version {self.version}")
+
+    def _build_pipeline(self):
+        pipeline = NLPPipeline('civic_nlp')
+        pipeline.register('normalize', self._normalize)
+        pipeline.register('language', self._detect_language)
+        pipeline.register('intent', self._detect_intent)
+        pipeline.register('classify', self._classify)
+        pipeline.register('location', self._locate)
+        pipeline.register('urgency', self._assess_urgency)
+        pipeline.register('route', self._route)
+        return pipeline
+
     def analyze_message(self, message):
-        message_lower = message.lower()
-        
-        # Simple keyword matching
-        for issue_type, keywords in self.issue_patterns.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    return {
-                        'primary_issue': issue_type,
-                        'location': self._extract_location(message),
-                        'urgency': 'medium',
-                        'department': self._get_department(issue_type),
-                        'confidence': 0.8,
-                        'all_issues': [issue_type]
-                    }
-        
+        key = normalize_text(message)
+        result = self.cache.get(self.version, key)
+        if result is None:
+            result = self._result(self.pipeline.run(message or ''))
+            self.cache.put(self.version, key, result)
+        return self._copy(result)
+
+    @staticmethod
+    def _copy(result):
+        # Callers may edit the dict they get back; keep the cached one intact
+        return dict(result, all_issues=list(result['all_issues']))
+
+    def _result(self, context):
         return {
-            'primary_issue': 'other',
-            'location': 'Unknown',
-            'urgency': 'medium',
-            'department': 'public_works',
-            'confidence': 0.3,
-            'all_issues': ['other']
+            'intent': context['intent'],
+            'language': context['language'],
+            'primary_issue': context['primary_issue'],
+            'location': context['location'],
+            'location_kind': context['location_kind'],
+            'urgency': context['urgency'],
+            'department': context['department'],
+            'confidence': context['confidence'],
+            'all_issues': context['all_issues'],
+            'needs_follow_up': context['needs_follow_up'],
+            'classifier': context['classifier']
         }
-    
-    def _extract_location(self, message):
-        # Simple location extraction
-        location_patterns = [
-            r'(?:at|on|near)\s+([^,.!?]+)',
-            r'(\d+\s+\w+\s+(?:street|st|avenue|ave|road|rd))'
+
+    def classify_many(self, messages):
+        """Analyze a batch of messages, returning results in the same order.
+
+        Cached messages are answered directly; the trained classifier
+        scores the remaining ones in one pass up front.
+        """
+        version = self.version
+        keys = [normalize_text(message) for message in messages]
+        results = [self.cache.get(version, key) for key in keys]
+
+        pending = {}  # key -> original message, once per distinct text
+        for message, key, result in zip(messages, keys, results):
+            if result is None and key not in pending:
+                pending[key] = message or ''
+
+        if pending:
+            if self.classifier:
+                # Scored on the normalized text, as the classify stage does
+                predictions = self.classifier.predict_many(list(pending))
+            else:
+                predictions = [None] * len(pending)
+            for (key, text), prediction in zip(pending.items(), predictions):
+                pending[key] = self._result(self.pipeline.run(text, model_prediction=prediction))
+                self.cache.put(version, key, pending[key])
+
+        return [
+            self._copy(result if result is not None else pending[key])
+            for key, result in zip(keys, results)
         ]
-        
-        for pattern in location_patterns:
-            matches = re.findall(pattern, message, re.IGNORECASE)
-            if matches:
-                return matches[0].strip()
-        
-        return 'Unknown'
-    
+
+    def stage_timings(self):
+        return self.pipeline.timings()
+
+    # Pipeline stages
+    def _normalize(self, context):
+        context['normalized'] = normalize_text(context['message'])
+
+    def _detect_language(self, context):
+        context['language'] = self.packs.detect(context['normalized'])
+        context['pack'] = self.packs.get(context['language'])
+
+    def _detect_intent(self, context):
+        text = context['normalized']
+        pack = context['pack']
+        if text in pack.greetings:
+            context['intent'] = 'greeting'
+        elif any(phrase in text for phrase in pack.help_phrases):
+            context['intent'] = 'help'
+        elif any(phrase in text for phrase in pack.thanks_phrases):
+            context['intent'] = 'thanks'
+        elif text.isdigit():
+            context['intent'] = 'status'
+        else:
+            context['intent'] = 'report'
+
+    def _classify(self, context):
+        pack = context['pack']
+        hits = pack.matcher.match(context['normalized'])
+        # Misspellings ("potholle", "garbadge") only fill in categories the
+        # exact automaton missed
+        fuzzy_hits = {category: data for category, data in pack.fuzzy_matcher.match(context['normalized']).items()
+                      if category not in hits}
+        context['fuzzy_hits'] = fuzzy_hits
+        context['keyword_hits'] = dict(hits, **fuzzy_hits)
+
+        detected_issues = []
+        for issue_type, data in pack.issue_patterns.items():
+            issue_hits = context['keyword_hits'].get(issue_type)
+            if issue_hits:
+                confidence = data['weight']
+                # Boost confidence if multiple keywords match
+                if len(issue_hits['keywords']) > 1:
+                    confidence += MULTI_KEYWORD_BOOST
+                if issue_type in fuzzy_hits:
+                    confidence *= FUZZY_CONFIDENCE_FACTOR
+                detected_issues.append({
+                    'type': issue_type,
+                    'confidence': min(confidence, 1.0),
+                    'emergency': data['emergency']
+                })
+
+        # Stable sort keeps pattern order between equally confident issues
+        detected_issues.sort(key=lambda issue: issue['confidence'], reverse=True)
+
+        prediction = self._model_prediction(context)
+        if prediction:
+            # The model's pick leads; keyword hits stay as secondary issues
+            label, probability = prediction
+            detected_issues = [{
+                'type': label,
+                'confidence': round(probability, 3),
+                'emergency': pack.issue_patterns.get(label, {}).get('emergency', False)
+            }] + [issue for issue in detected_issues if issue['type'] != label]
+            context['classifier'] = 'model'
+        else:
+            context['classifier'] = 'keywords'
+        context['detected_issues'] = detected_issues
+
+        if detected_issues:
+            context['primary_issue'] = detected_issues[0]['type']
+            context['confidence'] = detected_issues[0]['confidence']
+            context['all_issues'] = [issue['type'] for issue in detected_issues]
+        else:
+            context['primary_issue'] = 'other'
+            context['confidence'] = NO_MATCH_CONFIDENCE
+            context['all_issues'] = ['other']
+
+    def _model_prediction(self, context):
+        """Model (label, probability) if it is confident enough to use, else None"""
+        if not self.classifier:
+            return None
+        prediction = context.get('model_prediction') or self.classifier.predict(context['normalized'])
+        if prediction[1] < CLASSIFIER_MIN_CONFIDENCE:
+            return None
+        return prediction
+
+    def _locate(self, context):
+        found = location_extractor.extract(context['message'])
+        context['location'] = found['text'] if found else 'Unknown'
+        context['location_kind'] = found['kind'] if found else None
+        context['location_key'] = found['key'] if found else None
+
+    def _assess_urgency(self, context):
+        emergency = any(issue['emergency'] for issue in context.get('detected_issues', []))
+        if '_urgency' in context.get('keyword_hits', {}):
+            context['urgency'] = 'high'
+        elif emergency:
+            context['urgency'] = 'medium'
+        else:
+            context['urgency'] = 'normal'
+        context['needs_follow_up'] = emergency or context['urgency'] in ['high', 'medium']
+
+    def _route(self, context):
+        context['department'] = self._get_department(context['primary_issue'])
+
     def _get_department(self, issue_type):
-        department_map = {
-            'pothole': 'public_works',
-            'street_light': 'public_works',
-            'garbage': 'sanitation',
-            'water_issue': 'water_department',
-            'graffiti': 'public_works'
-        }
-        return department_map.get(issue_type, 'public_works')
\ No newline at end of file
+        return DEPARTMENT_MAP.get(issue_type, 'public_works')
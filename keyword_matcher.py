@@ -0,0 +1,90 @@
+# keyword_matcher.py
+from collections import deque
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a {category: [keywords]} pattern table.
+
+    The automaton is compiled once; matching walks the text a single time
+    and reports every keyword occurrence (including overlapping ones), so
+    the cost no longer grows with categories x keywords.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = {category: [k.lower() for k in keywords] for category, keywords in patterns.items()}
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        self._build()
+
+    def _build(self):
+        # Trie of every keyword; a keyword may belong to several categories
+        for category, keywords in self.patterns.items():
+            for keyword in keywords:
+                if not keyword:
+                    continue
+                node = 0
+                for char in keyword:
+                    next_node = self._goto[node].get(char)
+                    if next_node is None:
+                        next_node = len(self._goto)
+                        self._goto[node][char] = next_node
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._output.append(())
+                    node = next_node
+                if (category, keyword) not in self._output[node]:
+                    self._output[node] = self._output[node] + ((category, keyword),)
+
+        # Breadth-first failure links, merging each node's outputs with its
+        # failure node's so matching never has to follow output chains
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    @property
+    def size(self):
+        """Number of automaton states"""
+        return len(self._goto)
+
+    def find_all(self, text):
+        """Every keyword hit in text as (start, end, category, keyword)"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        hits = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                end = index + 1
+                for category, keyword in output[node]:
+                    hits.append((end - len(keyword), end, category, keyword))
+        return hits
+
+    def match(self, text):
+        """Per-category hits for text (matched case-insensitively).
+
+        Returns {category: {'count': hits, 'keywords': [distinct keywords
+        in order of first hit], 'spans': [(start, end), ...]}} for every
+        category with at least one hit.
+        """
+        results = {}
+        for start, end, category, keyword in self.find_all(text.lower()):
+            result = results.get(category)
+            if result is None:
+                result = results[category] = {'count': 0, 'keywords': [], 'spans': []}
+            result['count'] += 1
+            result['spans'].append((start, end))
+            if keyword not in result['keywords']:
+                result['keywords'].append(keyword)
+        return results
@@ -0,0 +1,251 @@
+# language_packs.py
+import argparse
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+from collections import Counter
+from fuzzy_matcher import FuzzyMatcher
+from keyword_matcher import KeywordMatcher
+
+DEFAULT_PATTERNS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'patterns')
+DEFAULT_LANGUAGE = 'en'
+PROFILES_FILE = 'profiles.json'
+
+# Trigrams kept per language profile, and how far ahead the best language
+# must score (relative to the runner-up) to beat the default
+PROFILE_SIZE = 300
+DETECTION_MARGIN = 1.15
+# Enough text to tell languages apart; longer messages are not scanned further
+DETECTION_CHARS = 200
+# Distinct vision labels remembered per pack; real photos reuse a small vocabulary
+LABEL_CACHE_SIZE = 4096
+
+
+def fold(text):
+    """Lowercase and strip accents so 'Semáforo' and 'semaforo' match alike"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def trigrams(text):
+    """Character trigrams of each word, padded with spaces at word edges"""
+    grams = []
+    for word in fold(text).split():
+        word = f' {word} '
+        grams.extend(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def _fast_trigrams(normalized):
+    # Doubling the spaces pads every word in one string; the extra
+    # cross-word grams ('e  ', '  c') are in no profile and score nothing
+    padded = ' ' + normalized[:DETECTION_CHARS].replace(' ', '  ') + ' '
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class LanguageDetector:
+    """Picks a language by summing ranked trigram weights from small profiles.
+
+    Each profile holds a language's most frequent trigrams; a trigram at
+    rank r contributes 1 - r / PROFILE_SIZE. Short or ambiguous messages
+    fall back to the default language.
+    """
+
+    def __init__(self, profiles, default=DEFAULT_LANGUAGE):
+        self.default = default
+        self.weights = {
+            language: {gram: 1 - rank / PROFILE_SIZE for rank, gram in enumerate(grams)}
+            for language, grams in profiles.items()
+        }
+
+    def scores(self, text):
+        """Per-language score for text that is already folded and whitespace-collapsed"""
+        grams = _fast_trigrams(text)
+        return {
+            language: sum(filter(None, map(weights.get, grams)))
+            for language, weights in self.weights.items()
+        }
+
+    def detect(self, text):
+        scores = sorted(self.scores(text).items(), key=lambda item: item[1], reverse=True)
+        if not scores or scores[0][1] < 1:
+            return self.default
+        if len(scores) > 1 and scores[0][1] < scores[1][1] * DETECTION_MARGIN:
+            return self.default
+        return scores[0][0]
+
+
+class LabelIndex:
+    """Vision label -> issue types, compiled once from a {issue: [keywords]} table.
+
+    A label is walked through the Aho-Corasick automaton a single time, so
+    adding categories does not make each label dearer. Labels repeat across
+    photos ('Road', 'Asphalt', ...), so each distinct one is resolved once.
+    """
+
+    def __init__(self, table):
+        self.categories = list(table)
+        self.matcher = KeywordMatcher(table)
+        self._resolved = {}
+
+    def issues_for(self, label):
+        """Issue types whose keywords occur in label, in table order"""
+        label = label.lower()
+        issues = self._resolved.get(label)
+        if issues is None:
+            hits = {category for _, _, category, _ in self.matcher.find_all(label)}
+            issues = tuple(category for category in self.categories if category in hits)
+            if len(self._resolved) < LABEL_CACHE_SIZE:
+                self._resolved[label] = issues
+        return issues
+
+
+class LanguagePack:
+    """One language's pattern tables; matchers are compiled on first use"""
+
+    def __init__(self, data):
+        self.language = data['language']
+        self.name = data.get('name', self.language)
+        self.issue_patterns = data['issue_patterns']
+        self.urgency_indicators = data.get('urgency_indicators', [])
+        self.greetings = [fold(g) for g in data.get('greetings', [])]
+        self.help_phrases = [fold(p) for p in data.get('help_phrases', [])]
+        self.thanks_phrases = [fold(p) for p in data.get('thanks_phrases', [])]
+        self.fuzzy_settings = data.get('fuzzy', {})
+        self.vision_labels = data.get('vision_labels', {})
+        self._matcher = None
+        self._fuzzy_matcher = None
+        self._label_index = None
+        self._lock = threading.Lock()
+
+    @property
+    def keyword_table(self):
+        """Issue keywords plus urgency indicators, accent-folded like messages are"""
+        table = {issue_type: [fold(k) for k in data['keywords']] for issue_type, data in self.issue_patterns.items()}
+        table['_urgency'] = [fold(k) for k in self.urgency_indicators]
+        return table
+
+    @property
+    def matcher(self):
+        if self._matcher is None:
+            with self._lock:
+                if self._matcher is None:
+                    self._matcher = KeywordMatcher(self.keyword_table)
+        return self._matcher
+
+    @property
+    def fuzzy_matcher(self):
+        if self._fuzzy_matcher is None:
+            with self._lock:
+                if self._fuzzy_matcher is None:
+                    self._fuzzy_matcher = FuzzyMatcher(
+                        self.keyword_table,
+                        variants=self.fuzzy_settings.get('variants'),
+                        suffixes=self.fuzzy_settings.get('suffixes'),
+                        near_misses=self.fuzzy_settings.get('near_misses')
+                    )
+        return self._fuzzy_matcher
+
+    @property
+    def label_index(self):
+        if self._label_index is None:
+            with self._lock:
+                if self._label_index is None:
+                    self._label_index = LabelIndex(self.vision_labels)
+        return self._label_index
+
+
+class PackRegistry:
+    """Language packs in a directory of <language>.json files, loaded lazily.
+
+    Only the small trigram profiles are read up front; a pack's tables are
+    read and its automata compiled the first time a message in that
+    language arrives.
+    """
+
+    def __init__(self, patterns_dir=None, default=DEFAULT_LANGUAGE):
+        self.patterns_dir = patterns_dir or os.environ.get('CIVICBOT_PATTERNS_DIR', DEFAULT_PATTERNS_DIR)
+        self.default = default
+        self._packs = {}
+        self._lock = threading.Lock()
+        self.detector = LanguageDetector(self._read_profiles(), default)
+
+    def _path(self, language):
+        return os.path.join(self.patterns_dir, f'{language}.json')
+
+    def _read_profiles(self):
+        path = os.path.join(self.patterns_dir, PROFILES_FILE)
+        if not os.path.exists(path):
+            print(f"⚠️ No language profiles at {path} - every message uses '{self.default}'")
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def available(self):
+        return sorted(
+            name[:-5] for name in os.listdir(self.patterns_dir)
+            if name.endswith('.json') and name != PROFILES_FILE
+        )
+
+    def loaded(self):
+        return sorted(self._packs)
+
+    def get(self, language):
+        """The pack for a language, loading it on first use; unknown languages get the default"""
+        pack = self._packs.get(language)
+        if pack:
+            return pack
+
+        path = self._path(language)
+        if not os.path.exists(path):
+            return self.get(self.default) if language != self.default else None
+
+        with self._lock:
+            if language not in self._packs:
+                with open(path, encoding='utf-8') as f:
+                    self._packs[language] = LanguagePack(json.load(f))
+                print(f"🌐 Loaded '{language}' pattern pack")
+            return self._packs[language]
+
+    def detect(self, text):
+        """Language of text that is already folded and whitespace-collapsed"""
+        return self.detector.detect(text)
+
+    def version(self):
+        """Hash of every pack file, so editing any pack changes the NLP version"""
+        digest = hashlib.sha1()
+        for language in self.available():
+            with open(self._path(language), 'rb') as f:
+                digest.update(language.encode('utf-8') + f.read())
+        return digest.hexdigest()[:12]
+
+
+def build_profiles(patterns_dir=DEFAULT_PATTERNS_DIR):
+    """Rank each pack's trigrams from its sample sentences and keywords"""
+    profiles = {}
+    for name in sorted(os.listdir(patterns_dir)):
+        if not name.endswith('.json') or name == PROFILES_FILE:
+            continue
+        with open(os.path.join(patterns_dir, name), encoding='utf-8') as f:
+            data = json.load(f)
+        text = ' '.join(data.get('sample', []))
+        text += ' ' + ' '.join(k for issue in data['issue_patterns'].values() for k in issue['keywords'])
+        profiles[data['language']] = [gram for gram, _ in Counter(trigrams(text)).most_common(PROFILE_SIZE)]
+
+    with open(os.path.join(patterns_dir, PROFILES_FILE), 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, ensure_ascii=False)
+        f.write('\n')
+    print(f"✅ Wrote trigram profiles for {', '.join(profiles)}")
+    return profiles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild language detection profiles from the pattern packs")
+    parser.add_argument('--patterns-dir', default=DEFAULT_PATTERNS_DIR)
+    args = parser.parse_args()
+    build_profiles(args.patterns_dir)
@@ -0,0 +1,153 @@
+# location_extractor.py
+import re
+from functools import lru_cache
+
+STREET_SUFFIXES = {
+    'street': 'street', 'st': 'street',
+    'avenue': 'avenue', 'ave': 'avenue', 'av': 'avenue',
+    'road': 'road', 'rd': 'road',
+    'boulevard': 'boulevard', 'blvd': 'boulevard',
+    'lane': 'lane', 'ln': 'lane',
+    'drive': 'drive', 'dr': 'drive',
+    'place': 'place', 'pl': 'place',
+    'court': 'court', 'ct': 'court',
+    'parkway': 'parkway', 'pkwy': 'parkway',
+    'way': 'way', 'terrace': 'terrace'
+}
+DIRECTIONS = {'n': 'north', 's': 'south', 'e': 'east', 'w': 'west'}
+
+LANDMARK_WORDS = [
+    'park', 'school', 'library', 'station', 'hospital', 'church', 'mall', 'market',
+    'plaza', 'square', 'playground', 'stadium', 'bridge', 'center', 'centre',
+    'museum', 'hall', 'bus stop', 'subway', 'pier', 'garden', 'gardens', 'terminal'
+]
+AREA_WORDS = ['area', 'neighborhood', 'neighbourhood', 'district']
+
+# Words that follow a location cue without naming a place ("look at this")
+NOT_PLACES = [
+    'it', 'this', 'that', 'them', 'there', 'here', 'the', 'a', 'an', 'my', 'our', 'all',
+    'night', 'once', 'least', 'times', 'time', 'risk', 'fire', 'red', 'green'
+]
+# Connectors that end a street name rather than belong to it
+NOT_NAME_WORDS = ['the', 'a', 'an', 'on', 'at', 'in', 'near', 'by', 'and', 'of', 'to', 'for', 'is', 'are']
+
+# Kinds in order of how precisely they pin down a spot; the best match wins
+KIND_RANK = {'street_address': 5, 'intersection': 4, 'street': 3, 'landmark': 2, 'area': 1, 'place': 0}
+
+
+def _alternation(words):
+    # Longest first so "bus stop" is tried before "bus"
+    return '|'.join(re.escape(w).replace(r'\ ', r'\s+') for w in sorted(set(words), key=len, reverse=True))
+
+
+_SUFFIX = rf'(?:{_alternation(STREET_SUFFIXES)})\.?'
+_WORD = r"[a-z0-9][\w.'-]*"
+_NAME_WORDS = rf"(?:(?!(?:{'|'.join(NOT_NAME_WORDS)})\b){_WORD}\s+){{1,3}}"
+_CROSS_STREET = rf"{_WORD}(?:\s+{_SUFFIX})?"
+# Words that end a free-form place ("behind the deli | near the park")
+STOP_WORDS = ['near', 'by', 'at', 'on', 'in', 'and', 'but', 'beside', 'opposite', 'around', 'outside',
+              'behind', 'next', 'since', 'for', 'from', 'with', 'causing', 'that', 'which', 'is', 'was']
+_PLACE_WORD = r"[\w'&-]+"
+# Checked once per word rather than per character, and capped at five words
+_PLACE = rf"{_PLACE_WORD}(?:\s+(?!(?:{_alternation(STOP_WORDS)})\b){_PLACE_WORD}){{0,4}}"
+
+# One alternation, tried left to right at each position. Alternatives that
+# name a place more precisely come first so they win at the same offset.
+# Written for lowercased input, which sre matches faster than IGNORECASE.
+LOCATION_PATTERN = rf'''
+    # Every alternative starts with a digit or a cue word (at, along, by,
+    # corner, in, near, on, ...); this gate on their first two letters
+    # rejects most positions before any alternative is tried
+    \b(?=[0-9]|a[cdlrt]|b[ey]|co|do|in|lo|ne|o[fnpu])(?:
+    (?:(?:at|on|near|around|by|location:?|address:?)\s+)?
+        (?P<street_address>\d{{1,5}}[a-z]?\s+{_NAME_WORDS}{_SUFFIX})(?!\w)
+  | (?:at\s+(?:the\s+)?(?:corner|intersection)\s+of|(?:corner|intersection)\s+of|at)\s+(?:the\s+)?
+        (?P<intersection>{_CROSS_STREET}\s+(?:and|&)\s+{_CROSS_STREET})(?!\w)
+  | (?:on|at|along|down|off|across)\s+(?P<street>{_NAME_WORDS}{_SUFFIX})(?!\w)
+  | (?:near|by|beside|opposite|outside|behind|around|at|in\s+front\s+of|next\s+to|across\s+from)\s+(?:the\s+)?
+        (?P<landmark>(?:{_WORD}\s+){{0,3}}?(?:{_alternation(LANDMARK_WORDS)}))(?!\w)
+  | in\s+(?:the\s+)?(?P<area>(?:{_WORD}\s+){{1,3}}?(?:{_alternation(AREA_WORDS)}))(?!\w)
+  | (?:at|on|near|around|beside|opposite|location:?|address:?)\s+(?:the\s+)?
+        (?!(?:{_alternation(NOT_PLACES)})\b)(?P<place>{_PLACE})
+    )
+'''
+LOCATION_REGEX = re.compile(LOCATION_PATTERN, re.VERBOSE)
+# For the rare text whose length changes when lowercased (e.g. 'İ')
+LOCATION_REGEX_IGNORECASE = re.compile(LOCATION_PATTERN, re.IGNORECASE | re.VERBOSE)
+
+_PUNCTUATION = re.compile(r"[^\w\s&-]")
+
+
+@lru_cache(maxsize=4096)
+def _normalize(text):
+    text = _PUNCTUATION.sub(' ', text.lower()).replace('&', ' and ')
+    words = text.split()
+    if words and words[0] == 'the':
+        words = words[1:]
+
+    expanded = []
+    for i, word in enumerate(words):
+        # Suffixes only expand after a name ("st" alone could be "saint")
+        if i > 0 and word in STREET_SUFFIXES:
+            word = STREET_SUFFIXES[word]
+        elif word in DIRECTIONS and len(words) > 1:
+            word = DIRECTIONS[word]
+        expanded.append(word)
+
+    key = ' '.join(expanded)
+    sides = key.split(' and ')
+    if len(sides) == 2 and all(sides):
+        key = ' and '.join(sorted(sides))
+    return key
+
+
+def normalize_location(text):
+    """Canonical form of a location string for use as a cache key.
+
+    Lowercases, drops punctuation, expands street suffix and compass
+    abbreviations, and orders the two sides of an intersection so
+    "Oak St & Maple Ave" and "maple avenue and oak street" share a key.
+    Street names repeat a lot, so results are memoized.
+    """
+    return _normalize(text or '')
+
+
+class LocationExtractor:
+    """Finds the most specific location mention in a message in one regex scan"""
+
+    def _scan(self, message):
+        """Matches over the lowercased message; spans line up with the original"""
+        lowered = message.lower()
+        if len(lowered) == len(message):
+            return LOCATION_REGEX.finditer(lowered)
+        return LOCATION_REGEX_IGNORECASE.finditer(message)
+
+    @staticmethod
+    def _candidate(message, match):
+        kind = match.lastgroup
+        start, end = match.span(kind)
+        text = message[start:end].strip()
+        return {'text': text, 'kind': kind, 'start': start, 'end': start + len(text)}
+
+    def extract_all(self, message):
+        """Every location candidate as {'text', 'kind', 'start', 'end'} in message order"""
+        message = message or ''
+        return [self._candidate(message, match) for match in self._scan(message)]
+
+    def extract(self, message):
+        """Best candidate (most specific kind, earliest on ties) plus its cache key, or None"""
+        message = message or ''
+        best, best_rank = None, -1
+        for match in self._scan(message):
+            rank = KIND_RANK[match.lastgroup]
+            if rank > best_rank:
+                best, best_rank = match, rank
+        if best is None:
+            return None
+
+        candidate = self._candidate(message, best)
+        candidate['key'] = normalize_location(candidate['text'])
+        return candidate
+
+
+location_extractor = LocationExtractor()
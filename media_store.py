@@ -0,0 +1,188 @@
+# media_store.py
+import hashlib
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+from http_client import http_client
+
+DEFAULT_MEDIA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media')
+
+# Downloads stream in chunks and stop at the size cap or the overall deadline
+CHUNK_SIZE = 64 * 1024
+MAX_MEDIA_BYTES = int(float(os.environ.get('MAX_MEDIA_MB', 10)) * 1024 * 1024)
+DOWNLOAD_DEADLINE_SECONDS = float(os.environ.get('MEDIA_DOWNLOAD_DEADLINE', 9))
+
+HASH_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# Leading bytes of the formats MMS/WhatsApp photos arrive in
+MAGIC_NUMBERS = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+
+def media_url(report, size=None):
+    """Where pages load a report's image: the stored copy (or its thumbnail
+    at `size` pixels), else the original URL"""
+    if report.get('image_hash'):
+        if size:
+            return f"/media/{report['image_hash']}/thumb/{size}"
+        return f"/media/{report['image_hash']}"
+    return report.get('image_url')
+
+
+class MediaTooLarge(Exception):
+    """A download went over the size cap"""
+
+
+def sniff_content_type(head):
+    """Content type from a file's first bytes"""
+    for magic, content_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return content_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head[4:12] in (b'ftypheic', b'ftypheix', b'ftypmif1'):
+        return 'image/heic'
+    return 'application/octet-stream'
+
+
+class MediaStore:
+    """Content-addressed media files on local disk.
+
+    Each file is stored once under the SHA-256 of its bytes, sharded into
+    two directory levels (ab/cd/abcd...), so forwards of the same photo
+    share one file and a file's name is also its ETag. Downloads stream
+    to a temporary file while hashing and are moved into place atomically.
+    """
+
+    def __init__(self, root=None, max_bytes=MAX_MEDIA_BYTES, deadline=DOWNLOAD_DEADLINE_SECONDS):
+        self.root = root or os.environ.get('CIVICBOT_MEDIA_DIR', DEFAULT_MEDIA_DIR)
+        self.max_bytes = max_bytes
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self._stats = {'downloads': 0, 'stored': 0, 'already_stored': 0, 'rejected': 0, 'bytes': 0}
+
+    def path(self, digest):
+        if not HASH_PATTERN.match(digest or ''):
+            raise ValueError(f"Not a media hash: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        try:
+            return os.path.exists(self.path(digest))
+        except ValueError:
+            return False
+
+    def content_type(self, digest):
+        with open(self.path(digest), 'rb') as f:
+            return sniff_content_type(f.read(16))
+
+    def read(self, digest):
+        with open(self.path(digest), 'rb') as f:
+            return f.read()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _commit(self, temp_path, digest, size):
+        """Move a fully written temp file to its content address"""
+        final_path = self.path(digest)
+        if os.path.exists(final_path):
+            os.remove(temp_path)
+            self._count('already_stored')
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(temp_path, final_path)
+            self._count('stored')
+            self._count('bytes', size)
+        return digest
+
+    def _write_chunks(self, chunks, started=None):
+        """Hash and write chunks to a temp file, enforcing the size cap and deadline"""
+        digest = hashlib.sha256()
+        size = 0
+        temp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise MediaTooLarge(f"Media exceeds {self.max_bytes} bytes")
+                    if started is not None and time.monotonic() - started > self.deadline:
+                        raise TimeoutError(f"Media download took over {self.deadline}s")
+                    digest.update(chunk)
+                    f.write(chunk)
+            # A body cut short by the deadline watchdog can end like a complete one
+            if started is not None and time.monotonic() - started > self.deadline:
+                raise TimeoutError(f"Media download took over {self.deadline}s")
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return self._commit(temp_path, digest.hexdigest(), size)
+
+    def put_bytes(self, content):
+        """Store bytes already in memory, returning their hash"""
+        return self._write_chunks([content[i:i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE)])
+
+    def download(self, url, auth=None):
+        """Stream a URL into the store, returning its hash.
+
+        Raises MediaTooLarge or TimeoutError when the cap or deadline is hit,
+        and requests exceptions for transport errors.
+        """
+        self._count('downloads')
+        started = time.monotonic()
+        policy = http_client.policy('twilio_media')
+        response = http_client.get('twilio_media', url, auth=auth, stream=True,
+                                   timeout=(policy['connect_timeout'], min(policy['read_timeout'], self.deadline)))
+        # The read timeout bounds each socket read, not the body, so a slow
+        # drip could outlast it; at the deadline the socket is shut instead
+        watchdog = threading.Timer(max(0, self.deadline - (time.monotonic() - started)), self._abort, (response,))
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            if response.status_code != 200:
+                print(f"❌ Media download failed: {response.status_code}")
+                return None
+            declared = int(response.headers.get('Content-Length') or 0)
+            if declared > self.max_bytes:
+                raise MediaTooLarge(f"Media declares {declared} bytes, over the {self.max_bytes} byte cap")
+            return self._write_chunks(response.iter_content(CHUNK_SIZE), started)
+        except (MediaTooLarge, TimeoutError):
+            self._count('rejected')
+            raise
+        except Exception as e:
+            if time.monotonic() - started <= self.deadline:
+                raise
+            self._count('rejected')
+            raise TimeoutError(f"Media download took over {self.deadline}s") from e
+        finally:
+            watchdog.cancel()
+            response.close()
+
+    @staticmethod
+    def _abort(response):
+        """Wake a read blocked on the response's socket"""
+        try:
+            # Shutting a duplicate descriptor down ends the shared connection
+            with socket.socket(fileno=os.dup(response.raw.fileno())) as sock:
+                sock.shutdown(socket.SHUT_RDWR)
+        except (OSError, ValueError):
+            pass
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, root=self.root, max_bytes=self.max_bytes)
+
+
+# Global instance
+media_store = MediaStore()
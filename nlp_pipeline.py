@@ -0,0 +1,97 @@
+# nlp_pipeline.py
+import threading
+import time
+
+
+class StageTimer:
+    """Running latency totals for one pipeline stage"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ms):
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self.last_ms = elapsed_ms
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'count': self.count,
+                'avg_ms': round(self.total_ms / self.count, 4) if self.count else 0,
+                'max_ms': round(self.max_ms, 4),
+                'last_ms': round(self.last_ms, 4),
+                'total_ms': round(self.total_ms, 2)
+            }
+
+
+class NLPPipeline:
+    """Ordered, swappable message-analysis stages with per-stage timings.
+
+    Each stage is a callable taking the shared context dict and updating
+    it in place. Stages run in registration order; any of them can be
+    replaced, removed or have new stages inserted around it.
+    """
+
+    def __init__(self, name='nlp'):
+        self.name = name
+        self._stages = []  # [(name, fn)]
+        self._timers = {'total': StageTimer()}
+
+    @property
+    def stage_names(self):
+        return [name for name, _ in self._stages]
+
+    def _index(self, name):
+        for i, (stage_name, _) in enumerate(self._stages):
+            if stage_name == name:
+                return i
+        raise KeyError(f"No pipeline stage named '{name}'")
+
+    def register(self, name, fn, before=None, after=None):
+        """Add a stage at the end, or before/after an existing stage"""
+        if name in self.stage_names:
+            raise ValueError(f"Pipeline stage '{name}' already registered")
+        if before:
+            position = self._index(before)
+        elif after:
+            position = self._index(after) + 1
+        else:
+            position = len(self._stages)
+        self._stages.insert(position, (name, fn))
+        self._timers[name] = StageTimer()
+        return self
+
+    def replace(self, name, fn):
+        """Swap the implementation of an existing stage, resetting its timings"""
+        self._stages[self._index(name)] = (name, fn)
+        self._timers[name] = StageTimer()
+        return self
+
+    def remove(self, name):
+        del self._stages[self._index(name)]
+        self._timers.pop(name, None)
+        return self
+
+    def run(self, message, **extra):
+        """Run every stage over a message and return the resulting context"""
+        context = dict(extra, message=message)
+        start = time.perf_counter()
+        for name, fn in self._stages:
+            stage_start = time.perf_counter()
+            fn(context)
+            self._timers[name].record((time.perf_counter() - stage_start) * 1000)
+        self._timers['total'].record((time.perf_counter() - start) * 1000)
+        return context
+
+    def timings(self):
+        """Per-stage latency stats, in stage order, plus the end-to-end total"""
+        stats = {name: self._timers[name].snapshot() for name in self.stage_names}
+        stats['total'] = self._timers['total'].snapshot()
+        return stats
@@ -0,0 +1,111 @@
+# page_renderer.py
+import os
+import re
+import threading
+import time
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# Stand-in for a slot while a layout's chrome is rendered; never valid in HTML
+SLOT_MARKER = '\x00slot:{}\x00'
+SLOT_PATTERN = re.compile('\x00slot:(\\w+)\x00')
+
+
+class PageRenderer:
+    """Jinja templates compiled once, with each layout's static chrome cached.
+
+    A page is a layout plus named slots. The layout is rendered a single
+    time with a marker in every slot and kept as a list of literal chunks,
+    so a request only renders its dynamic fragments and joins strings.
+    Every render is timed per template.
+    """
+
+    def __init__(self, templates_dir=None, auto_reload=None):
+        self.templates_dir = templates_dir or TEMPLATES_DIR
+        if auto_reload is None:
+            auto_reload = os.environ.get('TEMPLATES_AUTO_RELOAD', '').lower() in ('1', 'true', 'yes')
+        self.env = Environment(
+            loader=FileSystemLoader(self.templates_dir),
+            autoescape=select_autoescape(['html']),
+            auto_reload=auto_reload,
+            cache_size=-1,
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+        self._chrome = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def precompile(self):
+        """Compile every template up front so no request pays for it"""
+        start = time.perf_counter()
+        names = self.env.list_templates(extensions=['html'])
+        for name in names:
+            self.env.get_template(name)
+        print(f"🧩 Compiled {len(names)} templates in {(time.perf_counter() - start) * 1000:.0f}ms")
+        return names
+
+    def render(self, name, **context):
+        """Render one template, timing it"""
+        start = time.perf_counter()
+        html = self.env.get_template(name).render(**context)
+        self._record(name, time.perf_counter() - start)
+        return html
+
+    def chrome(self, layout):
+        """A layout's literal chunks and slot names, rendered on first use"""
+        chunks = self._chrome.get(layout)
+        if chunks is None or self.env.auto_reload:
+            html = self.render(layout, slot=_SlotNames())
+            chunks = SLOT_PATTERN.split(html)
+            with self._lock:
+                self._chrome[layout] = chunks
+        return chunks
+
+    def page(self, layout, **slots):
+        """The layout's cached chrome with each slot filled by an already rendered fragment"""
+        start = time.perf_counter()
+        chunks = self.chrome(layout)
+        # Even indices are literal chrome, odd ones slot names
+        parts = [chunk if i % 2 == 0 else slots.get(chunk, '') for i, chunk in enumerate(chunks)]
+        html = ''.join(parts)
+        self._record(f'page:{layout}', time.perf_counter() - start)
+        return html
+
+    def _record(self, name, seconds):
+        with self._lock:
+            entry = self._stats.setdefault(name, {'renders': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['renders'] += 1
+            entry['total_ms'] += seconds * 1000
+            entry['max_ms'] = max(entry['max_ms'], seconds * 1000)
+
+    def stats(self):
+        """Render counts and times per template, plus cached layouts"""
+        with self._lock:
+            return {
+                'auto_reload': self.env.auto_reload,
+                'cached_layouts': sorted(self._chrome),
+                'templates': {
+                    name: {
+                        'renders': entry['renders'],
+                        'avg_ms': round(entry['total_ms'] / entry['renders'], 3),
+                        'max_ms': round(entry['max_ms'], 3)
+                    }
+                    for name, entry in sorted(self._stats.items())
+                }
+            }
+
+
+class _SlotNames:
+    """`{{ slot.rows }}` in a layout renders as the marker for slot 'rows'"""
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return Markup(SLOT_MARKER.format(name))
+
+
+# Global instance
+page_renderer = PageRenderer()
@@ -0,0 +1,171 @@
+# photo_index.py
+import os
+import threading
+import time
+from functools import lru_cache
+from itertools import combinations
+import geohash
+from database_manager import db_manager
+
+# 64-bit hashes are indexed as four 16-bit substrings
+CHUNKS = 4
+CHUNK_BITS = 16
+
+# Looser threshold for the admin "similar photos" view than for auto-linking
+SIMILAR_DISTANCE = int(os.environ.get('PHOTO_SIMILAR_DISTANCE', 12))
+
+
+def usable_phash(report_data):
+    """The perceptual hash of a report's photo, if local analysis judged it usable.
+
+    Dark, blank or blurred photos hash to nearly the same bits, so they
+    are never matched on looks alone.
+    """
+    image = (report_data.get('analysis') or {}).get('image') or {}
+    return image.get('phash') if image.get('usable') else None
+
+
+@lru_cache(maxsize=None)
+def _chunk_masks(bits):
+    """Every CHUNK_BITS-wide mask with at most `bits` bits set"""
+    return tuple(
+        sum(1 << bit for bit in flipped)
+        for count in range(bits + 1)
+        for flipped in combinations(range(CHUNK_BITS), count)
+    )
+
+
+class MultiIndexHash:
+    """Multi-index hashing of 64-bit hashes for Hamming-radius search.
+
+    Each hash is split into CHUNKS substrings with a table apiece. Two
+    hashes within r bits differ by at most r // CHUNKS bits in at least
+    one substring (pigeonhole), so a query probes each table with every
+    substring that close and only verifies the few items it finds.
+    """
+
+    def __init__(self):
+        self._tables = [{} for _ in range(CHUNKS)]
+        self._values = {}  # item -> hash
+
+    def __len__(self):
+        return len(self._values)
+
+    def _chunks(self, value):
+        mask = (1 << CHUNK_BITS) - 1
+        return [(value >> (i * CHUNK_BITS)) & mask for i in range(CHUNKS)]
+
+    def add(self, value, item):
+        self.remove(item)
+        self._values[item] = value
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            table.setdefault(chunk, set()).add(item)
+
+    def remove(self, item):
+        value = self._values.pop(item, None)
+        if value is None:
+            return
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            bucket = table[chunk]
+            bucket.discard(item)
+            if not bucket:
+                del table[chunk]
+
+    def search(self, value, radius):
+        """[(distance, item)] for every item within radius of value"""
+        masks = _chunk_masks(min(radius // CHUNKS, CHUNK_BITS))
+        values = self._values
+        seen = set()
+        found = []
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            for mask in masks:
+                bucket = table.get(chunk ^ mask)
+                if not bucket:
+                    continue
+                for item in bucket:
+                    if item in seen:
+                        continue
+                    seen.add(item)
+                    distance = (values[item] ^ value).bit_count()
+                    if distance <= radius:
+                        found.append((distance, item))
+        return found
+
+
+class PhotoIndex:
+    """In-memory pHash index of open reports' photos for near-duplicate lookups"""
+
+    def __init__(self, db=None, max_distance=None, radius_m=None):
+        self.db = db or db_manager
+        self.max_distance = max_distance or int(os.environ.get('PHOTO_DUPLICATE_DISTANCE', 6))
+        # Photos this alike but further apart than this are different places
+        self.radius_m = radius_m or float(os.environ.get('PHOTO_DUPLICATE_RADIUS_METERS', 500))
+        self._hashes = MultiIndexHash()
+        self._locations = {}  # report_id -> (lat, lng)
+        self._lock = threading.Lock()
+        self._warmed = False
+        self._stats = {'lookups': 0, 'total_us': 0.0, 'max_us': 0.0}
+
+    def warm(self):
+        """Load open reports' usable photos into the index"""
+        count = 0
+        for report in self.db.get_open_photo_reports():
+            self.add(report['id'], report['image_phash'], report['latitude'], report['longitude'])
+            count += 1
+        self._warmed = True
+        print(f"🖼️ Photo index holds {count} open reports")
+
+    def add(self, report_id, phash, lat=None, lng=None):
+        if not phash:
+            return
+        with self._lock:
+            self._hashes.add(int(phash, 16), report_id)
+            self._locations[report_id] = (lat, lng)
+
+    def discard(self, report_id):
+        """Remove a report that is no longer open"""
+        with self._lock:
+            self._hashes.remove(report_id)
+            self._locations.pop(report_id, None)
+
+    def similar(self, phash, max_distance=None):
+        """[(distance, report_id)] of indexed photos within max_distance bits, closest first"""
+        if not phash:
+            return []
+        if not self._warmed:
+            self.warm()
+
+        start = time.perf_counter()
+        value = int(phash, 16)
+        radius = self.max_distance if max_distance is None else max_distance
+        with self._lock:
+            matches = sorted(self._hashes.search(value, radius))
+
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        with self._lock:
+            self._stats['lookups'] += 1
+            self._stats['total_us'] += elapsed_us
+            self._stats['max_us'] = max(self._stats['max_us'], elapsed_us)
+        return matches
+
+    def find_duplicates(self, phash, lat=None, lng=None):
+        """Report IDs whose photo looks like this one and is not clearly somewhere else"""
+        candidates = []
+        for distance, report_id in self.similar(phash):
+            r_lat, r_lng = self._locations.get(report_id, (None, None))
+            if None not in (lat, lng, r_lat, r_lng) and geohash.haversine_m(lat, lng, r_lat, r_lng) > self.radius_m:
+                continue
+            candidates.append(report_id)
+        return candidates
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['lookups']
+            return {
+                'max_distance': self.max_distance,
+                'radius_m': self.radius_m,
+                'indexed_photos': len(self._hashes),
+                'lookups': lookups,
+                'avg_lookup_us': round(self._stats['total_us'] / lookups, 1) if lookups else 0,
+                'max_lookup_us': round(self._stats['max_us'], 1)
+            }
@@ -0,0 +1,124 @@
+# reclassify.py
+import argparse
+import json
+import sqlite3
+import time
+from multiprocessing import Pool
+from intelligent_nlp import IntelligentCivicNLP, DEPARTMENT_MAP, resolve_issue_type
+# Reports with placeholder descriptions have no text to re-classify, so
+# they only get their version stamped
+from text_classifier import PLACEHOLDER_DESCRIPTIONS
+
+_worker_engine = None
+
+
+def _init_worker():
+    """Build one NLP engine per worker process"""
+    global _worker_engine
+    _worker_engine = IntelligentCivicNLP()
+
+
+def _classify_chunk(rows):
+    """Classify a chunk of (id, description, issue_type, department, vision JSON) rows in a worker.
+
+    A stored vision result goes through the same resolution as on the
+    webhook, so a photo's more confident label is not lost to the text.
+    """
+    engine = _worker_engine or IntelligentCivicNLP()
+    texts = [row[1] for row in rows]
+    results = engine.classify_many(texts)
+
+    updates = []
+    for (report_id, description, issue_type, department, vision), analysis in zip(rows, results):
+        if (description or '') in PLACEHOLDER_DESCRIPTIONS:
+            updates.append((issue_type, department, report_id, None))
+            continue
+        resolved = resolve_issue_type(analysis, json.loads(vision) if vision else None)
+        if resolved != analysis['primary_issue']:
+            department = DEPARTMENT_MAP.get(resolved, 'public_works')
+        else:
+            department = analysis['department']
+        updates.append((resolved, department, report_id, json.dumps(analysis)))
+    return rows, updates
+
+
+def stream_stale_reports(db_path, version, chunk_size):
+    """Yield chunks of reports not yet classified under `version`, in id order.
+
+    Uses keyset pagination (id > last seen) so each chunk is an index range
+    scan, and the connection is opened lazily in whichever thread iterates.
+    Reports an admin has corrected are never overwritten.
+    """
+    conn = sqlite3.connect(db_path)
+    last_id = 0
+    try:
+        while True:
+            rows = conn.execute('''
+                SELECT id, description, issue_type, department, json_extract(analysis, '$.vision') FROM reports
+                WHERE id > ? AND (pattern_version IS NULL OR pattern_version != ?)
+                  AND COALESCE(issue_type_corrected, 0) = 0
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, version, chunk_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            yield rows
+    finally:
+        conn.close()
+
+
+def reclassify(db_path='civicbot.db', chunk_size=1000, processes=None, dry_run=False):
+    """Re-run classification over historical reports with stale pattern versions"""
+    version = IntelligentCivicNLP().version
+    print(f"🔄 Re-classifying reports in {db_path} under pattern version {version}...")
+
+    start = time.perf_counter()
+    stats = {'version': version, 'processed': 0, 'changed': 0}
+    chunks = stream_stale_reports(db_path, version, chunk_size)
+
+    conn = sqlite3.connect(db_path)
+    pool = Pool(processes, initializer=_init_worker) if processes != 1 else None
+    try:
+        results = pool.imap(_classify_chunk, chunks) if pool else map(_classify_chunk, chunks)
+        for rows, updates in results:
+            changed = [
+                update for row, update in zip(rows, updates)
+                if (row[2], row[3]) != (update[0], update[1])
+            ]
+            stats['processed'] += len(rows)
+            stats['changed'] += len(changed)
+
+            if not dry_run:
+                # The fresh NLP result replaces the stored one; vision results are kept
+                conn.executemany(
+                    '''UPDATE reports SET issue_type = ?1, department = ?2, pattern_version = ?3,
+                           analysis = CASE WHEN ?4 IS NULL THEN analysis
+                                      ELSE json_set(COALESCE(analysis, '{}'), '$.nlp', json(?4)) END
+                       WHERE id = ?5''',
+                    [(issue_type, department, version, nlp, report_id) for issue_type, department, report_id, nlp in updates]
+                )
+                conn.commit()
+
+            print(f"  ...{stats['processed']} processed, {stats['changed']} changed")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+        conn.close()
+
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    stats['reports_per_second'] = round(stats['processed'] / stats['seconds']) if stats['seconds'] else 0
+    print(f"✅ Re-classified {stats['processed']} reports ({stats['changed']} changed) in {stats['seconds']}s")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-classify historical reports after pattern changes")
+    parser.add_argument('--db', default='civicbot.db', help="SQLite database path")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Reports per batch")
+    parser.add_argument('--processes', type=int, default=None, help="Worker processes (default: CPU count, 1 = no pool)")
+    parser.add_argument('--dry-run', action='store_true', help="Count changes without writing them")
+    args = parser.parse_args()
+
+    reclassify(args.db, chunk_size=args.chunk_size, processes=args.processes, dry_run=args.dry_run)
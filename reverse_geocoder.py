@@ -0,0 +1,97 @@
+# reverse_geocoder.py
+import csv
+import math
+import os
+import threading
+from geohash import haversine_m
+
+DEFAULT_PLACES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'places.csv')
+
+
+class ReverseGeocoder:
+    """Offline nearest-place lookup over a packaged CSV of named places.
+
+    Places are bucketed into a fixed lat/lng grid so a lookup only scans
+    the cells around the query point instead of the whole dataset.
+    """
+
+    def __init__(self, places_file=None, cell_size_deg=0.01, max_distance_m=2000):
+        self.places_file = places_file or os.environ.get('CIVICBOT_PLACES_FILE', DEFAULT_PLACES_FILE)
+        self.cell_size_deg = cell_size_deg
+        self.max_distance_m = max_distance_m
+        self._grid = None
+        self._lock = threading.Lock()
+
+    def _cell(self, lat, lng):
+        return (int(math.floor(lat / self.cell_size_deg)), int(math.floor(lng / self.cell_size_deg)))
+
+    def _load(self):
+        """Load the places file into the grid index (once, on first lookup)"""
+        with self._lock:
+            if self._grid is not None:
+                return
+
+            grid = {}
+            count = 0
+            try:
+                with open(self.places_file, newline='', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        try:
+                            lat = float(row['latitude'])
+                            lng = float(row['longitude'])
+                        except (KeyError, TypeError, ValueError):
+                            continue
+                        place = (row['name'], row.get('kind') or 'place', lat, lng)
+                        grid.setdefault(self._cell(lat, lng), []).append(place)
+                        count += 1
+                print(f"🗺️ Loaded {count} places for offline reverse geocoding")
+            except OSError as e:
+                print(f"⚠️ Could not load places file {self.places_file}: {e}")
+
+            self._grid = grid
+
+    def nearest(self, lat, lng):
+        """Return the nearest named place as a dict, or None if nothing is close enough"""
+        if lat is None or lng is None:
+            return None
+        if self._grid is None:
+            self._load()
+        if not self._grid:
+            return None
+
+        center_lat, center_lng = self._cell(lat, lng)
+        # Longitude cells shrink towards the poles, so widen the ring accordingly
+        cell_m = self.cell_size_deg * 111320 * max(math.cos(math.radians(lat)), 0.01)
+        max_ring = int(self.max_distance_m // cell_m) + 1
+
+        best = None
+        best_distance = self.max_distance_m
+        for ring in range(max_ring + 1):
+            # Anything in this ring is at least (ring - 1) cells away
+            if best is not None and (ring - 1) * cell_m > best_distance:
+                break
+            for d_lat in range(-ring, ring + 1):
+                for d_lng in range(-ring, ring + 1):
+                    if max(abs(d_lat), abs(d_lng)) != ring:
+                        continue
+                    for name, kind, p_lat, p_lng in self._grid.get((center_lat + d_lat, center_lng + d_lng), ()):
+                        distance = haversine_m(lat, lng, p_lat, p_lng)
+                        if distance <= best_distance:
+                            best = {'name': name, 'kind': kind, 'latitude': p_lat, 'longitude': p_lng}
+                            best_distance = distance
+
+        if best is not None:
+            best['distance_m'] = round(best_distance, 1)
+        return best
+
+    def describe(self, lat, lng):
+        """Human-readable location text for a coordinate pair"""
+        place = self.nearest(lat, lng)
+        if place is None:
+            return f"{lat:.5f}, {lng:.5f}"
+        if place['distance_m'] < 50:
+            return place['name']
+        return f"Near {place['name']}"
+
+# Global instance
+reverse_geocoder = ReverseGeocoder()
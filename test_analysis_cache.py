@@ -0,0 +1,39 @@
+# test_analysis_cache.py
+from analysis_cache import AnalysisCache
+from intelligent_nlp import IntelligentCivicNLP
+
+
+def test_analysis_cache():
+    print("🧪 Testing memoized NLP analysis...")
+
+    cache = AnalysisCache(max_size=2)
+    cache.put('v1', 'a', {'n': 1})
+    cache.put('v1', 'b', {'n': 2})
+    assert cache.get('v1', 'a') == {'n': 1}
+    cache.put('v1', 'c', {'n': 3})  # evicts 'b', the least recently used
+    assert cache.get('v1', 'b') is None
+    assert cache.stats()['evictions'] == 1
+    assert cache.get('v2', 'a') is None  # a new version empties the cache
+    assert cache.stats()['size'] == 0 and cache.stats()['invalidations'] == 1
+    print("✅ LRU eviction and version invalidation work")
+
+    nlp = IntelligentCivicNLP(cache=AnalysisCache(max_size=100))
+    first = nlp.analyze_message("Huge pothole on Main Street")
+    first['all_issues'].append('tampered')
+    again = nlp.analyze_message("  huge POTHOLE on main street ")
+    assert again['primary_issue'] == 'pothole' and again['all_issues'] == ['pothole']
+    assert nlp.pipeline.timings()['total']['count'] == 1
+    print("✅ Repeated text is answered from the cache without rerunning the pipeline")
+
+    batch = nlp.classify_many(["trash everywhere", "Trash everywhere", "huge pothole on main street"])
+    assert [r['primary_issue'] for r in batch] == ['garbage', 'garbage', 'pothole']
+    assert nlp.pipeline.timings()['total']['count'] == 2
+    stats = nlp.cache.stats()
+    # The in-batch repeat is deduplicated rather than served from the cache
+    assert stats['hits'] == 2 and stats['misses'] == 3
+    print(f"✅ Batches share the cache (hit rate {stats['hit_rate']:.0%})")
+
+    print("🎉 All analysis cache tests passed!")
+
+if __name__ == "__main__":
+    test_analysis_cache()
@@ -0,0 +1,81 @@
+# test_change_hub.py
+import json
+import os
+import tempfile
+import threading
+from change_hub import ChangeHub, StreamFull
+from database_manager import DatabaseManager
+
+
+def events(text):
+    """(id, event, data) for each event frame in a chunk of SSE text"""
+    parsed = []
+    for frame in text.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in frame.split('\n') if not line.startswith(':'))
+        if 'event' in fields:
+            parsed.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return parsed
+
+
+def test_change_hub():
+    print("🧪 Testing the live report change hub...")
+
+    hub = ChangeHub(history=3, heartbeat=0.05, max_clients=2)
+    live = hub.stream()
+    assert next(live) == 'retry: 5000\n\n'
+
+    hub.publish('report', {'id': 1})
+    hub.publish('report', {'id': 2})
+    assert events(next(live)) == [(1, 'report', {'id': 1}), (2, 'report', {'id': 2})]
+    assert next(live) == ': keepalive\n\n'
+    print("✅ Streams get published events in order, and only keepalives while idle")
+
+    for report_id in (3, 4, 5):
+        hub.publish('report', {'id': report_id})
+    resumed = hub.stream(last_event_id=3)
+    next(resumed)
+    assert [event[0] for event in events(next(resumed))] == [4, 5]
+    print("✅ A reconnecting client replays only what it missed")
+
+    live.close()
+    stale = hub.stream(last_event_id=1)
+    next(stale)
+    assert events(next(stale)) == [(5, 'reset', {})]
+    try:
+        next(hub.stream())
+        assert False, "a third stream should be refused"
+    except StreamFull:
+        pass
+    resumed.close()
+    stale.close()
+    print("✅ Clients too far behind get a reset, and the client limit holds")
+
+    waiting = hub.stream()
+    next(waiting)
+    received = []
+    reader = threading.Thread(target=lambda: received.append(next(waiting)))
+    hub.heartbeat = 5
+    reader.start()
+    hub.publish('report', {'id': 6})
+    reader.join(1)
+    assert events(received[0]) == [(6, 'report', {'id': 6})]
+    print("✅ A waiting stream wakes as soon as something is published")
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'hub.db')
+    db = DatabaseManager(db_path)
+    hub = ChangeHub()
+    hub.watch(db)
+    stream = hub.stream()
+    next(stream)
+    report_id = db.create_report({'phone': '+15550001', 'issue_type': 'pothole', 'description': 'Deep hole',
+                                  'location': 'Main St', 'latitude': 40.71, 'longitude': -74.0})
+    db.update_report(report_id, {'status': 'resolved'})
+    (_, _, created), (_, _, updated) = events(next(stream))
+    assert created['action'] == 'created' and created['feature']['geometry']['coordinates'] == [-74.0, 40.71]
+    assert updated['action'] == 'updated' and updated['feature']['properties']['status'] == 'resolved'
+    print("✅ Report writes are published as GeoJSON features")
+
+    print("🎉 All change hub tests passed!")
+
+if __name__ == "__main__":
+    test_change_hub()
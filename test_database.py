@@ -1,5 +1,7 @@
 # test_database.py
-from database_manager import db_manager
+import os
+import tempfile
+from database_manager import DatabaseManager, db_manager
 
 def test_database():
     print("🧪 Testing database functionality...")
@@ -29,6 +31,48 @@ def test_database():
     reports_data = db_manager.get_reports(per_page=10)
     print(f"✅ Got {len(reports_data['reports'])} reports")
     
+    # Test stored analysis and the generated columns over it
+    unsure_id = db_manager.create_report({
+        'phone': '+1234567890',
+        'issue_type': 'other',
+        'description': 'Something odd near the park',
+        'analysis': {'nlp': {'confidence': 0.01, 'urgency': 'high', 'all_issues': ['other']}, 'vision': None}
+    })
+    unsure = db_manager.get_report(unsure_id)
+    assert unsure['confidence'] == 0.01 and unsure['urgency'] == 'high'
+    triage = db_manager.get_triage_reports(max_confidence=0.02, urgency='high')
+    assert unsure_id in [r['id'] for r in triage]
+    db_manager.update_report(unsure_id, {'issue_type': 'graffiti', 'issue_type_corrected': 1})
+    assert unsure_id not in [r['id'] for r in db_manager.get_triage_reports(max_confidence=0.02)]
+    print(f"✅ Low-confidence report #{unsure_id} found through the indexed analysis columns")
+    
+    # Keyset pages over a fresh database, with projection and facets
+    pages_db = DatabaseManager(db_path=os.path.join(tempfile.mkdtemp(), 'pages_test.db'))
+    ids = [pages_db.create_report(dict(test_report, issue_type=issue_type)) for issue_type in
+           ['pothole', 'garbage', 'pothole', 'graffiti', 'pothole', 'garbage', 'pothole']]
+    pages_db.update_report(ids[0], {'status': 'resolved'})
+    
+    seen, cursor = [], None
+    while True:
+        page = pages_db.get_reports_page(columns=['location'], cursor=cursor, limit=3)
+        assert page['columns'] == ['id', 'created_at', 'location'] and page['facets'] == {}
+        seen += [row[0] for row in page['rows']]
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    assert seen == sorted(ids, reverse=True)
+    
+    first = pages_db.get_reports_page({'issue_type': 'pothole'}, limit=2, facets=('status', 'issue_type'))
+    assert len(first['rows']) == 2 and first['next_cursor']
+    assert first['facets']['status'] == {'received': 3, 'resolved': 1}
+    assert first['facets']['issue_type'] == {'pothole': 4, 'garbage': 2, 'graffiti': 1}
+    try:
+        pages_db.get_reports_page(cursor='not-a-cursor')
+        assert False, "a bad cursor should be rejected"
+    except ValueError:
+        pass
+    print(f"✅ Cursor pages walk all {len(ids)} reports once, with facet counts per filter")
+    
     print("🎉 All database tests passed!")
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+# test_duplicate_detector.py
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from database_manager import DatabaseManager
+from duplicate_detector import DuplicateDetector, created_timestamp
+
+
+def report(lat=40.7128, lng=-74.0060, issue_type='pothole', **extra):
+    return dict({'phone': '+1234567890', 'issue_type': issue_type, 'description': 'Deep pothole',
+                 'location': 'Main St', 'latitude': lat, 'longitude': lng}, **extra)
+
+
+def test_duplicate_detector():
+    print("🧪 Testing the spatio-temporal duplicate index...")
+
+    db = DatabaseManager(db_path=os.path.join(tempfile.mkdtemp(), 'duplicates.db'))
+    detector = DuplicateDetector(db=db, radius_m=50, window_hours=72)
+
+    first_id, _ = detector.ingest_report(report())
+    # ~30m north: same problem; ~110m north: a different one
+    _, near = detector.ingest_report(report(lat=40.71307))
+    far_id, far = detector.ingest_report(report(lat=40.7138))
+    assert near == first_id and far is None
+    print("✅ Reports within the radius are linked, ones beyond it are not")
+
+    _, other_type = detector.ingest_report(report(issue_type='graffiti'))
+    _, vague = detector.ingest_report(report(issue_type='other'))
+    assert other_type is None and vague is None
+    print("✅ A different issue type, or a vague one, is never a duplicate")
+
+    now = time.time()
+    assert detector.find_candidates('pothole', 40.7128, -74.0060, now=now + 71 * 3600) == [first_id]
+    assert detector.find_candidates('pothole', 40.7128, -74.0060, now=now + 73 * 3600) == []
+    print("✅ Only reports inside the time window are candidates")
+
+    db.update_report(first_id, {'latitude': 40.7300, 'longitude': -74.0100})
+    assert detector.find_candidates('pothole', 40.7128, -74.0060) == []
+    assert detector.find_candidates('pothole', 40.7300, -74.0100) == [first_id]
+    db.update_report(first_id, {'issue_type': 'water_issue'})
+    assert detector.find_candidates('pothole', 40.7300, -74.0100) == []
+    assert detector.find_candidates('water_issue', 40.7300, -74.0100) == [first_id]
+    db.update_report(first_id, {'status': 'resolved'})
+    assert detector.find_candidates('water_issue', 40.7300, -74.0100) == []
+    detector.discard(far_id)
+    assert detector.find_candidates('pothole', 40.7138, -74.0060) == []
+    print("✅ Edits to coordinates, type and status move or drop index entries")
+
+    # A row written by SQLite's UTC default, two days old, is inside the window;
+    # a local ISO row from four days ago is not
+    old_utc = (datetime.now(timezone.utc) - timedelta(days=2)).strftime('%Y-%m-%d %H:%M:%S')
+    stale_local = (datetime.now() - timedelta(days=4)).isoformat()
+    conn = sqlite3.connect(db.db_path)
+    for created_at, lat in ((old_utc, 40.75), (stale_local, 40.76)):
+        conn.execute("INSERT INTO reports (phone, issue_type, description, location, latitude, longitude, created_at) "
+                     "VALUES ('+1', 'pothole', 'x', 'y', ?, -74.0, ?)", (lat, created_at))
+    conn.commit()
+    conn.close()
+    assert abs(created_timestamp(old_utc) - (time.time() - 2 * 86400)) < 5
+    warm = DuplicateDetector(db=db, radius_m=50, window_hours=72)
+    warm.warm()
+    assert len(warm.find_candidates('pothole', 40.75, -74.0)) == 1
+    assert warm.find_candidates('pothole', 40.76, -74.0) == []
+    print("✅ Warming reads UTC defaults and local timestamps on one clock")
+
+    print("🎉 All duplicate detector tests passed!")
+
+if __name__ == "__main__":
+    test_duplicate_detector()
@@ -0,0 +1,69 @@
+# test_exif_gps.py
+import struct
+from exif_gps import extract_gps
+
+
+def rational_dms(endian, degrees, minutes, seconds_x100):
+    """Three TIFF rationals for degrees/minutes/seconds"""
+    return struct.pack(endian + 'IIIIII', degrees, 1, minutes, 1, seconds_x100, 100)
+
+
+def jpeg_with_gps(lat=None, lng=None, lat_ref=b'N', lng_ref=b'E', endian='<'):
+    """A minimal JPEG whose APP1 Exif block holds only the given GPS tags"""
+    entries = []
+    values = b''
+    # TIFF header (8) + IFD0 with one entry (2 + 12 + 4) puts the GPS IFD at 26
+    gps_offset = 26
+    tags = []
+    if lat_ref is not None:
+        tags.append((1, 2, 2, lat_ref + b'\x00\x00\x00'))
+    if lat is not None:
+        tags.append((2, 5, 3, rational_dms(endian, *lat)))
+    if lng_ref is not None:
+        tags.append((3, 2, 2, lng_ref + b'\x00\x00\x00'))
+    if lng is not None:
+        tags.append((4, 5, 3, rational_dms(endian, *lng)))
+    values_offset = gps_offset + 2 + 12 * len(tags) + 4
+    for tag, field_type, count, value in tags:
+        if len(value) <= 4:
+            inline = value
+        else:
+            inline = struct.pack(endian + 'I', values_offset + len(values))
+            values += value
+        entries.append(struct.pack(endian + 'HHI', tag, field_type, count) + inline)
+
+    marker = b'II' if endian == '<' else b'MM'
+    tiff = (marker + struct.pack(endian + 'HI', 42, 8)
+            + struct.pack(endian + 'H', 1) + struct.pack(endian + 'HHII', 0x8825, 4, 1, gps_offset)
+            + struct.pack(endian + 'I', 0)
+            + struct.pack(endian + 'H', len(tags)) + b''.join(entries) + struct.pack(endian + 'I', 0)
+            + values)
+    segment = b'Exif\x00\x00' + tiff
+    return b'\xff\xd8\xff\xe1' + struct.pack('>H', len(segment) + 2) + segment + b'\xff\xd9'
+
+
+def test_exif_gps():
+    print("🧪 Testing EXIF GPS extraction...")
+
+    # 40° 45' 28.80" N, 73° 59' 7.80" E
+    assert extract_gps(jpeg_with_gps((40, 45, 2880), (73, 59, 780))) == (40.758, 73.9855)
+    assert extract_gps(jpeg_with_gps((40, 45, 2880), (73, 59, 780), endian='>')) == (40.758, 73.9855)
+    print("✅ Degree/minute/second rationals convert in both byte orders")
+
+    assert extract_gps(jpeg_with_gps((33, 52, 0), (151, 12, 0), lat_ref=b'S')) == (-33.866667, 151.2)
+    assert extract_gps(jpeg_with_gps((40, 45, 2880), (73, 59, 780), lng_ref=b'W')) == (40.758, -73.9855)
+    assert extract_gps(jpeg_with_gps((40, 45, 2880), (73, 59, 780), lat_ref=None, lng_ref=None)) == (40.758, 73.9855)
+    print("✅ S and W refs flip the sign; missing refs default to N and E")
+
+    assert extract_gps(jpeg_with_gps((40, 45, 2880), None)) == (None, None)
+    assert extract_gps(jpeg_with_gps((0, 0, 0), (0, 0, 0))) == (None, None)
+    assert extract_gps(b'\xff\xd8\xff\xd9') == (None, None)
+    assert extract_gps(b'\x89PNG\r\n') == (None, None)
+    assert extract_gps(None) == (None, None)
+    assert extract_gps(jpeg_with_gps((40, 45, 2880), (73, 59, 780))[:30]) == (None, None)
+    print("✅ Missing tags, no fix, non-JPEG and truncated data give no coordinates")
+
+    print("🎉 All EXIF GPS tests passed!")
+
+if __name__ == "__main__":
+    test_exif_gps()
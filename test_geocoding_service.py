@@ -0,0 +1,84 @@
+# test_geocoding_service.py
+import time
+from geocoding_service import GeocodingService, GeocodingProvider, ProviderSkipped
+
+
+class SlowProvider(GeocodingProvider):
+    name = 'slow'
+
+    def geocode(self, location_text, timeout):
+        time.sleep(0.5)
+        return (40.0, -73.0)
+
+
+class FastProvider(GeocodingProvider):
+    name = 'fast'
+
+    def geocode(self, location_text, timeout):
+        return (41.0, -74.0)
+
+
+class BrokenProvider(GeocodingProvider):
+    name = 'broken'
+
+    def __init__(self):
+        self.calls = 0
+
+    def geocode(self, location_text, timeout):
+        self.calls += 1
+        raise RuntimeError("service unavailable")
+
+
+class SkippingProvider(GeocodingProvider):
+    name = 'skipping'
+
+    def __init__(self):
+        self.skip = True
+
+    def geocode(self, location_text, timeout):
+        if self.skip:
+            raise ProviderSkipped("rate limited")
+        return (42.0, -75.0)
+
+
+def test_geocoding_chain():
+    print("🧪 Testing geocoder provider chain...")
+
+    # Hedging fires the fallback once the primary runs past its threshold
+    service = GeocodingService([SlowProvider(), FastProvider()], latency_budget=2, hedge=True, default_hedge_delay=0.05)
+    assert service.geocode_location('Main Street') == (41.0, -74.0)
+    print("✅ Hedged lookup returned the fallback's answer")
+
+    # The latency budget caps the whole lookup, and misses are not cached
+    service = GeocodingService([SlowProvider()], latency_budget=0.1, hedge=False)
+    start = time.monotonic()
+    assert service.geocode_location('Main Street') == (None, None)
+    assert time.monotonic() - start < 0.4
+    assert service.cache == {}
+    print("✅ Lookup gave up within its latency budget")
+
+    # Repeated failures open the breaker so the provider is skipped
+    broken = BrokenProvider()
+    service = GeocodingService([broken, FastProvider()], latency_budget=2, hedge=False)
+    for i in range(5):
+        assert service.geocode_location(f'Oak Avenue {i}') == (41.0, -74.0)
+    assert broken.calls == 3
+    assert service.status()['providers']['broken']['state'] == 'open'
+    print("✅ Circuit breaker skipped the failing provider")
+
+    # A half-open probe the provider skips must not leave the breaker stuck
+    skipping = SkippingProvider()
+    service = GeocodingService([skipping, FastProvider()], latency_budget=2, hedge=False)
+    breaker = service.breakers['skipping']
+    breaker.state, breaker.opened_at = 'open', time.monotonic() - breaker.reset_timeout
+    assert service.geocode_location('Pine Road 1') == (41.0, -74.0)
+    assert breaker.state == 'open'
+    skipping.skip = False
+    assert service.geocode_location('Pine Road 2') == (42.0, -75.0)
+    assert breaker.state == 'closed'
+    print("✅ A skipped half-open probe re-opens the breaker for the next probe")
+
+    print("🎉 All geocoding tests passed!")
+
+if __name__ == "__main__":
+    test_geocoding_chain()
@@ -0,0 +1,82 @@
+# test_http_client.py
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from http_client import HTTPClient, PROVIDER_POLICIES
+from media_store import DOWNLOAD_DEADLINE_SECONDS
+from geocoding_service import GeocodingService
+
+# Twilio abandons a webhook that has not answered within this many seconds
+TWILIO_WEBHOOK_TIMEOUT = 15
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    hits = {}
+
+    def do_GET(self):
+        FlakyHandler.hits[self.path] = FlakyHandler.hits.get(self.path, 0) + 1
+        if self.path.startswith('/slow'):
+            time.sleep(0.5)
+        if self.path.startswith('/flaky') and FlakyHandler.hits[self.path] == 1:
+            self.send_response(503)
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        try:
+            self.wfile.write(b'ok')
+        except OSError:  # The client already timed out
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def test_http_client():
+    print("🧪 Testing the shared HTTP client...")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    policies = dict(PROVIDER_POLICIES, default=dict(PROVIDER_POLICIES['default'], backoff=0, read_timeout=0.2),
+                    twilio_media=dict(PROVIDER_POLICIES['twilio_media'], backoff=0))
+    client = HTTPClient(policies=policies)
+
+    try:
+        assert client.get('default', base + '/flaky/1').status_code == 200
+        assert FlakyHandler.hits['/flaky/1'] == 2
+        assert client.get('twilio_media', base + '/flaky/2').status_code == 503
+        assert FlakyHandler.hits['/flaky/2'] == 1
+        print("✅ Retryable statuses are retried, except for media, which only retries connects")
+
+        try:
+            client.get('default', base + '/slow')
+            assert False, "a response slower than the read timeout should fail"
+        except requests.ConnectionError:
+            pass
+        # One retry after the first read timed out, then the error surfaces
+        assert FlakyHandler.hits['/slow'] == 2
+        assert client.histogram('default').errors == 1
+        assert client.histogram('default').count == 2
+        print("✅ The read timeout applies, and failures land in the latency histogram")
+
+        assert client.session('default') is client.session('default')
+        assert client.session('default') is not client.session('twilio_media')
+        print("✅ Each provider keeps one pooled session")
+    finally:
+        server.shutdown()
+        client.close()
+
+    retry = HTTPClient().session('twilio_media').get_adapter('https://').max_retries
+    assert (retry.connect, retry.read, retry.status) == (1, 0, 0)
+    media = PROVIDER_POLICIES['twilio_media']
+    worst_headers = (retry.connect + 1) * media['connect_timeout'] + media['read_timeout']
+    assert worst_headers <= DOWNLOAD_DEADLINE_SECONDS
+    assert DOWNLOAD_DEADLINE_SECONDS + GeocodingService([]).latency_budget < TWILIO_WEBHOOK_TIMEOUT - 1
+    print("✅ A photo's download and geocoding fit inside Twilio's webhook timeout")
+
+    print("🎉 All HTTP client tests passed!")
+
+if __name__ == "__main__":
+    test_http_client()
@@ -0,0 +1,67 @@
+# test_image_analysis.py
+import io
+import numpy as np
+from PIL import Image, ImageFilter
+from image_analysis import LocalImageAnalyzer, analyze_image_bytes
+
+
+def jpeg(image):
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def test_image_analysis():
+    print("🧪 Testing local image analysis...")
+
+    rng = np.random.default_rng(3)
+    # A street-like scene: gradient sky, textured road, a dark blob
+    scene = np.zeros((600, 800, 3), dtype=np.uint8)
+    scene[:250] = np.linspace(150, 230, 250)[:, None, None].astype(np.uint8)
+    scene[250:] = rng.integers(60, 140, (350, 800, 1), dtype=np.uint8)
+    scene[400:480, 300:460] = 25
+    photo = Image.fromarray(scene)
+
+    good = analyze_image_bytes(jpeg(photo))
+    assert good['analysis_source'] == 'local' and good['usable'], good['quality_flags']
+    assert good['dimensions'] == {'width': 800, 'height': 600}
+    assert len(good['phash']) == 16 and good['dominant_colors'][0]['share'] > 0.1
+    print(f"✅ Sharp photo passes (blur {good['metrics']['blur']}, brightness {good['metrics']['brightness']})")
+
+    blurry = analyze_image_bytes(jpeg(photo.filter(ImageFilter.GaussianBlur(8))))
+    assert 'blurry' in blurry['quality_flags'] and not blurry['usable']
+    dark = analyze_image_bytes(jpeg(Image.fromarray((scene // 10).astype(np.uint8))))
+    assert 'too_dark' in dark['quality_flags']
+    small = analyze_image_bytes(jpeg(photo.resize((160, 120))))
+    assert 'too_small' in small['quality_flags']
+    print("✅ Blurry, dark and tiny photos are flagged")
+
+    resized = analyze_image_bytes(jpeg(photo.resize((640, 480)).point(lambda v: min(255, v + 10))))
+    other = analyze_image_bytes(jpeg(Image.fromarray(np.flipud(scene).copy())))
+    assert hamming(good['phash'], resized['phash']) <= 6
+    assert hamming(good['phash'], other['phash']) > 20
+    print("✅ Perceptual hash survives resizing and brightening but not a different scene")
+
+    analyzer = LocalImageAnalyzer(workers=2, time_budget=5)
+    try:
+        results = analyzer.analyze_many([jpeg(photo), b'not an image'])
+        assert results[0]['phash'] == good['phash']
+        assert results[1]['analysis_source'] == 'basic' and 'error' in results[1]
+        assert analyzer.stats()['analyzed'] == 1 and analyzer.stats()['failed'] == 1
+        print("✅ Process pool analyzes in parallel and degrades per image")
+
+        analyzer.time_budget = 1e-6
+        late = analyzer.analyze(jpeg(photo))
+        assert late['error'] == 'Time budget exceeded' and analyzer.stats()['timeouts'] == 1
+        print("✅ Images over the time budget fall back to the size-only result")
+    finally:
+        analyzer.shutdown()
+
+    print("🎉 All image analysis tests passed!")
+
+if __name__ == "__main__":
+    test_image_analysis()
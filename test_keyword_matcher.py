@@ -0,0 +1,44 @@
+# test_keyword_matcher.py
+from keyword_matcher import KeywordMatcher
+from fuzzy_matcher import FuzzyMatcher
+from intelligent_nlp import IntelligentCivicNLP
+
+
+def test_keyword_matcher():
+    print("🧪 Testing keyword automaton...")
+
+    matcher = KeywordMatcher({
+        'water_issue': ['flood', 'flooding', 'water leak', 'leak'],
+        'pothole': ['pothole', 'hole in road'],
+        'street_light': ['light out']
+    })
+
+    hits = matcher.match("Flooding from a water leak, and another leak by the pothole")
+    assert hits['water_issue']['count'] == 5
+    assert hits['water_issue']['keywords'] == ['flood', 'flooding', 'water leak', 'leak']
+    assert hits['pothole']['spans'] == [(52, 59)]
+    assert 'street_light' not in hits
+    print("✅ Overlapping hits, counts and spans found in one pass")
+
+    nlp = IntelligentCivicNLP()
+    assert nlp.analyze_message("Huge POTHOLE on Main Street")['primary_issue'] == 'pothole'
+    assert nlp.analyze_message("trash and a water leak")['all_issues'] == ['water_issue', 'garbage']
+    assert nlp.analyze_message("the bike lanes look great")['primary_issue'] == 'other'
+    print("✅ IntelligentCivicNLP ranks keyword hits by issue weight")
+
+    fuzzy = FuzzyMatcher({'pothole': ['pothole'], 'garbage': ['garbage', 'trash'], 'street_light': ['street light']})
+    hits = fuzzy.match("Pot hole by the garbadge, and the streetlite is out")
+    assert hits['pothole']['spans'] == [(0, 8)]
+    assert hits['garbage']['corrections'] == [{'written': 'garbadge', 'keyword': 'garbage', 'distance': 1}]
+    assert 'street_light' in hits
+    assert fuzzy.match("car crash outside the garage") == {}
+    print("✅ Split, misspelled and informal keywords match; near-miss words don't")
+
+    analysis = nlp.analyze_message("potholle outside my house")
+    assert analysis['primary_issue'] == 'pothole' and analysis['confidence'] < 1.0
+    print("✅ Fuzzy-only issues are found with slightly lower confidence")
+
+    print("🎉 All keyword matcher tests passed!")
+
+if __name__ == "__main__":
+    test_keyword_matcher()
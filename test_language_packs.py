@@ -0,0 +1,45 @@
+# test_language_packs.py
+from language_packs import PackRegistry, fold
+from intelligent_nlp import IntelligentCivicNLP
+
+
+def test_language_packs():
+    print("🧪 Testing language-partitioned pattern packs...")
+
+    packs = PackRegistry()
+    assert packs.available() == ['en', 'es']
+    assert packs.loaded() == []
+    assert packs.detect("hay un bache enorme en la calle principal") == 'es'
+    assert packs.detect("there is a huge pothole on main street") == 'en'
+    assert packs.detect("ok") == 'en'  # too short to tell, so the default
+    assert fold("Semáforo dañado") == 'semaforo danado'
+    print("✅ Trigram detector picks the language, defaulting when unsure")
+
+    nlp = IntelligentCivicNLP(packs=packs)
+    analysis = nlp.analyze_message("Hay una fuga de agua en la calle, es urgente!")
+    assert analysis['language'] == 'es'
+    assert analysis['primary_issue'] == 'water_issue'
+    assert analysis['department'] == 'water_department'
+    assert analysis['urgency'] == 'high'
+    assert nlp.analyze_message("El semaforo esta roto")['primary_issue'] == 'traffic'
+    assert packs.loaded() == ['es']
+    print("✅ Spanish reports classify against the lazily loaded Spanish pack")
+
+    assert nlp.analyze_message("Huge pothole on Main Street")['primary_issue'] == 'pothole'
+    assert nlp.analyze_message("hola")['intent'] == 'greeting'
+    assert packs.loaded() == ['en', 'es']
+    print("✅ English pack loads only once an English message arrives")
+
+    labels = packs.get('en').label_index
+    assert labels.issues_for("Road") == ('pothole',)
+    assert labels.issues_for("Traffic light") == ('vehicle',)
+    assert labels.issues_for("Waste container") == ('garbage',)
+    assert labels.issues_for("Roadway crack") == ('pothole',)
+    assert labels.issues_for("Sky") == ()
+    assert packs.get('en').label_index is labels
+    print("✅ Vision labels resolve through the pack's compiled label index")
+
+    print("🎉 All language pack tests passed!")
+
+if __name__ == "__main__":
+    test_language_packs()
@@ -0,0 +1,37 @@
+# test_location_extractor.py
+from location_extractor import location_extractor, normalize_location
+from intelligent_nlp import IntelligentCivicNLP
+
+
+def test_location_extractor():
+    print("🧪 Testing single-pass location extractor...")
+
+    cases = [
+        ("Pothole at 123 W 45th St. please fix", '123 W 45th St.', 'street_address'),
+        ("Street light out at the corner of Oak and Maple, very dark", 'Oak and Maple', 'intersection'),
+        ("Huge pothole on Main Street near the school", 'Main Street', 'street'),
+        ("Graffiti all over the wall near Central Park", 'Central Park', 'landmark'),
+        ("Overflowing bins in the Elm neighborhood", 'Elm neighborhood', 'area'),
+        ("location: behind the deli, by the fence", 'behind the deli', 'place'),
+    ]
+    for message, text, kind in cases:
+        found = location_extractor.extract(message)
+        assert (found['text'], found['kind']) == (text, kind), (message, found)
+        assert message[found['start']:found['end']] == text
+    assert location_extractor.extract("please look at this") is None
+    assert location_extractor.extract("the street light is out") is None
+    print("✅ Best span and kind found for each location style")
+
+    assert normalize_location("Oak St & Maple Ave") == normalize_location("maple avenue and oak street")
+    assert normalize_location("123 W. 45th St") == '123 west 45th street'
+    print("✅ Spelling variants share a geocode cache key")
+
+    analysis = IntelligentCivicNLP().analyze_message("Water leak at 55 Water St, please hurry")
+    assert analysis['location'] == '55 Water St'
+    assert analysis['location_kind'] == 'street_address'
+    print("✅ NLP pipeline uses the extractor for its location stage")
+
+    print("🎉 All location extractor tests passed!")
+
+if __name__ == "__main__":
+    test_location_extractor()
@@ -0,0 +1,104 @@
+# test_media_store.py
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from media_store import MediaStore, MediaTooLarge, media_url
+
+PHOTO = b'\xff\xd8\xff\xe0' + bytes(range(256)) * 800  # ~200KB "JPEG"
+
+
+class PhotoHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        # Chunked, so the size cap has to be enforced while streaming
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i in range(0, len(PHOTO), 16384):
+            chunk = PHOTO[i:i + 16384]
+            self.wfile.write(f'{len(chunk):x}\r\n'.encode() + chunk + b'\r\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def log_message(self, *args):
+        pass
+
+
+class DripHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(PHOTO)))
+        self.end_headers()
+        # A byte at a time, each well inside the read timeout
+        try:
+            for i in range(len(PHOTO)):
+                self.wfile.write(PHOTO[i:i + 1])
+                self.wfile.flush()
+                time.sleep(0.05)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def test_media_store():
+    print("🧪 Testing content-addressed media store...")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PhotoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/photo.jpg'
+
+    try:
+        store = MediaStore(root=tempfile.mkdtemp())
+        digest = store.download(url)
+        assert digest == hashlib.sha256(PHOTO).hexdigest()
+        assert store.read(digest) == PHOTO
+        assert store.content_type(digest) == 'image/jpeg'
+        assert store.path(digest).endswith(os.path.join(digest[:2], digest[2:4], digest))
+        print("✅ Streamed download stored under its SHA-256")
+
+        assert store.put_bytes(PHOTO) == digest
+        assert store.stats()['stored'] == 1 and store.stats()['already_stored'] == 1
+        print("✅ Identical media is stored once")
+
+        small = MediaStore(root=tempfile.mkdtemp(), max_bytes=50 * 1024)
+        try:
+            small.download(url)
+            assert False, "download over the cap should fail"
+        except MediaTooLarge:
+            pass
+        assert os.listdir(os.path.join(small.root, 'tmp')) == []
+        assert small.stats()['rejected'] == 1
+        print("✅ Oversized media is rejected mid-stream without leaving files behind")
+    finally:
+        server.shutdown()
+
+    drip = ThreadingHTTPServer(('127.0.0.1', 0), DripHandler)
+    threading.Thread(target=drip.serve_forever, daemon=True).start()
+    try:
+        slow = MediaStore(root=tempfile.mkdtemp(), deadline=0.5)
+        start = time.monotonic()
+        try:
+            slow.download(f'http://127.0.0.1:{drip.server_address[1]}/photo.jpg')
+            assert False, "a download past its deadline should fail"
+        except TimeoutError:
+            pass
+        assert time.monotonic() - start < 1.5
+        assert os.listdir(os.path.join(slow.root, 'tmp')) == []
+        print("✅ A slow drip is cut off at the deadline, not after a full chunk")
+    finally:
+        drip.shutdown()
+
+    assert not store.exists('../../etc/passwd')
+    assert media_url({'image_hash': digest, 'image_url': url}) == f'/media/{digest}'
+    assert media_url({'image_hash': None, 'image_url': url}) == url
+    print("✅ Only well-formed hashes resolve to paths")
+
+    print("🎉 All media store tests passed!")
+
+if __name__ == "__main__":
+    test_media_store()
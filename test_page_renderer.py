@@ -0,0 +1,51 @@
+# test_page_renderer.py
+import os
+import tempfile
+from media_store import media_url
+from page_renderer import PageRenderer
+
+
+def test_page_renderer():
+    print("🧪 Testing precompiled templates with cached chrome...")
+
+    templates_dir = tempfile.mkdtemp()
+    with open(os.path.join(templates_dir, 'layout.html'), 'w') as f:
+        f.write('<html><h1>Reports</h1>{{ slot.stats }}<table>{{ slot.rows }}</table></html>')
+    with open(os.path.join(templates_dir, 'rows.html'), 'w') as f:
+        f.write('{% for report in reports %}<tr><td>{{ report.location }}</td></tr>{% endfor %}')
+
+    renderer = PageRenderer(templates_dir=templates_dir, auto_reload=False)
+    assert sorted(renderer.precompile()) == ['layout.html', 'rows.html']
+
+    rows = renderer.render('rows.html', reports=[{'location': 'Main St & <b>5th</b>'}])
+    html = renderer.page('layout.html', stats='<p>3 open</p>', rows=rows)
+    assert html == ('<html><h1>Reports</h1><p>3 open</p><table>'
+                    '<tr><td>Main St &amp; &lt;b&gt;5th&lt;/b&gt;</td></tr></table></html>')
+    print("✅ Slots are filled with rendered fragments, and user text is escaped")
+
+    for _ in range(5):
+        renderer.page('layout.html', stats='', rows=renderer.render('rows.html', reports=[]))
+    stats = renderer.stats()
+    assert stats['cached_layouts'] == ['layout.html']
+    assert stats['templates']['layout.html']['renders'] == 1
+    assert stats['templates']['rows.html']['renders'] == 6
+    assert stats['templates']['page:layout.html']['renders'] == 6
+    print("✅ The layout's chrome is rendered once; only fragments re-render per page")
+
+    app_templates = PageRenderer()
+    names = app_templates.precompile()
+    assert 'map.html' in names and 'admin/layout.html' in names
+    assert '\x00' not in app_templates.page('map.html')
+    print(f"✅ All {len(names)} application templates compile")
+
+    digest = 'ab' * 32
+    row = app_templates.render('admin/rows.html', media_url=media_url, reports=[{
+        'id': 7, 'issue_type': 'pothole', 'location': 'Main St', 'status': 'received',
+        'department': 'public_works', 'created_at': '2024-05-01T10:00:00', 'image_hash': digest}])
+    assert f'src="/media/{digest}/thumb/128"' in row and 'data-report-id="7"' in row
+    print("✅ Admin rows show the 128px thumbnail of a stored photo")
+
+    print("🎉 All page renderer tests passed!")
+
+if __name__ == "__main__":
+    test_page_renderer()
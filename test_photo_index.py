@@ -0,0 +1,76 @@
+# test_photo_index.py
+import os
+import random
+import tempfile
+from database_manager import DatabaseManager
+from duplicate_detector import DuplicateDetector
+from photo_index import MultiIndexHash
+
+
+def flip(phash, bits):
+    """phash with the given bit positions inverted"""
+    value = int(phash, 16)
+    for bit in bits:
+        value ^= 1 << bit
+    return f'{value:016x}'
+
+
+def test_photo_index():
+    print("🧪 Testing perceptual-hash photo index...")
+
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(5000)]
+    every = dict(enumerate(values))
+    # Near neighbours of a few hashes, so every radius has something to find
+    for i in range(200):
+        every[5000 + i] = values[i] ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64))
+    index = MultiIndexHash()
+    for item, value in every.items():
+        index.add(value, item)
+    for radius in (0, 3, 6, 12):
+        for query in values[:50]:
+            expected = sorted((bin(query ^ value).count('1'), i) for i, value in every.items()
+                              if bin(query ^ value).count('1') <= radius)
+            assert sorted(index.search(query, radius)) == expected
+    index.remove(5000)
+    assert 5000 not in [item for _, item in index.search(values[0], 6)]
+    print("✅ Multi-index search matches a brute-force Hamming scan")
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'photo_test.db')
+    detector = DuplicateDetector(db=DatabaseManager(db_path=db_path))
+    photo = 'c3a5f00f0ff0a5c3'
+
+    def report(phash, lat=40.7128, lng=-74.0060, usable=True, issue_type='pothole'):
+        return {'phone': '+1234567890', 'issue_type': issue_type, 'description': 'Photo report',
+                'location': 'Main St', 'latitude': lat, 'longitude': lng,
+                'analysis': {'nlp': None, 'vision': None, 'image': {'phash': phash, 'usable': usable}}}
+
+    first_id, _ = detector.ingest_report(report(photo))
+    # Another angle of the same pothole, 150m away and classified differently
+    second_id, duplicate_of = detector.ingest_report(report(flip(photo, [1, 20, 40]), lat=40.7141, issue_type='other'))
+    assert duplicate_of == first_id
+    print("✅ A photo within a few bits of an open report's is linked as a duplicate")
+
+    _, far = detector.ingest_report(report(flip(photo, [2]), lat=40.80, lng=-73.95))
+    _, blurry = detector.ingest_report(report(photo, lat=40.60, lng=-74.10, usable=False))
+    _, different = detector.ingest_report(report(flip(photo, range(0, 64, 4)), lat=40.7129, issue_type='graffiti'))
+    assert far is None and blurry is None and different is None
+    print("✅ Look-alikes elsewhere, unusable photos and different photos are not linked")
+
+    assert detector.db.get_report(first_id)['image_phash'] == photo
+    assert [report_id for _, report_id in detector.photos.similar(photo, 16)][0] == first_id
+
+    detector.db.update_report(first_id, {'status': 'resolved'})
+    third_id, duplicate_of = detector.ingest_report(report(flip(photo, [5]), lat=40.7130))
+    assert duplicate_of is None
+    assert first_id not in [report_id for _, report_id in detector.photos.similar(photo)]
+    print("✅ Resolved reports drop out of the index")
+
+    warm = DuplicateDetector(db=detector.db)
+    assert warm.photos.find_duplicates(photo, 40.7128, -74.0060) == [third_id]
+    print(f"✅ A fresh index warms from the generated image_phash column ({warm.photos.stats()['indexed_photos']} photos)")
+
+    print("🎉 All photo index tests passed!")
+
+if __name__ == "__main__":
+    test_photo_index()
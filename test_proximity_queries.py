@@ -0,0 +1,50 @@
+# test_proximity_queries.py
+import os
+import random
+import tempfile
+import geohash
+from database_manager import DatabaseManager
+
+
+def test_proximity_queries():
+    print("🧪 Testing geohash proximity queries...")
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'proximity_test.db')
+    db = DatabaseManager(db_path=db_path)
+
+    random.seed(7)
+    for i in range(300):
+        db.create_report({
+            'phone': '+1234567890',
+            'issue_type': 'pothole' if i % 2 else 'garbage',
+            'description': f'Test report {i}',
+            'location': 'Test Street',
+            'latitude': 40.7128 + random.uniform(-0.02, 0.02),
+            'longitude': -74.0060 + random.uniform(-0.02, 0.02)
+        })
+
+    all_reports = db.get_reports(per_page=1000)['reports']
+    assert all(report['geohash'] for report in all_reports)
+    print("✅ Geohash populated on insert")
+
+    def distance(report):
+        return geohash.haversine_m(40.7128, -74.0060, report['latitude'], report['longitude'])
+
+    near = db.get_reports_near(40.7128, -74.0060, radius_m=600)
+    expected = sorted(r['id'] for r in all_reports if distance(r) <= 600)
+    assert sorted(r['id'] for r in near) == expected
+    print(f"✅ Radius query matched brute force ({len(near)} reports)")
+
+    nearest = db.get_nearest_reports(40.7128, -74.0060, k=5, filters={'issue_type': 'pothole'})
+    expected = sorted((r for r in all_reports if r['issue_type'] == 'pothole'), key=distance)[:5]
+    assert [r['id'] for r in nearest] == [r['id'] for r in expected]
+    print("✅ k-nearest query matched brute force")
+
+    cells = db.get_geohash_cell_counts(precision=5)
+    assert sum(cell['count'] for cell in cells) == len(all_reports)
+    print(f"✅ Grid cell counts cover all {len(all_reports)} reports")
+
+    print("🎉 All proximity tests passed!")
+
+if __name__ == "__main__":
+    test_proximity_queries()
@@ -0,0 +1,81 @@
+# test_reclassify.py
+import json
+import os
+import sqlite3
+import tempfile
+from database_manager import DatabaseManager
+from intelligent_nlp import IntelligentCivicNLP
+from reclassify import reclassify
+from text_classifier import TextClassifier
+
+MESSAGES = [
+    "Huge pothole on Main Street",
+    "huge   POTHOLE on main street",
+    "Semáforo apagado en la esquina",
+    "semaforo apagado en la esquina",
+    "trash everywhere near the park",
+    "hello",
+    "",
+    None,
+    "Hay basura y un bache en la calle Mayor",
+]
+
+
+def test_reclassify():
+    print("🧪 Testing batch re-classification...")
+
+    model = TextClassifier.train(
+        ["big hole in the road", "crater in the asphalt", "el semáforo no funciona", "semáforo roto",
+         "bags of rubbish", "basura en la acera"],
+        ['pothole', 'pothole', 'traffic', 'traffic', 'garbage', 'garbage'], n_features=4096)
+    for classifier in (None, model):
+        single = IntelligentCivicNLP(classifier=classifier)
+        batch = IntelligentCivicNLP(classifier=classifier)
+        expected = [single.analyze_message(message) for message in MESSAGES]
+        assert batch.classify_many(MESSAGES) == expected
+        # A second batch is answered from the cache with the same results
+        assert batch.classify_many(list(reversed(MESSAGES))) == list(reversed(expected))
+    print("✅ classify_many matches analyze_message per message, with and without the model")
+
+    db = DatabaseManager(db_path=os.path.join(tempfile.mkdtemp(), 'reclassify.db'))
+    conn = sqlite3.connect(db.db_path)
+    rows = [
+        ("Huge pothole on Main Street", 'other', None, 0),
+        ("Photo report", 'graffiti', 'parks', 0),
+        ("trash everywhere near the park", 'water_issue', 'water_department', 1),
+    ]
+    for description, issue_type, department, corrected in rows:
+        conn.execute("INSERT INTO reports (phone, issue_type, description, location, department, issue_type_corrected) "
+                     "VALUES ('+1', ?, ?, 'Main St', ?, ?)", (issue_type, description, department, corrected))
+    conn.commit()
+
+    stats = reclassify(db.db_path, chunk_size=2, processes=1)
+    assert stats['processed'] == 2 and stats['changed'] == 1
+    stored = conn.execute("SELECT issue_type, department, pattern_version, analysis FROM reports ORDER BY id").fetchall()
+    assert stored[0][:3] == ('pothole', 'public_works', stats['version'])
+    assert json.loads(stored[0][3])['nlp']['primary_issue'] == 'pothole'
+    assert stored[1][:3] == ('graffiti', 'parks', stats['version'])
+    assert stored[2][:2] == ('water_issue', 'water_department') and stored[2][2] is None
+    assert reclassify(db.db_path, processes=1)['processed'] == 0
+    print("✅ Stale reports are re-classified once; placeholders and admin corrections keep their labels")
+
+    # Photo reports: a more confident stored vision label still wins over the text
+    photo = {'nlp': None, 'vision': {'primary_issue': 'graffiti', 'confidence': 0.99, 'analysis_source': 'google_vision'}}
+    unsure = {'nlp': None, 'vision': {'primary_issue': 'garbage', 'confidence': 0.1, 'analysis_source': 'google_vision'}}
+    for analysis in (photo, unsure):
+        conn.execute("INSERT INTO reports (phone, issue_type, description, location, analysis) "
+                     "VALUES ('+1', 'pothole', 'Something is wrong on Main Street', 'Main St', ?)", (json.dumps(analysis),))
+    conn.commit()
+    assert reclassify(db.db_path, processes=1)['processed'] == 2
+    stored = conn.execute("SELECT issue_type, department, analysis FROM reports WHERE id > 3 ORDER BY id").fetchall()
+    assert stored[0][:2] == ('graffiti', 'public_works')
+    assert stored[1][:2] == ('other', 'public_works')
+    assert json.loads(stored[0][2])['vision']['primary_issue'] == 'graffiti'
+    print("✅ Vision results are resolved against the fresh text classification, as on the webhook")
+
+    conn.close()
+
+    print("🎉 All re-classification tests passed!")
+
+if __name__ == "__main__":
+    test_reclassify()
@@ -0,0 +1,38 @@
+# test_reverse_geocoder.py
+import os
+import tempfile
+from reverse_geocoder import ReverseGeocoder
+
+
+def test_reverse_geocoder():
+    print("🧪 Testing offline reverse geocoding...")
+
+    places_file = os.path.join(tempfile.mkdtemp(), 'places.csv')
+    with open(places_file, 'w', encoding='utf-8') as f:
+        f.write("name,kind,latitude,longitude\n"
+                "Times Square,landmark,40.7580,-73.9855\n"
+                "Herald Square,,40.7500,-73.9878\n"
+                "Broken Row,landmark,not-a-number,-73.9\n")
+
+    geocoder = ReverseGeocoder(places_file=places_file)
+    place = geocoder.nearest(40.7580, -73.9855)
+    assert place['name'] == 'Times Square' and place['distance_m'] == 0
+    assert geocoder.describe(40.7580, -73.9855) == 'Times Square'
+    assert geocoder.describe(40.7510, -73.9878) == 'Near Herald Square'
+    assert geocoder.nearest(40.7500, -73.9878)['kind'] == 'place'
+    print("✅ Nearest place by name, 'Near' past 50m, default kind, bad rows skipped")
+
+    assert geocoder.nearest(40.9, -73.9855) is None
+    assert geocoder.describe(40.9, -73.9855) == '40.90000, -73.98550'
+    assert geocoder.nearest(None, -73.9855) is None
+    print("✅ Nothing within range falls back to the coordinates themselves")
+
+    missing = ReverseGeocoder(places_file=os.path.join(tempfile.mkdtemp(), 'missing.csv'))
+    assert missing.nearest(40.7580, -73.9855) is None
+    assert missing.describe(40.7580, -73.9855) == '40.75800, -73.98550'
+    print("✅ A missing places file degrades to coordinate text")
+
+    print("🎉 All reverse geocoding tests passed!")
+
+if __name__ == "__main__":
+    test_reverse_geocoder()
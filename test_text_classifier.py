@@ -0,0 +1,68 @@
+# test_text_classifier.py
+import os
+import tempfile
+from text_classifier import TextClassifier
+from intelligent_nlp import IntelligentCivicNLP
+
+TRAINING_DATA = [
+    ("big hole in the road on main street", 'pothole'),
+    ("my car hit a crater in the asphalt", 'pothole'),
+    ("the road surface is crumbling near the school", 'pothole'),
+    ("bins have not been emptied for weeks", 'garbage'),
+    ("bags of rubbish piled up by the park", 'garbage'),
+    ("someone dumped an old mattress on the corner", 'garbage'),
+    ("lamp on our block stays dark all night", 'street_light'),
+    ("the lamp post by the bus stop is out", 'street_light'),
+    ("water gushing out of the sidewalk", 'water_issue'),
+    ("basement keeps flooding after rain", 'water_issue'),
+]
+
+
+def test_text_classifier():
+    print("🧪 Testing trainable issue classifier...")
+
+    texts, labels = zip(*TRAINING_DATA)
+    model = TextClassifier.train(texts, labels, n_features=4096)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'issue_classifier')
+        model.save(path)
+        loaded = TextClassifier.load(path)
+        assert loaded.version == model.version
+        assert loaded.classes == ['garbage', 'pothole', 'street_light', 'water_issue']
+        print("✅ Weights round-trip through a memory-mapped .npy file")
+
+        batch = ["rubbish piled on the corner", "a crater in the road", "the lamp is dark", ""]
+        predictions = loaded.predict_many(batch)
+        assert [label for label, _ in predictions[:3]] == ['garbage', 'pothole', 'street_light']
+        assert all(0 < p <= 1 for _, p in predictions)
+        assert predictions[1] == loaded.predict(batch[1])
+        print("✅ Batch inference matches single-message inference")
+
+        nlp = IntelligentCivicNLP(classifier=loaded)
+        analysis = nlp.analyze_message("rubbish piled on the corner again")
+        assert analysis['classifier'] == 'model'
+        assert analysis['primary_issue'] == 'garbage'
+        assert analysis['department'] == 'sanitation'
+        # An unsure model defers to the keyword automaton
+        fallback = nlp.analyze_message("graffiti everywhere")
+        assert fallback['classifier'] == 'keywords'
+        assert fallback['primary_issue'] == 'graffiti'
+        assert nlp.classify_many(["rubbish piled on the corner again", "graffiti everywhere"]) == [analysis, fallback]
+        assert nlp.version != IntelligentCivicNLP().version
+        print("✅ IntelligentCivicNLP prefers the model and falls back to keywords")
+
+    # Accented training text and messages hash to the same folded tokens
+    accented = TextClassifier.train(["el semáforo está apagado", "semáforo roto en la esquina",
+                                     "basura en la calle", "bolsas de basura tiradas"],
+                                    ['traffic', 'traffic', 'garbage', 'garbage'], n_features=4096)
+    assert accented.predict("SEMAFORO apagado") == accented.predict("semáforo apagado")
+    single = IntelligentCivicNLP(classifier=accented).analyze_message("Semáforo apagado")
+    batch = IntelligentCivicNLP(classifier=accented).classify_many(["Semáforo apagado"])[0]
+    assert single == batch and single['primary_issue'] == 'traffic'
+    print("✅ Webhook and batch paths agree on accented messages")
+
+    print("🎉 All text classifier tests passed!")
+
+if __name__ == "__main__":
+    test_text_classifier()
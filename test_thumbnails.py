@@ -0,0 +1,37 @@
+# test_thumbnails.py
+import io
+import tempfile
+from PIL import Image
+from media_store import MediaStore, media_url
+from thumbnails import Thumbnailer
+
+
+def test_thumbnails():
+    print("🧪 Testing thumbnail generation...")
+
+    store = MediaStore(root=tempfile.mkdtemp())
+    photo = io.BytesIO()
+    Image.new('RGB', (2400, 1600), (120, 90, 60)).save(photo, 'JPEG')
+    digest = store.put_bytes(photo.getvalue())
+
+    thumbnailer = Thumbnailer(store, workers=1)
+    assert thumbnailer.submit(digest).result() is None
+    for size in (800, 320, 128):
+        with Image.open(thumbnailer.path(digest, size)) as thumb:
+            assert max(thumb.size) == size
+            assert abs(thumb.size[0] / thumb.size[1] - 1.5) < 0.01
+    assert thumbnailer.stats()['generated'] == 1
+    print("✅ Every size written once, keeping the aspect ratio")
+
+    assert thumbnailer.generate(digest) == []
+    assert thumbnailer.submit(digest).result() is None
+    assert thumbnailer.stats()['skipped'] == 1
+    print("✅ Existing thumbnails are not regenerated")
+
+    assert media_url({'image_hash': digest}, 320) == f'/media/{digest}/thumb/320'
+    print("✅ Pages reference thumbnails by size")
+
+    print("🎉 All thumbnail tests passed!")
+
+if __name__ == "__main__":
+    test_thumbnails()
@@ -0,0 +1,76 @@
+# test_vision_batcher.py
+import os
+import tempfile
+import threading
+from database_manager import DatabaseManager
+from media_store import MediaStore
+from vision_batcher import VisionBatcher
+from vision_stub import start_stub
+
+
+def test_vision_batcher():
+    print("🧪 Testing batched vision requests...")
+
+    server, url = start_stub(latency=0.01, per_image_latency=0)
+    store = MediaStore(root=tempfile.mkdtemp())
+    results = {}
+    lock = threading.Lock()
+
+    def on_result(report_id, digest, result):
+        with lock:
+            results[report_id] = (digest, result)
+
+    def first_label(data):
+        return {'label': data['responses'][0]['labelAnnotations'][0]['description']}
+
+    try:
+        batcher = VisionBatcher(on_result, first_label, api_url=url, store=store, max_wait=0.5)
+        assert batcher.enabled
+
+        kinds = ['pothole', 'garbage', 'graffiti']
+        digests = [store.put_bytes(f'\xff\xd8 photo {i} label:{kinds[i % 3]};'.encode('latin-1')) for i in range(18)]
+        for report_id, digest in enumerate(digests, start=1):
+            batcher.submit(report_id, digest)
+        # A forwarded copy of report 1's photo
+        batcher.submit(99, digests[0])
+        batcher.flush()
+
+        assert server.calls == 2 and server.batch_sizes == [16, 3]
+        assert len(results) == 19
+        assert results[1] == (digests[0], {'label': 'Road'})
+        assert results[2][1] == {'label': 'Waste'} and results[3][1] == {'label': 'Graffiti'}
+        assert results[99] == results[1]
+        print(f"✅ 19 reports annotated in {server.calls} requests, each result routed to its report")
+
+        stats = batcher.stats()
+        assert stats['largest_batch'] == 16 and stats['results'] == 19 and stats['errors'] == 0
+
+        # With nothing else waiting, a lone image goes out after max_wait
+        quick = VisionBatcher(on_result, first_label, api_url=url, store=store, max_wait=0.05)
+        quick.submit(100, digests[1])
+        quick.flush()
+        assert results[100][1] == {'label': 'Waste'} and server.calls == 3
+        print("✅ Partial batches are sent once the wait window closes")
+
+        # After a restart, reports saved as pending are picked up from the database
+        db = DatabaseManager(db_path=os.path.join(tempfile.mkdtemp(), 'pending.db'))
+        pending = {'nlp': None, 'vision': {'analysis_source': 'pending', 'detected_issues': []}}
+        stored_id = db.create_report({'phone': '+1', 'issue_type': 'other', 'description': 'Photo report',
+                                      'location': 'Main St', 'image_hash': digests[2], 'analysis': pending})
+        lost_id = db.create_report({'phone': '+1', 'issue_type': 'other', 'description': 'Photo report',
+                                    'location': 'Main St', 'image_hash': 'f' * 64, 'analysis': pending})
+        db.create_report({'phone': '+1', 'issue_type': 'other', 'description': 'Photo report',
+                          'location': 'Main St', 'image_hash': digests[3], 'analysis': {'vision': {'analysis_source': 'vision_api'}}})
+        restarted = VisionBatcher(on_result, first_label, api_url=url, store=store, max_wait=0.05)
+        assert restarted.resume(db) == 1
+        restarted.flush()
+        assert results[stored_id] == (digests[2], {'label': 'Graffiti'})
+        assert results[lost_id][1]['error'] == 'Image is no longer stored'
+        print("✅ Pending reports are re-queued on startup; ones whose image is gone get an error result")
+    finally:
+        server.shutdown()
+
+    print("🎉 All vision batcher tests passed!")
+
+if __name__ == "__main__":
+    test_vision_batcher()
@@ -0,0 +1,53 @@
+# test_vision_cache.py
+import os
+import tempfile
+import time
+from database_manager import DatabaseManager
+from duplicate_detector import DuplicateDetector
+from vision_cache import VisionCache, image_hash
+
+
+def test_vision_cache():
+    print("🧪 Testing content-hash vision cache...")
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'vision_test.db')
+    db = DatabaseManager(db_path=db_path)
+    cache = VisionCache(db_path=db_path)
+
+    photo = b'\xff\xd8\xff\xe0 fake jpeg bytes'
+    digest = image_hash(photo)
+    assert digest == image_hash(bytes(photo)) and len(digest) == 64
+    assert cache.get(digest) is None
+
+    result = {'analysis_source': 'google_vision_api', 'primary_issue': 'pothole', 'confidence': 0.92}
+    cache.put(digest, result)
+    assert cache.get(digest) == result
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    print("✅ Parsed results are served by image hash")
+
+    short_lived = VisionCache(db_path=db_path, ttl_days=0.5 / 86400)
+    short_lived.put(digest, result)
+    time.sleep(0.6)
+    assert short_lived.get(digest) is None
+    assert short_lived.stats()['expired'] == 1
+    print("✅ Expired results are dropped and re-analyzed")
+
+    detector = DuplicateDetector(db=db)
+    report = {'phone': '+1234567890', 'issue_type': 'pothole', 'description': 'Pothole', 'location': 'Main St',
+              'latitude': 40.7128, 'longitude': -74.0060}
+    first_id, _ = detector.ingest_report(dict(report), same_image_reports=cache.reports_for_image(digest))
+    cache.link_report(first_id, digest)
+
+    # A forward of the same photo, tagged elsewhere and classified differently
+    forward = dict(report, issue_type='other', latitude=40.80, longitude=-73.95)
+    second_id, duplicate_of = detector.ingest_report(forward, same_image_reports=cache.reports_for_image(digest))
+    cache.link_report(second_id, digest)
+    assert duplicate_of == first_id
+    assert cache.reports_for_image(digest) == [first_id, second_id]
+    assert cache.stats()['shared_images'] == 1
+    print("✅ Reports sharing a photo are linked as duplicates")
+
+    print("🎉 All vision cache tests passed!")
+
+if __name__ == "__main__":
+    test_vision_cache()
@@ -0,0 +1,187 @@
+# text_classifier.py
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import zlib
+from datetime import datetime
+from language_packs import fold
+
+try:
+    import numpy as np
+except ImportError:  # Keyword matching still works without the model
+    np = None
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'issue_classifier')
+DEFAULT_FEATURES = 2 ** 16
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Descriptions the webhook stores when no text was sent; useless as training data
+PLACEHOLDER_DESCRIPTIONS = ('', 'Photo report', 'Shared location')
+
+
+def hashed_features(text, n_features=DEFAULT_FEATURES):
+    """Hashed word unigram and bigram ids for a message.
+
+    Text is accent-folded like the analysis cache key, so training, single
+    and batch prediction all see 'semáforo' as the one token 'semaforo'.
+    crc32 rather than hash() so ids are stable across processes and restarts.
+    """
+    tokens = TOKEN_PATTERN.findall(fold(text or ''))
+    grams = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+    return [zlib.crc32(gram.encode('utf-8')) % n_features for gram in grams]
+
+
+class TextClassifier:
+    """Multinomial naive Bayes over hashed n-grams.
+
+    `weights` has one row per hashed feature plus a final row holding the
+    class log priors, so a batch scores as counts @ weights[features] + prior.
+    """
+
+    def __init__(self, weights, classes, n_features, meta=None):
+        self.weights = weights
+        self.classes = list(classes)
+        self.n_features = n_features
+        self.meta = meta or {}
+        self.version = self.meta.get('version') or 'untrained'
+
+    # Training
+    @classmethod
+    def train(cls, texts, labels, n_features=DEFAULT_FEATURES, alpha=1.0):
+        """Fit class log priors and smoothed per-feature log likelihoods"""
+        classes = sorted(set(labels))
+        class_index = {label: i for i, label in enumerate(classes)}
+
+        counts = np.zeros((n_features, len(classes)), dtype=np.float64)
+        class_totals = np.zeros(len(classes), dtype=np.float64)
+        for text, label in zip(texts, labels):
+            features = hashed_features(text, n_features)
+            np.add.at(counts[:, class_index[label]], features, 1)
+            class_totals[class_index[label]] += 1
+
+        smoothed = counts + alpha
+        log_likelihood = np.log(smoothed / smoothed.sum(axis=0))
+        log_prior = np.log(class_totals / class_totals.sum())
+
+        weights = np.vstack([log_likelihood, log_prior]).astype(np.float32)
+        meta = {
+            'classes': classes,
+            'n_features': n_features,
+            'alpha': alpha,
+            'samples': len(labels),
+            'class_counts': {label: int(class_totals[i]) for label, i in class_index.items()},
+            'trained_at': datetime.now().isoformat(),
+            'version': hashlib.sha1(weights.tobytes()).hexdigest()[:12]
+        }
+        return cls(weights, classes, n_features, meta)
+
+    # Persistence
+    def save(self, path=DEFAULT_MODEL_PATH):
+        """Write weights to `<path>.npy` and metadata to `<path>.json`"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.save(path + '.npy', self.weights)
+        with open(path + '.json', 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        print(f"💾 Saved issue classifier {self.version} to {path}.npy")
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        """Memory-map the weights so workers share the pages instead of copying them"""
+        with open(path + '.json') as f:
+            meta = json.load(f)
+        weights = np.load(path + '.npy', mmap_mode='r')
+        return cls(weights, meta['classes'], meta['n_features'], meta)
+
+    # Inference
+    def predict_many(self, texts):
+        """Classify a batch with one gather and one matrix multiply.
+
+        Returns [(label, probability)] in input order.
+        """
+        if not texts:
+            return []
+
+        doc_ids, features = [], []
+        for i, text in enumerate(texts):
+            ids = hashed_features(text, self.n_features)
+            doc_ids.extend([i] * len(ids))
+            features.extend(ids)
+
+        # Only the feature rows this batch uses are read from the mapped file
+        used, columns = np.unique(np.asarray(features, dtype=np.int64), return_inverse=True)
+        counts = np.zeros((len(texts), len(used)), dtype=np.float32)
+        np.add.at(counts, (np.asarray(doc_ids, dtype=np.int64), columns), 1)
+
+        scores = counts @ self.weights[used] + self.weights[-1]
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        best = probabilities.argmax(axis=1)
+        return [(self.classes[c], float(probabilities[i, c])) for i, c in enumerate(best)]
+
+    def predict(self, text):
+        return self.predict_many([text])[0]
+
+    def info(self):
+        return {
+            'version': self.version,
+            'classes': self.classes,
+            'n_features': self.n_features,
+            'samples': self.meta.get('samples'),
+            'trained_at': self.meta.get('trained_at')
+        }
+
+
+def load_classifier(path=None):
+    """Load the trained model if numpy and the model files are available"""
+    path = path or os.environ.get('CIVICBOT_CLASSIFIER_MODEL', DEFAULT_MODEL_PATH)
+    if np is None:
+        print("⚠️ numpy not installed - using keyword classification only")
+        return None
+    if not os.path.exists(path + '.npy'):
+        return None
+
+    try:
+        classifier = TextClassifier.load(path)
+        print(f"✅ Loaded issue classifier {classifier.version} ({len(classifier.classes)} classes)")
+        return classifier
+    except Exception as e:
+        print(f"❌ Could not load issue classifier: {e}")
+        return None
+
+
+def load_training_data(db_path='civicbot.db'):
+    """(description, issue_type) pairs for reports an admin has corrected"""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute('''
+            SELECT description, issue_type FROM reports
+            WHERE issue_type_corrected = 1 AND issue_type IS NOT NULL
+        ''').fetchall()
+    finally:
+        conn.close()
+    return [(text, label) for text, label in rows if (text or '') not in PLACEHOLDER_DESCRIPTIONS]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the issue classifier from admin-corrected reports")
+    parser.add_argument('--db', default='civicbot.db', help="SQLite database path")
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH, help="Model path prefix (.npy/.json are appended)")
+    parser.add_argument('--features', type=int, default=DEFAULT_FEATURES, help="Hashed feature buckets")
+    parser.add_argument('--min-samples', type=int, default=50, help="Refuse to train on fewer corrected reports")
+    args = parser.parse_args()
+
+    data = load_training_data(args.db)
+    labels = {label for _, label in data}
+    if len(data) < args.min_samples or len(labels) < 2:
+        print(f"⚠️ Only {len(data)} corrected reports across {len(labels)} issue types - not training")
+    else:
+        texts, targets = zip(*data)
+        model = TextClassifier.train(texts, targets, n_features=args.features)
+        model.save(args.output)
+        print(f"✅ Trained on {len(data)} reports: {model.meta['class_counts']}")
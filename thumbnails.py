@@ -0,0 +1,146 @@
+# thumbnails.py
+import argparse
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from media_store import media_store, HASH_PATTERN
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # thumbnails are skipped without Pillow
+    Image = None
+
+# Longest edge of each preview: list rows, map popups, report detail
+THUMBNAIL_SIZES = (128, 320, 800)
+THUMBNAIL_QUALITY = 80
+
+
+def thumbnail_format():
+    """WebP where Pillow can write it, JPEG otherwise"""
+    if Image is not None and features.check('webp'):
+        return 'WEBP', 'webp', 'image/webp'
+    return 'JPEG', 'jpg', 'image/jpeg'
+
+
+class Thumbnailer:
+    """Fixed-size previews of stored media, generated once per image.
+
+    Generation runs in a small thread pool (Pillow releases the GIL while
+    decoding and resampling), so the webhook only queues the work. The
+    original is decoded once, with JPEG draft mode scaling it down during
+    decode, and each size is resampled from the next larger one.
+    """
+
+    def __init__(self, store=None, sizes=THUMBNAIL_SIZES, workers=None):
+        self.store = store or media_store
+        self.sizes = tuple(sorted(sizes, reverse=True))
+        self.format, self.extension, self.content_type = thumbnail_format()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or int(os.environ.get('THUMBNAIL_WORKERS', 2)),
+            thread_name_prefix='thumbnail'
+        )
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._stats = {'generated': 0, 'failed': 0, 'skipped': 0}
+
+    @property
+    def available(self):
+        return Image is not None
+
+    def path(self, digest, size):
+        if not HASH_PATTERN.match(digest or ''):
+            raise ValueError(f"Not a media hash: {digest!r}")
+        return os.path.join(self.store.root, 'thumbs', str(size), digest[:2], f'{digest}.{self.extension}')
+
+    def exists(self, digest, size):
+        try:
+            return os.path.exists(self.path(digest, size))
+        except ValueError:
+            return False
+
+    def generate(self, digest):
+        """Write every missing size for a stored image; returns the sizes written"""
+        missing = [size for size in self.sizes if not self.exists(digest, size)]
+        if not missing or not self.available:
+            return []
+
+        with Image.open(self.store.path(digest)) as original:
+            # Let the JPEG decoder scale down by up to 8x while decoding
+            original.draft('RGB', (self.sizes[0], self.sizes[0]))
+            image = ImageOps.exif_transpose(original).convert('RGB')
+
+        written = []
+        for size in self.sizes:
+            image.thumbnail((size, size), Image.LANCZOS)
+            if size in missing:
+                self._save(image, self.path(digest, size))
+                written.append(size)
+        return written
+
+    def _save(self, image, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, self.format, quality=THUMBNAIL_QUALITY)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def _run(self, digest):
+        try:
+            if self.generate(digest):
+                self._count('generated')
+            else:
+                self._count('skipped')
+        except Exception as e:
+            self._count('failed')
+            print(f"⚠️ Thumbnail generation failed for {digest[:12]}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(digest)
+
+    def submit(self, digest):
+        """Queue thumbnail generation; returns the future, or None if already queued"""
+        if not self.available or not digest:
+            return None
+        with self._lock:
+            if digest in self._pending:
+                return None
+            self._pending.add(digest)
+        return self._executor.submit(self._run, digest)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending), sizes=list(self.sizes),
+                        format=self.format, available=self.available)
+
+
+def backfill(store=None):
+    """Generate thumbnails for every stored image that lacks some"""
+    thumbnailer = Thumbnailer(store)
+    futures = []
+    for directory, _, files in os.walk(thumbnailer.store.root):
+        if os.path.relpath(directory, thumbnailer.store.root).split(os.sep)[0] in ('thumbs', 'tmp'):
+            continue
+        futures.extend(thumbnailer.submit(name) for name in files if HASH_PATTERN.match(name))
+    for future in futures:
+        if future:
+            future.result()
+    print(f"✅ Thumbnails: {thumbnailer.stats()}")
+
+
+# Global instance
+thumbnailer = Thumbnailer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate missing thumbnails for stored media")
+    parser.parse_args()
+    backfill()
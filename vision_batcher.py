@@ -0,0 +1,191 @@
+# vision_batcher.py
+import base64
+import os
+import queue
+import threading
+import time
+from http_client import http_client
+from media_store import media_store
+
+GOOGLE_VISION_URL = 'https://vision.googleapis.com/v1/images:annotate'
+
+# images:annotate takes at most 16 images per call; keep the base64 JSON
+# body under the request size limit as well
+MAX_BATCH_IMAGES = 16
+MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+VISION_FEATURES = [
+    {"type": "LABEL_DETECTION", "maxResults": 10},
+    {"type": "OBJECT_LOCALIZATION", "maxResults": 10},
+    {"type": "SAFE_SEARCH_DETECTION", "maxResults": 5}
+]
+
+
+class VisionBatcher:
+    """Enrichment queue that sends pending report images to Vision in batches.
+
+    Reports are saved right away and their image is queued here. A worker
+    thread takes the first waiting image, keeps collecting for up to
+    `max_wait` seconds (or until the batch is full), then sends one
+    multi-image annotate request. Each response is parsed and handed to
+    `on_result(report_id, digest, result)` in request order. Identical
+    images in one batch are sent once.
+    """
+
+    def __init__(self, on_result, parse, api_url=None, api_key=None, store=None,
+                 max_batch=MAX_BATCH_IMAGES, max_wait=None):
+        self.on_result = on_result
+        self.parse = parse
+        self.api_url = api_url or os.environ.get('VISION_API_URL') or GOOGLE_VISION_URL
+        self.api_key = api_key or os.environ.get('GOOGLE_VISION_API_KEY')
+        self.store = store or media_store
+        self.max_batch = min(max_batch, MAX_BATCH_IMAGES)
+        self.max_wait = max_wait if max_wait is not None else float(os.environ.get('VISION_BATCH_WAIT_MS', 500)) / 1000
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._stats = {'queued': 0, 'resumed': 0, 'batches': 0, 'images_sent': 0, 'results': 0, 'errors': 0,
+                       'largest_batch': 0}
+
+    @property
+    def enabled(self):
+        """Configured with an API key, or pointed at a local stub"""
+        return bool(self.api_key) or self.api_url != GOOGLE_VISION_URL
+
+    def submit(self, report_id, digest):
+        """Queue a stored image for analysis on behalf of a report"""
+        self._ensure_worker()
+        self._count('queued')
+        self._queue.put((report_id, digest))
+
+    def resume(self, db):
+        """Re-queue reports saved as pending before a restart, since the queue lives in memory.
+
+        A report whose image is no longer stored gets an error result
+        instead, so it does not stay pending forever.
+        """
+        if not self.enabled:
+            return 0
+        resumed = 0
+        for report_id, digest in db.get_pending_vision_reports():
+            if self.store.exists(digest):
+                self.submit(report_id, digest)
+                resumed += 1
+            else:
+                self.on_result(report_id, digest, {"analysis_source": "vision_api", "detected_issues": [],
+                                                   "error": "Image is no longer stored"})
+        if resumed:
+            self._count('resumed', resumed)
+            print(f"🖼️ Re-queued {resumed} reports still waiting on vision analysis")
+        return resumed
+
+    def flush(self):
+        """Block until everything queued so far has been analyzed"""
+        self._queue.join()
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name='vision-batcher', daemon=True)
+                    self._worker.start()
+
+    def _collect(self):
+        """The next batch: block for one item, then gather more until full or max_wait passes"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                for chunk in self._split_by_size(batch):
+                    self._send(chunk)
+            except Exception as e:
+                print(f"❌ Vision batch failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _split_by_size(self, batch):
+        """Split a batch so each request's encoded images stay under MAX_BATCH_BYTES"""
+        chunk, chunk_bytes = [], 0
+        sizes = {}
+        for report_id, digest in batch:
+            if digest not in sizes:
+                sizes[digest] = os.path.getsize(self.store.path(digest)) * 4 // 3
+            if chunk and chunk_bytes + sizes[digest] > MAX_BATCH_BYTES:
+                yield chunk
+                chunk, chunk_bytes = [], 0
+            chunk.append((report_id, digest))
+            chunk_bytes += sizes[digest]
+        if chunk:
+            yield chunk
+
+    def _send(self, batch):
+        digests = list(dict.fromkeys(digest for _, digest in batch))
+        payload = {
+            "requests": [
+                {
+                    "image": {"content": base64.b64encode(self.store.read(digest)).decode('utf-8')},
+                    "features": VISION_FEATURES
+                }
+                for digest in digests
+            ]
+        }
+
+        self._count('batches')
+        self._count('images_sent', len(digests))
+        with self._lock:
+            self._stats['largest_batch'] = max(self._stats['largest_batch'], len(digests))
+
+        params = {'key': self.api_key} if self.api_key else None
+        try:
+            response = http_client.post('google_vision', self.api_url, params=params, json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+            responses = response.json().get('responses', [])
+        except Exception as e:
+            print(f"Vision API error for a batch of {len(digests)}: {e}")
+            responses = [{'error': {'message': str(e)}}] * len(digests)
+
+        results = {}
+        for digest, image_response in zip(digests, responses):
+            if 'error' in image_response:
+                self._count('errors')
+                results[digest] = {"analysis_source": "vision_api", "detected_issues": [],
+                                   "error": image_response['error'].get('message', 'unknown error')}
+            else:
+                results[digest] = self.parse({'responses': [image_response]})
+
+        for report_id, digest in batch:
+            result = results.get(digest, {"analysis_source": "vision_api", "detected_issues": [], "error": "No response"})
+            try:
+                self.on_result(report_id, digest, result)
+                self._count('results')
+            except Exception as e:
+                print(f"❌ Could not apply vision result to report #{report_id}: {e}")
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def stats(self):
+        with self._lock:
+            batches = self._stats['batches']
+            return dict(
+                self._stats,
+                pending=self._queue.qsize(),
+                avg_batch=round(self._stats['images_sent'] / batches, 2) if batches else 0,
+                max_wait_ms=round(self.max_wait * 1000),
+                enabled=self.enabled
+            )
@@ -0,0 +1,155 @@
+# vision_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def image_hash(content):
+    """SHA-256 hex digest of raw image bytes, the key for everything image related"""
+    return hashlib.sha256(content).hexdigest()
+
+
+class VisionCache:
+    """Persistent vision results keyed by image content, plus image -> report links.
+
+    Forwarded photos and repeat reports of the same spot send byte-identical
+    images; their parsed vision result is served from SQLite until it
+    expires instead of calling the Vision API again. Every report's image
+    hash is recorded in report_images, so reports sharing a photo can be
+    found with one index lookup.
+    """
+
+    def __init__(self, db_path='civicbot.db', ttl_days=None):
+        self.db_path = db_path
+        self.ttl_seconds = (ttl_days or float(os.environ.get('VISION_CACHE_TTL_DAYS', 30))) * 86400
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stores': 0}
+        self._init_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def _init_tables(self):
+        conn = self._connect()
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS vision_cache (
+                    image_hash TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    source TEXT,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    hits INTEGER DEFAULT 0
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS report_images (
+                    report_id INTEGER NOT NULL,
+                    image_hash TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (report_id, image_hash)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_report_images_hash ON report_images(image_hash)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_vision_cache_expires ON vision_cache(expires_at)')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, digest):
+        """The cached vision result for an image hash, or None if absent or expired"""
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT result, expires_at FROM vision_cache WHERE image_hash = ?', (digest,)).fetchone()
+            if row is None:
+                self._count('misses')
+                return None
+            if row[1] < time.time():
+                conn.execute('DELETE FROM vision_cache WHERE image_hash = ?', (digest,))
+                conn.commit()
+                self._count('expired')
+                self._count('misses')
+                return None
+            conn.execute('UPDATE vision_cache SET hits = hits + 1 WHERE image_hash = ?', (digest,))
+            conn.commit()
+        finally:
+            conn.close()
+        self._count('hits')
+        return json.loads(row[0])
+
+    def put(self, digest, result, source=None):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('''
+                INSERT OR REPLACE INTO vision_cache (image_hash, result, source, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (digest, json.dumps(result), source or result.get('analysis_source'), now, now + self.ttl_seconds))
+            conn.commit()
+        finally:
+            conn.close()
+        self._count('stores')
+
+    def purge_expired(self):
+        """Delete expired results, returning how many were removed"""
+        conn = self._connect()
+        try:
+            removed = conn.execute('DELETE FROM vision_cache WHERE expires_at < ?', (time.time(),)).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        if removed:
+            print(f"🧹 Purged {removed} expired vision results")
+        return removed
+
+    def reports_for_image(self, digest):
+        """IDs of reports that were sent this exact image, oldest first"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT report_id FROM report_images WHERE image_hash = ? ORDER BY report_id', (digest,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+
+    def link_report(self, report_id, digest):
+        """Record that a report carries an image"""
+        conn = self._connect()
+        try:
+            conn.execute('INSERT OR IGNORE INTO report_images (report_id, image_hash) VALUES (?, ?)', (report_id, digest))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            entries = conn.execute('SELECT COUNT(*) FROM vision_cache').fetchone()[0]
+            shared = conn.execute('''
+                SELECT COUNT(*) FROM (
+                    SELECT image_hash FROM report_images GROUP BY image_hash HAVING COUNT(*) > 1
+                )
+            ''').fetchone()[0]
+        finally:
+            conn.close()
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(
+                self._stats,
+                entries=entries,
+                shared_images=shared,
+                ttl_days=self.ttl_seconds / 86400,
+                hit_rate=round(self._stats['hits'] / lookups, 4) if lookups else 0
+            )
+
+
+# Global instance
+vision_cache = VisionCache()
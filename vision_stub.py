@@ -0,0 +1,104 @@
+# vision_stub.py
+import argparse
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Canned annotations; an image gets the set picked by its hash, or the set
+# named by an ASCII "label:<name>" marker anywhere in its bytes
+LABEL_SETS = {
+    'pothole': [('Road', 0.95), ('Asphalt', 0.91), ('Pothole', 0.86)],
+    'garbage': [('Waste', 0.93), ('Litter', 0.88), ('Dumpster', 0.81)],
+    'graffiti': [('Graffiti', 0.94), ('Wall', 0.9), ('Art', 0.72)],
+    'water_issue': [('Water', 0.92), ('Flood', 0.84), ('Puddle', 0.8)],
+    'street_light': [('Street light', 0.9), ('Lamp', 0.83), ('Sky', 0.75)],
+    'nothing': [('Sky', 0.88), ('Tree', 0.85), ('Cloud', 0.8)],
+}
+
+
+def annotate(content):
+    """Vision-style annotation for one image's bytes"""
+    name = None
+    marker = content.find(b'label:')
+    if marker >= 0:
+        name = content[marker + 6:].split(b';')[0].decode('ascii', 'ignore')
+    if name not in LABEL_SETS:
+        names = sorted(LABEL_SETS)
+        name = names[int(hashlib.sha256(content).hexdigest(), 16) % len(names)]
+
+    return {
+        'labelAnnotations': [{'description': label, 'score': score} for label, score in LABEL_SETS[name]],
+        'localizedObjectAnnotations': [],
+        'safeSearchAnnotation': {'adult': 'VERY_UNLIKELY', 'violence': 'UNLIKELY'}
+    }
+
+
+class VisionStubHandler(BaseHTTPRequestHandler):
+    """POST /v1/images:annotate with Google's request and response shapes"""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            requests = json.loads(body)['requests']
+        except (ValueError, KeyError):
+            return self._reply(400, {'error': {'message': 'Invalid JSON payload'}})
+        if len(requests) > 16:
+            return self._reply(400, {'error': {'message': 'At most 16 images per request'}})
+
+        server = self.server
+        with server.lock:
+            server.calls += 1
+            server.images += len(requests)
+            server.batch_sizes.append(len(requests))
+        # Fixed cost per call plus a smaller cost per image, like the real API
+        time.sleep(server.latency + server.per_image_latency * len(requests))
+
+        responses = []
+        for request in requests:
+            try:
+                responses.append(annotate(base64.b64decode(request['image']['content'])))
+            except (KeyError, ValueError):
+                responses.append({'error': {'code': 3, 'message': 'Bad image data'}})
+        self._reply(200, {'responses': responses})
+
+    def _reply(self, status, data):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(port=0, latency=0.05, per_image_latency=0.005):
+    """Run the stub in a background thread; returns (server, annotate URL)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), VisionStubHandler)
+    server.latency = latency
+    server.per_image_latency = per_image_latency
+    server.lock = threading.Lock()
+    server.calls = 0
+    server.images = 0
+    server.batch_sizes = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/v1/images:annotate'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Google Vision images:annotate API")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=50, help="Fixed delay per request")
+    parser.add_argument('--per-image-ms', type=float, default=5, help="Extra delay per image in a request")
+    args = parser.parse_args()
+
+    server, url = start_stub(args.port, args.latency_ms / 1000, args.per_image_ms / 1000)
+    print(f"🧪 Vision stub listening; run CivicBot with VISION_API_URL={url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()